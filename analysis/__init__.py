@@ -6,3 +6,6 @@ from .data_analysis import (
     StandardReportGenerator,
     DetailedReportGenerator,
 )
+from .ndjson_reader import iter_cars, iter_batches, read_ndjson
+from .parquet_reader import read_parquet
+from .sqlite_reader import read_sqlite
@@ -12,6 +12,13 @@ from datetime import datetime
 import seaborn as sns
 import warnings
 
+from scraping.car import CarBatch
+from scraping.compression import compression_of, open_text, strip_suffix
+
+from .ndjson_reader import read_ndjson
+from .parquet_reader import read_parquet
+from .sqlite_reader import read_sqlite
+
 warnings.filterwarnings("ignore", category=FutureWarning)
 warnings.filterwarnings("ignore", category=UserWarning)
 
@@ -21,17 +28,46 @@ class DataAnalysisBase(ABC):
     Classe base abstrata para análise de dados. Define uma estrutura comum e métodos para análise de dados.
     """
 
+    # Colunas sem as quais uma linha é descartada. O mês pode faltar (ex.: anúncios
+    # recolhidos em modo rápido, lidos só dos cartões da pesquisa)
+    REQUIRED_COLUMNS = ["brand", "price", "fuel", "year", "mileage", "power", "url"]
+
     def __init__(self, csv_file):
-        # Carrega dados do arquivo CSV e limpa os dados
-        self.__data = pd.read_csv(csv_file)
+        # Carrega dados do arquivo CSV ou NDJSON, da pasta do dataset Parquet (ou de um
+        # CarBatch ou DataFrame, já tipados) e limpa os dados. Uma base SQLite não é
+        # carregada: os filtros são executados nela (ver filter_data)
+        self.sqlite_path = None
+        if str(csv_file).endswith(".sqlite"):
+            self.sqlite_path = csv_file
+            self.__data = None
+            return
+        if isinstance(csv_file, CarBatch):
+            self.__data = csv_file.to_dataframe()
+        elif isinstance(csv_file, pd.DataFrame):
+            self.__data = csv_file.copy()
+        elif os.path.isdir(csv_file):
+            self.__data = read_parquet(csv_file)
+        elif strip_suffix(csv_file).endswith(".ndjson"):
+            self.__data = read_ndjson(csv_file).to_dataframe()
+        else:
+            self.__data = read_csv(csv_file)
         self.clean_data()
 
     def clean_data(self):
-        # Remove valores nulos dos dados
-        self.__data.dropna(inplace=True)
+        # Remove as linhas com valores nulos nas colunas obrigatórias
+        self.__data = self.drop_incomplete(self.__data)
+
+    def drop_incomplete(self, data):
+        # Devolve os dados sem as linhas a que falta alguma coluna obrigatória
+        return data.dropna(
+            subset=[column for column in self.REQUIRED_COLUMNS if column in data.columns]
+        )
 
     def get_data(self):
-        # Retorna os dados
+        # Retorna os dados (de uma base SQLite, carregados só quando são pedidos)
+        if self.__data is None:
+            self.__data = read_sqlite(self.sqlite_path)
+            self.clean_data()
         return self.__data
 
     def set_data(self, new_data):
@@ -45,22 +81,31 @@ class DataAnalysisBase(ABC):
         # Carrega dados de um arquivo CSV, se fornecido, e adiciona os dados existentes
         if csv_path:
             try:
-                new_data = pd.read_csv(csv_path)
+                if strip_suffix(csv_path).endswith(".ndjson"):
+                    new_data = read_ndjson(csv_path).to_dataframe()
+                else:
+                    new_data = read_csv(csv_path)
             except FileNotFoundError:
                 raise ValueError("Caminho do arquivo inválido.")
         elif isinstance(data, pd.DataFrame):
             new_data = data
+        elif isinstance(data, CarBatch):
+            new_data = data.to_dataframe()
         else:
             raise TypeError(
-                "data deve ser um DataFrame ou None se csv_path for fornecido."
+                "data deve ser um DataFrame, um CarBatch ou None se csv_path for fornecido."
             )
         if replace:
             self.__data = new_data
         else:
-            self.__data = pd.concat([self.__data, new_data])
+            self.__data = pd.concat([self.get_data(), new_data])
 
     def filter_data(self, **kwargs):
         # Filtra os dados com base em critérios fornecidos
+        if self.__data is None:
+            # Base SQLite: os filtros são executados em SQL, com os índices da base
+            filtered_data = read_sqlite(self.sqlite_path, **kwargs)
+            return self.drop_incomplete(filtered_data)
         filtered_data = self.get_data()
         for key, value in kwargs.items():
             if value:
@@ -385,6 +430,14 @@ class DetailedReportGenerator(ReportGeneratorBase, DataVisualizationMixin):
 
 
 # Funções Auxiliares
+def read_csv(path):
+    # Lê um CSV, comprimido (.gz ou .zst, em um ou mais frames) ou não
+    if compression_of(path):
+        with open_text(path) as csv_file:
+            return pd.read_csv(csv_file)
+    return pd.read_csv(path)
+
+
 def generate_html_header(title):
     current_time = datetime.now().strftime("%H:%M %d/%m/%Y")
     logo_path = os.path.join(
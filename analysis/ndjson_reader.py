@@ -0,0 +1,46 @@
+# analysis/ndjson_reader.py
+
+import json
+
+from scraping.car import Car, CarBatch
+from scraping.compression import open_text
+
+
+def iter_cars(path):
+    """
+    Lê um arquivo NDJSON (ex.: data_collected/cars.ndjson, ou .ndjson.gz/.zst
+    comprimido) linha a linha e devolve um Car por linha, sem carregar o arquivo em
+    memória. Linhas vazias são ignoradas, tal como uma linha incompleta (ex.: escrita
+    interrompida), com um aviso.
+    """
+    with open_text(path) as ndjson_file:
+        for number, line in enumerate(ndjson_file, 1):
+            if not line.strip():
+                continue
+            try:
+                yield Car.from_dict(json.loads(line))
+            except (ValueError, AttributeError):
+                print(f"Linha {number} inválida em {path}, ignorada.")
+
+
+def iter_batches(path, batch_size=10000):
+    """
+    Lê um arquivo NDJSON em CarBatch de até `batch_size` automóveis, para processar
+    conjuntos de dados maiores do que a memória disponível.
+    """
+    batch = CarBatch()
+    for car in iter_cars(path):
+        batch.append(car)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = CarBatch()
+    if len(batch):
+        yield batch
+
+
+def read_ndjson(path):
+    """
+    Lê um arquivo NDJSON inteiro num CarBatch (por colunas, já tipado), pronto para
+    a análise (CarBatch.to_dataframe ou DataAnalysisBase).
+    """
+    return CarBatch(iter_cars(path))
@@ -0,0 +1,43 @@
+# analysis/parquet_reader.py
+
+from scraping.parquet_store import PARTITION_FIELD
+
+
+def read_parquet(path, columns=None, dates=None, start=None, end=None):
+    """
+    Lê o dataset Parquet do DataExporter (ex.: data_collected/cars_parquet) num
+    DataFrame, carregando só as colunas e as partições necessárias.
+
+    Args:
+        path: Pasta do dataset.
+        columns (list): Colunas a ler (por omissão, todas).
+        dates (list): Datas de recolha (date ou "AAAA-MM-DD") a incluir.
+        start, end: Primeira e última data de recolha a incluir.
+
+    Requer o pyarrow; as partições fora das datas pedidas nem chegam a ser abertas.
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    partitioning = ds.partitioning(
+        pa.schema([(PARTITION_FIELD, pa.string())]), flavor="hive"
+    )
+    dataset = ds.dataset(str(path), format="parquet", partitioning=partitioning)
+
+    scrape_date = ds.field(PARTITION_FIELD)
+    conditions = []
+    if dates is not None:
+        conditions.append(scrape_date.isin([str(d) for d in dates]))
+    if start is not None:
+        conditions.append(scrape_date >= str(start))
+    if end is not None:
+        conditions.append(scrape_date <= str(end))
+    condition = None
+    for expression in conditions:
+        condition = expression if condition is None else condition & expression
+
+    table = dataset.to_table(columns=columns, filter=condition)
+    # Inteiros como Int64 (aceita valores em falta), como em CarBatch.to_dataframe
+    integer_types = {pa.int64(): pd.Int64Dtype()}
+    return table.to_pandas(types_mapper=integer_types.get)
@@ -0,0 +1,25 @@
+# analysis/sqlite_reader.py
+
+from scraping.car_store import CarStore
+
+
+def read_sqlite(path, columns=None, **filters):
+    """
+    Lê da base SQLite do DataExporter (ex.: data_collected/cars.sqlite) só os
+    automóveis que cumprem os filtros de DataAnalysisBase.filter_data (min_price,
+    max_year, brand, fuel, ...). Os filtros são executados em SQL, com os índices da
+    base, em vez de carregar todos os dados no pandas.
+    """
+    import pandas as pd
+
+    store = CarStore(path, readonly=True)
+    try:
+        sql, params = store.filter_query(columns, **filters)
+        data = pd.read_sql_query(sql, store.conn, params=params)
+    finally:
+        store.close()
+    # Inteiros como Int64 (aceita valores em falta), como em CarBatch.to_dataframe
+    for column in ("year", "mileage", "power"):
+        if column in data:
+            data[column] = data[column].astype("Int64")
+    return data
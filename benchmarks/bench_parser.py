@@ -0,0 +1,188 @@
+# benchmarks/bench_parser.py
+"""
+Benchmark do DataParser sobre as páginas guardadas em tests/fixtures.
+
+Para cada caminho de análise mostra as páginas por segundo e os microssegundos por
+campo extraído. Os tempos incluem a construção da árvore HTML, como na recolha.
+
+A comparação com a base usa o custo relativo de cada caminho: o seu tempo a dividir
+pelo de construir a árvore HTML das mesmas páginas, medido na mesma ronda (mediana
+de várias rondas). Assim, uma base gravada noutra máquina (ou com a máquina mais ou
+menos ocupada) continua a ser comparável; os valores absolutos são só informativos.
+
+    python -m benchmarks.bench_parser
+    python -m benchmarks.bench_parser --save benchmarks/baseline.json
+    python -m benchmarks.bench_parser --compare benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from selectolax.parser import HTMLParser
+
+from scraping.data_parser import DataParser
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures"
+ITEM_PAGES = ("item_page.html", "item_page_css.html", "item_page_partial.html")
+# Campos por automóvel, iguais em todos os caminhos para que os µs/campo sejam
+# comparáveis: os da página do anúncio, ou nos cartões a URL em vez do mês.
+CAR_FIELDS = len(DataParser.ITEM_FIELDS)
+
+
+def load_pages():
+    """ Lê a página de pesquisa e as páginas de automóveis guardadas. """
+    search = (FIXTURES / "search_page.html").read_text(encoding="utf-8")
+    items = [(FIXTURES / name).read_text(encoding="utf-8") for name in ITEM_PAGES]
+    return search, items
+
+
+def benchmark_cases(parser, search, items):
+    """
+    Devolve os caminhos a medir: nome, função a executar sobre um texto, páginas a
+    usar e número de campos extraídos por página.
+    """
+    urls = len(list(parser.parse_search_page(HTMLParser(search))))
+    return [
+        ("html_tree", HTMLParser, items, 0),
+        (
+            "search_page",
+            lambda text: list(parser.parse_search_page(HTMLParser(text))),
+            [search],
+            urls,
+        ),
+        (
+            "search_cards",
+            lambda text: list(parser.parse_search_cards(HTMLParser(text))),
+            [search],
+            urls * CAR_FIELDS,
+        ),
+        (
+            "item_structured",
+            lambda text: parser.parse_structured_data(HTMLParser(text)),
+            items[:1],
+            CAR_FIELDS,
+        ),
+        (
+            "item_css",
+            lambda text: parser.parse_item_css(HTMLParser(text)),
+            items,
+            CAR_FIELDS,
+        ),
+        ("item_page", parser.parse_item_text, items, CAR_FIELDS),
+        ("item_text_complete", parser.item_text_complete, items, CAR_FIELDS),
+    ]
+
+
+def measure(function, pages, repeat):
+    """
+    Executa a função `repeat` vezes sobre cada página e devolve o tempo por página
+    (em segundos).
+    """
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in pages:
+            function(text)
+    return (time.perf_counter() - started) / (repeat * len(pages))
+
+
+def run(repeat, rounds=30):
+    """
+    Mede todos os caminhos e devolve {nome: {"pages_s": ..., "us_field": ...,
+    "tree_ratio": ...}}. pages_s e us_field vêm da ronda mais rápida; tree_ratio é
+    a mediana, nas `rounds` rondas, do tempo do caminho a dividir pelo da construção
+    da árvore HTML das mesmas páginas, medida logo antes e logo depois.
+    """
+    parser = DataParser()
+    search, items = load_pages()
+    results = {}
+    for name, function, pages, fields in benchmark_cases(parser, search, items):
+        times = []
+        ratios = []
+        for _ in range(rounds):
+            before = measure(HTMLParser, pages, repeat)
+            elapsed = measure(function, pages, repeat)
+            after = measure(HTMLParser, pages, repeat)
+            times.append(elapsed)
+            ratios.append(2 * elapsed / (before + after))
+        per_page = min(times)
+        results[name] = {
+            "pages_s": 1 / per_page,
+            "us_field": per_page * 1e6 / fields if fields else None,
+            "tree_ratio": statistics.median(ratios),
+        }
+    return results
+
+
+def comparable(name, baseline):
+    """ Indica se a base tem o custo relativo do caminho (bases antigas não têm). """
+    return bool(baseline) and "tree_ratio" in baseline.get(name, {})
+
+
+def print_results(results, baseline=None):
+    print(
+        f"{'caminho':<20}{'páginas/s':>12}{'µs/campo':>12}{'x árvore':>12}"
+        f"{'vs. base':>12}"
+    )
+    for name, result in results.items():
+        us_field = result["us_field"]
+        line = f"{name:<20}{result['pages_s']:>12.0f}"
+        line += f"{us_field:>12.1f}" if us_field is not None else f"{'-':>12}"
+        line += f"{result['tree_ratio']:>12.2f}"
+        if comparable(name, baseline):
+            # Positivo: mais rápido do que a base, em custo relativo
+            change = baseline[name]["tree_ratio"] / result["tree_ratio"] - 1
+            line += f"{change:>+12.1%}"
+        print(line)
+
+
+def regressions(results, baseline, tolerance):
+    """
+    Devolve os caminhos cujo custo relativo (tree_ratio) é superior ao da base em
+    mais de `tolerance`.
+    """
+    return [
+        name
+        for name, result in results.items()
+        if comparable(name, baseline)
+        and result["tree_ratio"] > baseline[name]["tree_ratio"] * (1 + tolerance)
+    ]
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--rounds", type=int, default=30)
+    arg_parser.add_argument("--save", help="guarda os resultados num JSON de base")
+    arg_parser.add_argument("--compare", help="compara com um JSON de base")
+    arg_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="abrandamento aceite face à base (padrão 0.2 = 20%%)",
+    )
+    args = arg_parser.parse_args(argv)
+
+    results = run(args.repeat, args.rounds)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if baseline:
+        slower = regressions(results, baseline, args.tolerance)
+        if slower:
+            print(f"Regressão de desempenho: {', '.join(slower)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
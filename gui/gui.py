@@ -1,5 +1,7 @@
 # gui/gui.py
 
+from scraping.compression import check_compression, find_dataset
+from scraping.config import get_config
 from scraping.scraper_controller import ScraperController
 from analysis.data_analysis import StandardReportGenerator, DetailedReportGenerator
 
@@ -11,14 +13,20 @@ import os
 import webbrowser
 
 
+def collected_dataset():
+    """ Caminho do CSV recolhido, com a compressão configurada (ExportCompression). """
+    return find_dataset(
+        os.path.join(os.path.dirname(__file__), "..", "data_collected", "cars.csv"),
+        check_compression(get_config()["ExportCompression"]),
+    )
+
+
 class MainGUI:
     """ Classe principal da interface gráfica do usuário para o aplicação SCARPY. """
 
     def __init__(self, root):
         """ Inicializa a janela principal. """
-        self.csv_file = os.path.join(
-            os.path.dirname(__file__), "..", "data_collected", "cars.csv"
-        )
+        self.csv_file = collected_dataset()
         self.root = root
         self.scraper = None
 
@@ -83,7 +91,7 @@ class MainGUI:
         self.config_window = Toplevel(self.root)
         self.config_window.title("Configuração do Scraper")
         self.config_window.configure(bg="#07171c")
-        self.config_window.geometry("400x250")
+        self.config_window.geometry("400x420")
 
         # Iniciar a configuração da Página Inicial e Página Final
         self.start_page_label = tk.Label(
@@ -102,19 +110,65 @@ class MainGUI:
         self.end_page_entry.pack()
         self.end_page_entry.insert(0, "1")  # Valor padrão para a página final
 
-        # Configuração para o tempo de espera (Sleep Time)
-        self.sleep_label = tk.Label(
-            self.config_window, text="Sleep time (min-max):", bg="#07171c", fg="white"
+        # Limite de pedidos por segundo e rajada máxima (por host)
+        config = self.load_current_config()
+        self.rate_label = tk.Label(
+            self.config_window,
+            text="Pedidos por segundo / rajada:",
+            bg="#07171c",
+            fg="white",
+        )
+        self.rate_label.pack(pady=5)
+        self.rate_frame = tk.Frame(self.config_window, bg="#07171c")
+        self.rate_frame.pack(pady=5)
+        self.rate_entry = tk.Entry(self.rate_frame, width=5)
+        self.rate_entry.pack(side=tk.LEFT, padx=5)
+        self.rate_entry.insert(0, config["RateLimit"])
+        self.burst_entry = tk.Entry(self.rate_frame, width=5)
+        self.burst_entry.pack(side=tk.RIGHT, padx=5)
+        self.burst_entry.insert(0, config["RateBurst"])
+
+        # Número de pedidos simultâneos (1 = recolha sequencial)
+        self.concurrency_label = tk.Label(
+            self.config_window, text="Pedidos simultâneos:", bg="#07171c", fg="white"
+        )
+        self.concurrency_label.pack(pady=5)
+        self.concurrency_entry = tk.Entry(self.config_window, width=5)
+        self.concurrency_entry.pack()
+        self.concurrency_entry.insert(0, "1")  # Valor padrão: recolha sequencial
+
+        # Recolha incremental: ignora anúncios que já estão em data_collected/cars.csv
+        self.incremental_var = tk.BooleanVar(value=False)
+        self.incremental_checkbox = tk.Checkbutton(
+            self.config_window,
+            text="Ignorar anúncios já recolhidos",
+            variable=self.incremental_var,
+            bg="#07171c",
+            fg="white",
+        )
+        self.incremental_checkbox.pack(pady=5)
+
+        # Retomar a recolha anterior a partir do diário de progresso
+        self.resume_var = tk.BooleanVar(value=False)
+        self.resume_checkbox = tk.Checkbutton(
+            self.config_window,
+            text="Retomar recolha anterior",
+            variable=self.resume_var,
+            bg="#07171c",
+            fg="white",
+        )
+        self.resume_checkbox.pack(pady=5)
+
+        # Modo rápido: usar os dados dos cartões das páginas de pesquisa
+        self.fast_mode_var = tk.BooleanVar(value=False)
+        self.fast_mode_checkbox = tk.Checkbutton(
+            self.config_window,
+            text="Modo rápido (só páginas de pesquisa)",
+            variable=self.fast_mode_var,
+            bg="#07171c",
+            fg="white",
         )
-        self.sleep_label.pack(pady=5)
-        self.sleep_frame = tk.Frame(self.config_window, bg="#07171c")
-        self.sleep_frame.pack(pady=5)
-        self.sleep_min_entry = tk.Entry(self.sleep_frame, width=5)
-        self.sleep_min_entry.pack(side=tk.LEFT, padx=5)
-        self.sleep_min_entry.insert(0, "3")  # Valor padrão mínimo
-        self.sleep_max_entry = tk.Entry(self.sleep_frame, width=5)
-        self.sleep_max_entry.pack(side=tk.RIGHT, padx=5)
-        self.sleep_max_entry.insert(0, "6")  # Valor padrão máximo
+        self.fast_mode_checkbox.pack(pady=5)
 
         self.start_scraping_button = tk.Button(
             self.config_window,
@@ -136,8 +190,12 @@ class MainGUI:
     def start_scraping(self):
         start_page = int(self.start_page_entry.get())
         end_page = int(self.end_page_entry.get())
-        min_sleep = int(self.sleep_min_entry.get())
-        max_sleep = int(self.sleep_max_entry.get())
+        rate = float(self.rate_entry.get())
+        burst = int(self.burst_entry.get())
+        concurrency = max(1, int(self.concurrency_entry.get()))
+        incremental = self.incremental_var.get()
+        resume = self.resume_var.get()
+        fast_mode = self.fast_mode_var.get()
 
         # Verificação se o número da página final é menor que o número da página inicial
         if end_page < start_page:
@@ -150,7 +208,16 @@ class MainGUI:
         self.scraper = ScraperController()
 
         def scraping_thread_function():
-            message = self.scraper.run(start_page, end_page, min_sleep, max_sleep)
+            message = self.scraper.run(
+                start_page,
+                end_page,
+                rate,
+                burst,
+                concurrency,
+                incremental=incremental,
+                resume=resume,
+                fast_mode=fast_mode,
+            )
             messagebox.showinfo("Status do Scraping", message)
             self.update_button_text("Iniciar Scraping")  # Adicione esta linha
 
@@ -207,9 +274,7 @@ class MainGUI:
         frame = tk.Frame(self.analysis_window, bg="#07171c")
         frame.pack(pady=10)
 
-        csv_file_path = os.path.join(
-            os.path.dirname(__file__), "..", "data_collected", "cars.csv"
-        )
+        csv_file_path = collected_dataset()
         self.csv_entry_var = tk.StringVar(value=csv_file_path)
 
         csv_entry = tk.Entry(frame, textvariable=self.csv_entry_var, width=50)
@@ -522,7 +587,11 @@ class MainGUI:
         filename = filedialog.askopenfilename(
             initialdir="/",
             title="Selecione um arquivo CSV",
-            filetypes=(("Arquivos CSV", "*.csv"), ("Todos os arquivos", "*.*")),
+            filetypes=(
+                ("Arquivos CSV", "*.csv *.csv.gz *.csv.zst"),
+                ("Arquivos NDJSON", "*.ndjson *.ndjson.gz *.ndjson.zst"),
+                ("Todos os arquivos", "*.*"),
+            ),
         )
         if filename:
             self.csv_entry_var.set(filename)
@@ -564,7 +633,7 @@ class MainGUI:
         )
         self.user_agent_label.pack(pady=5)
         self.user_agent_entry = tk.Entry(self.config_frame)
-        self.user_agent_entry.insert(0, config.get("User-Agent", "Mozilla/5.0"))
+        self.user_agent_entry.insert(0, config["User-Agent"])
         self.user_agent_entry.pack()
 
         # Campo para Cars Selector
@@ -573,9 +642,7 @@ class MainGUI:
         )
         self.cars_selector_label.pack(pady=5)
         self.cars_selector_entry = tk.Entry(self.config_frame)
-        self.cars_selector_entry.insert(
-            0, config.get("CarsSelector", "h1.e1ajxysh9.ooa-1ed90th.er34gjf0")
-        )
+        self.cars_selector_entry.insert(0, config["CarsSelector"])
         self.cars_selector_entry.pack()
 
         # Campo para Price Selector
@@ -584,12 +651,7 @@ class MainGUI:
         )
         self.price_selector_label.pack(pady=5)
         self.price_selector_entry = tk.Entry(self.config_frame)
-        self.price_selector_entry.insert(
-            0,
-            config.get(
-                "PriceSelector", "h3.offer-price__number.eqdspoq4.ooa-o7wv9s.er34gjf0"
-            ),
-        )
+        self.price_selector_entry.insert(0, config["PriceSelector"])
         self.price_selector_entry.pack()
 
         # Campo para Others Selector
@@ -598,9 +660,7 @@ class MainGUI:
         )
         self.others_selector_label.pack(pady=5)
         self.others_selector_entry = tk.Entry(self.config_frame)
-        self.others_selector_entry.insert(
-            0, config.get("OthersSelector", "p.ezl3qpx3.ooa-1i4y99d.er34gjf0")
-        )
+        self.others_selector_entry.insert(0, config["OthersSelector"])
         self.others_selector_entry.pack()
 
         # Campo para Brand Selector
@@ -609,12 +669,7 @@ class MainGUI:
         )
         self.brand_selector_label.pack(pady=5)
         self.brand_selector_entry = tk.Entry(self.config_frame)
-        self.brand_selector_entry.insert(
-            0,
-            config.get(
-                "BrandSelector", "h3.offer-title.big-text.ezl3qpx2.ooa-ebtemw.er34gjf0"
-            ),
-        )
+        self.brand_selector_entry.insert(0, config["BrandSelector"])
         self.brand_selector_entry.pack()
 
         # Campo para URL Base
@@ -623,9 +678,7 @@ class MainGUI:
         )
         self.base_url_label.pack(pady=5)
         self.base_url_entry = tk.Entry(self.config_frame)
-        self.base_url_entry.insert(
-            0, config.get("BaseURL", "https://www.standvirtual.com/carros?page=")
-        )
+        self.base_url_entry.insert(0, config["BaseURL"])
         self.base_url_entry.pack()
 
         # Botão para guardar as configurações
@@ -639,41 +692,28 @@ class MainGUI:
         self.save_config_button.pack(pady=10)
 
     def load_current_config(self):
-        """Carrega as configurações atuais do arquivo config.txt."""
-        config = {}
-        config_path = os.path.join(
-            os.path.dirname(__file__), "..", "config", "config.txt"
-        )
-
-        try:
-            with open(config_path, "r") as config_file:
-                for line in config_file:
-                    key, value = line.split(":", 1)
-                    config[key.strip()] = value.strip()
-        except FileNotFoundError:
-            # Se o arquivo config.txt não existe, usar valores padrão
-            pass
-        except Exception as e:
-            messagebox.showerror("Erro ao Carregar Configurações", str(e))
-
-        return config
+        """Devolve as configurações atuais (config.txt, com os valores padrão em falta) como texto."""
+        config = get_config()
+        config.check_reload()
+        return config.as_strings()
 
     def save_config(self):
-        """Guarda as configurações alteradas no arquivo config.txt."""
-        config_path = os.path.join(
-            os.path.dirname(__file__), "..", "config", "config.txt"
-        )
+        """
+        Guarda as configurações alteradas no arquivo config.txt.
+        As restantes opções do arquivo (ex.: cliente HTTP) são preservadas e uma
+        recolha em curso passa a usar os novos valores na página seguinte.
+        """
+        changes = {
+            "User-Agent": self.user_agent_entry.get(),
+            "CarsSelector": self.cars_selector_entry.get(),
+            "PriceSelector": self.price_selector_entry.get(),
+            "OthersSelector": self.others_selector_entry.get(),
+            "BrandSelector": self.brand_selector_entry.get(),
+            "BaseURL": self.base_url_entry.get(),
+        }
 
         try:
-            with open(config_path, "w") as config_file:
-                config_file.write(f"User-Agent:{self.user_agent_entry.get()}\n")
-                config_file.write(f"CarsSelector:{self.cars_selector_entry.get()}\n")
-                config_file.write(f"PriceSelector:{self.price_selector_entry.get()}\n")
-                config_file.write(
-                    f"OthersSelector:{self.others_selector_entry.get()}\n"
-                )
-                config_file.write(f"BrandSelector:{self.brand_selector_entry.get()}\n")
-                config_file.write(f"BaseURL:{self.base_url_entry.get()}\n")
+            get_config().update(changes)
             messagebox.showinfo("Configurações", "Configurações guardadas com sucesso!")
         except Exception as e:
             messagebox.showerror("Erro ao Guardar Configurações", str(e))
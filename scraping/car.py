@@ -1,10 +1,51 @@
 # scraping/car.py
 
+import math
+import re
+import sys
+from array import array
+
+
+def to_int(value):
+    """
+    Converte um valor (número ou texto como "279 981 km") num inteiro, ou None.
+    """
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return None if math.isnan(value) else round(value)
+    digits = re.sub(r"\D", "", str(value))
+    return int(digits) if digits else None
+
+
+def to_float(value):
+    """
+    Converte um valor num float, ou None.
+    """
+    if value is None or isinstance(value, float):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_str(value):
+    """
+    Devolve o texto (interned, para partilhar valores repetidos como "Diesel"), ou None.
+    """
+    if value is None:
+        return None
+    return sys.intern(str(value)) if value != "" else None
+
 
 class Car:
     """
     Classe Car representa um automóvel com várias características.
 
+    Usa __slots__ (sem __dict__ por instância) e os campos numéricos são convertidos
+    uma única vez, ao criar o registo com from_dict.
+
     Atributos:
         brand (str): Marca do automóvel.
         price (float): Preço do automóvel.
@@ -16,6 +57,9 @@ class Car:
         url (str): URL do anúncio do automóvel.
     """
 
+    FIELDS = ("brand", "price", "fuel", "month", "year", "mileage", "power", "url")
+    __slots__ = FIELDS
+
     def __init__(
         self,
         brand=None,
@@ -36,5 +80,111 @@ class Car:
         self.power = power
         self.url = url
 
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Cria um Car a partir de um dicionário (do parser ou de uma linha do CSV),
+        convertendo o preço em float e o ano, a quilometragem e a potência em int.
+        """
+        return cls(
+            brand=data.get("brand") or None,
+            price=to_float(data.get("price")),
+            fuel=to_str(data.get("fuel")),
+            month=to_str(data.get("month")),
+            year=to_int(data.get("year")),
+            mileage=to_int(data.get("mileage")),
+            power=to_int(data.get("power")),
+            url=data.get("url") or None,
+        )
+
+    def as_dict(self):
+        """ Devolve os campos do automóvel num dicionário (por exemplo, para o CSV). """
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def missing_fields(self, fields=FIELDS):
+        """ Devolve os campos de `fields` que não têm valor. """
+        return [field for field in fields if getattr(self, field) is None]
+
+    def __eq__(self, other):
+        if not isinstance(other, Car):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.FIELDS)
+
     def __str__(self):
         return f"Car(brand={self.brand}, price={self.price}, fuel={self.fuel}, month={self.month}, year={self.year}, mileage={self.mileage}, power={self.power}, url={self.url})"
+
+    __repr__ = __str__
+
+
+class CarBatch:
+    """
+    Conjunto de automóveis guardado por colunas: os campos numéricos em arrays de
+    doubles (NaN para valores em falta) e os de texto em listas (o combustível e o mês
+    são strings interned, partilhadas entre registos).
+    Ocupa muito menos memória do que uma lista de dicionários e pode ser passado
+    diretamente à análise (to_dataframe).
+    """
+
+    NUMERIC_FIELDS = ("price", "year", "mileage", "power")
+    TEXT_FIELDS = ("brand", "fuel", "month", "url")
+
+    def __init__(self, cars=()):
+        self.clear()
+        self.extend(cars)
+
+    def clear(self):
+        """ Esvazia o conjunto. """
+        self.numeric = {field: array("d") for field in self.NUMERIC_FIELDS}
+        self.text = {field: [] for field in self.TEXT_FIELDS}
+
+    def append(self, car):
+        """ Acrescenta um Car (ou um dicionário, convertido com Car.from_dict). """
+        if isinstance(car, dict):
+            car = Car.from_dict(car)
+        for field, column in self.numeric.items():
+            value = getattr(car, field)
+            column.append(math.nan if value is None else value)
+        for field, column in self.text.items():
+            column.append(getattr(car, field))
+
+    def extend(self, cars):
+        for car in cars:
+            self.append(car)
+
+    def __len__(self):
+        return len(self.text["url"])
+
+    def __getitem__(self, index):
+        """ Reconstrói o Car na posição `index`. """
+        values = {field: column[index] for field, column in self.text.items()}
+        for field, column in self.numeric.items():
+            value = column[index]
+            if math.isnan(value):
+                values[field] = None
+            else:
+                values[field] = value if field == "price" else int(value)
+        return Car(**values)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def column(self, field):
+        """
+        Devolve a coluna de um campo: uma lista de textos ou um array de doubles
+        (NaN para valores em falta).
+        """
+        return self.numeric[field] if field in self.numeric else self.text[field]
+
+    def to_dataframe(self):
+        """
+        Converte o conjunto num DataFrame do pandas, com as colunas já tipadas.
+        """
+        import pandas as pd
+
+        data = pd.DataFrame(
+            {field: self.column(field) for field in Car.FIELDS}, columns=list(Car.FIELDS)
+        )
+        for field in ("year", "mileage", "power"):
+            data[field] = data[field].astype("Int64")
+        return data
@@ -0,0 +1,113 @@
+# scraping/car_store.py
+
+import time
+
+from .car import Car
+from .database import SQLiteDatabase
+
+# Colunas numéricas com índice e filtros min_/max_ (ver filter_query).
+RANGE_FIELDS = ("price", "year", "mileage", "power")
+# Colunas com índice secundário.
+INDEXED_FIELDS = ("brand", "fuel", "year", "price", "mileage")
+
+
+class CarStore(SQLiteDatabase):
+    """
+    Base de dados SQLite dos automóveis recolhidos, com uma linha por URL de anúncio.
+
+    upsert grava um lote numa única transação com INSERT ... ON CONFLICT(url): um
+    anúncio já guardado é atualizado em vez de repetido. A base usa o modo WAL, para
+    que a análise possa ler enquanto a recolha escreve, e tem índices sobre a marca,
+    o combustível, o ano, o preço e a quilometragem, usados pelas consultas de
+    filter_query.
+    """
+
+    def __init__(self, path, readonly=False):
+        super().__init__(path, readonly)
+        if readonly:
+            return
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cars ("
+            "url TEXT PRIMARY KEY, brand TEXT, price REAL, fuel TEXT, month TEXT, "
+            "year INTEGER, mileage INTEGER, power INTEGER, updated REAL)"
+        )
+        for field in INDEXED_FIELDS:
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS cars_{field} ON cars({field})")
+
+    def upsert(self, rows):
+        """
+        Grava as linhas (dicionários ou Car) numa transação. Um anúncio com a mesma URL
+        é atualizado; as linhas sem URL são ignoradas. `rows` pode ser um iterador
+        (ex.: um csv.DictReader), lido durante a transação sem o carregar em memória.
+        """
+        fields = Car.FIELDS
+        updated = time.time()
+
+        def values():
+            for row in rows:
+                car = row if isinstance(row, Car) else Car.from_dict(row)
+                if car.url:
+                    yield tuple(getattr(car, field) for field in fields) + (updated,)
+
+        columns = ", ".join(fields + ("updated",))
+        placeholders = ", ".join("?" * (len(fields) + 1))
+        assignments = ", ".join(
+            f"{field} = excluded.{field}"
+            for field in fields + ("updated",)
+            if field != "url"
+        )
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(
+                    f"INSERT INTO cars ({columns}) VALUES ({placeholders}) "
+                    f"ON CONFLICT(url) DO UPDATE SET {assignments}",
+                    values(),
+                )
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def filter_query(self, columns=None, **filters):
+        """
+        Constrói a consulta SQL (texto e parâmetros) para os filtros de
+        DataAnalysisBase.filter_data: min_/max_ de price, year, mileage e power,
+        brand (contém o texto, sem distinguir maiúsculas em ASCII), fuel e month
+        (iguais). Filtros vazios são ignorados, como no filter_data.
+        """
+        conditions = []
+        params = []
+        for key, value in filters.items():
+            if not value:
+                continue
+            prefix, _, field = key.partition("_")
+            if prefix in ("min", "max") and field in RANGE_FIELDS:
+                conditions.append(f"{field} {'>=' if prefix == 'min' else '<='} ?")
+                params.append(value)
+            elif key == "brand":
+                escaped = str(value)
+                for char in ("\\", "%", "_"):
+                    escaped = escaped.replace(char, "\\" + char)
+                conditions.append("brand LIKE ? ESCAPE '\\'")
+                params.append(f"%{escaped}%")
+            elif key in ("fuel", "month"):
+                conditions.append(f"{key} = ?")
+                params.append(value)
+        sql = f"SELECT {', '.join(columns or Car.FIELDS)} FROM cars"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        # "+rowid": ordem de inserção sem impedir o uso dos índices nos filtros
+        return sql + " ORDER BY +rowid", params
+
+    def filter(self, **filters):
+        """ Devolve os automóveis (Car) que cumprem os filtros (ver filter_query). """
+        sql, params = self.filter_query(**filters)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [Car(*row) for row in rows]
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM cars").fetchone()[0]
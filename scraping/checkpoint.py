@@ -0,0 +1,75 @@
+# scraping/checkpoint.py
+
+import threading
+
+
+class CrawlCheckpoint:
+    """
+    Diário (journal) de progresso da recolha, só de acréscimo, para permitir retomar
+    uma recolha interrompida.
+
+    Cada linha regista um automóvel exportado ("item<TAB>url") ou uma página de
+    pesquisa cujos automóveis foram todos exportados ("page<TAB>n"). Cada linha é
+    escrita e descarregada de imediato, pelo que o diário sobrevive a uma paragem
+    abrupta do processo; uma última linha incompleta é ignorada (e removida) ao
+    retomar.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.pages = set()
+        self.items = set()
+        self.lock = threading.Lock()
+        if resume:
+            self.load()
+        self.file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def load(self):
+        """
+        Lê o diário existente, preenchendo as páginas e os automóveis já concluídos.
+        Uma última linha incompleta é cortada do arquivo, para que as novas linhas
+        não fiquem coladas a ela.
+        """
+        try:
+            with open(self.path, "r+b") as f:
+                complete = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        f.truncate(complete)
+                        break
+                    complete += len(line)
+                    kind, _, value = line.decode("utf-8").rstrip("\n").partition("\t")
+                    if kind == "page" and value.isdigit():
+                        self.pages.add(int(value))
+                    elif kind == "item" and value:
+                        self.items.add(value)
+        except FileNotFoundError:
+            pass
+
+    def write(self, kind, value):
+        """ Acrescenta uma linha ao diário. """
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(f"{kind}\t{value}\n")
+            self.file.flush()
+
+    def mark_item(self, url):
+        """ Regista um automóvel como exportado. """
+        self.items.add(url)
+        self.write("item", url)
+
+    def mark_page(self, n):
+        """ Regista a página de pesquisa n como concluída. """
+        self.pages.add(n)
+        self.write("page", n)
+
+    def page_done(self, n):
+        return n in self.pages
+
+    def item_done(self, url):
+        return url in self.items
+
+    def close(self):
+        with self.lock:
+            self.file.close()
@@ -0,0 +1,156 @@
+# scraping/compression.py
+
+import gzip
+import io
+import os
+
+# Extensão dos arquivos de cada compressão (opção ExportCompression).
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def import_zstandard():
+    """
+    Importa o zstandard (dependência opcional). Devolve o módulo, ou None se não
+    estiver instalado.
+    """
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def compression_of(path):
+    """ Devolve a compressão de um arquivo pela extensão ("gzip", "zstd" ou None). """
+    suffix = os.path.splitext(str(path))[1]
+    for compression, compressed_suffix in SUFFIXES.items():
+        if suffix == compressed_suffix:
+            return compression
+    return None
+
+
+def strip_suffix(path):
+    """ Devolve o caminho sem a extensão de compressão (ex.: "cars.csv.gz" -> "cars.csv"). """
+    path = str(path)
+    return os.path.splitext(path)[0] if compression_of(path) else path
+
+
+def check_compression(compression):
+    """
+    Valida a opção ExportCompression e devolve "gzip", "zstd" ou None (sem
+    compressão). Sem o pacote zstandard, o zstd é substituído pelo gzip.
+    """
+    if compression == "off":
+        return None
+    if compression not in SUFFIXES:
+        print(f"Valor inválido para ExportCompression: {compression}. Sem compressão.")
+        return None
+    if compression == "zstd" and import_zstandard() is None:
+        print("Pacote 'zstandard' não instalado. A usar gzip.")
+        return "gzip"
+    return compression
+
+
+def dataset_path(path, compression):
+    """
+    Devolve o caminho de um arquivo de dados com a compressão indicada (ex.:
+    "cars.csv" com "gzip" -> "cars.csv.gz"; None: sem compressão).
+    """
+    return f"{path}{SUFFIXES.get(compression, '')}"
+
+
+def dataset_variants(path):
+    """ Devolve os caminhos de um arquivo de dados sem compressão e com cada uma. """
+    return [str(path)] + [f"{path}{suffix}" for suffix in SUFFIXES.values()]
+
+
+def find_dataset(path, compression):
+    """
+    Devolve o caminho de um arquivo de dados com a compressão configurada (ver
+    check_compression), que é o que o DataExporter atualiza. Se ainda não existir
+    (ex.: antes da primeira exportação), devolve a versão com outra compressão que
+    exista.
+    """
+    configured = dataset_path(path, compression)
+    if not os.path.exists(configured):
+        for variant in dataset_variants(path):
+            if os.path.exists(variant):
+                return variant
+    return configured
+
+
+def compress(data, compression):
+    """ Comprime os bytes num frame completo (membro gzip ou frame zstd). """
+    if compression == "gzip":
+        return gzip.compress(data)
+    return import_zstandard().ZstdCompressor().compress(data)
+
+
+def open_text(path):
+    """
+    Abre um arquivo de texto para leitura, descomprimindo-o pela extensão. Os
+    arquivos com vários frames (ver FrameWriter) são lidos de seguida.
+    """
+    compression = compression_of(path)
+    if compression == "gzip":
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    if compression == "zstd":
+        reader = import_zstandard().ZstdDecompressor().stream_reader(
+            open(path, "rb"), read_across_frames=True
+        )
+        return io.TextIOWrapper(io.BufferedReader(reader), encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def open_append(path):
+    """
+    Abre um arquivo de texto para acrescentar linhas: um FrameWriter se o arquivo
+    for comprimido, ou um arquivo normal.
+    """
+    compression = compression_of(path)
+    if compression:
+        return FrameWriter(path, compression)
+    return open(path, "a", newline="", encoding="utf-8")
+
+
+class FrameWriter:
+    """
+    Arquivo de texto comprimido só de acréscimo: o texto escrito fica em memória e
+    cada flush() acrescenta-o ao arquivo como um frame completo (um membro gzip ou
+    um frame zstd). Os frames seguidos formam um arquivo válido, lido por inteiro
+    com open_text (ou gzip/zstd), e nunca é preciso reescrever os anteriores.
+    """
+
+    def __init__(self, path, compression):
+        self.compression = compression
+        self.raw = open(path, "ab")
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+        return len(text)
+
+    def writelines(self, lines):
+        self.parts.extend(lines)
+
+    def flush(self):
+        """ Comprime o texto pendente num frame e escreve-o no arquivo. """
+        if self.parts:
+            data = "".join(self.parts).encode("utf-8")
+            self.parts = []
+            self.raw.write(compress(data, self.compression))
+        self.raw.flush()
+
+    def fileno(self):
+        return self.raw.fileno()
+
+    def close(self):
+        if not self.raw.closed:
+            self.flush()
+            self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
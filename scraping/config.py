@@ -0,0 +1,284 @@
+# scraping/config.py
+
+import os
+import threading
+
+CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "config", "config.txt"
+)
+
+
+class Config:
+    """
+    Configuração da aplicação (config/config.txt), lida uma única vez e partilhada
+    por todos os componentes (ver get_config).
+
+    Cada opção tem um valor padrão, cujo tipo (str, int, float ou bool) define a
+    conversão do texto do arquivo; algumas têm ainda limites (RANGES) ou uma lista de
+    valores possíveis (CHOICES). Opções em falta usam o padrão; valores inválidos
+    também, com um aviso. Chaves desconhecidas são mantidas ao guardar.
+
+    check_reload() volta a ler o arquivo quando a data de modificação muda; cada
+    leitura (ou update) incrementa `version`, para os componentes saberem quando
+    aplicar os novos valores durante uma recolha.
+    """
+
+    DEFAULTS = {
+        "User-Agent": "Mozilla/5.0",
+        "CarsSelector": "h1.e1oqyyyi9.ooa-1ed90th.er34gjf0",
+        "PriceSelector": "h3.offer-price__number.eqdspoq4.ooa-o7wv9s.er34gjf0",
+        "OthersSelector": "p.ezl3qpx3.ooa-1i4y99d.er34gjf0",
+        "BrandSelector": "h3.offer-title.big-text.ezl3qpx2.ooa-ebtemw.er34gjf0",
+        "StructuredDataSelector": 'script[type="application/ld+json"]',
+        "BaseURL": "https://www.standvirtual.com/carros?page=",
+        # Cliente HTTP
+        "MaxConnections": 10,
+        "MaxKeepAliveConnections": 10,
+        "KeepAliveExpiry": 30.0,
+        "Timeout": 15.0,
+        "ConnectTimeout": 5.0,
+        "HTTP2": False,
+        # Limite de pedidos e ritmo adaptativo
+        "RateLimit": 0.5,
+        "RateBurst": 1,
+        "AdaptiveRate": True,
+        "MinRate": 0.1,
+        "MaxRate": 4.0,
+        "RateIncrease": 0.05,
+        "RateDecrease": 0.5,
+        # Repetições e disjuntor
+        "MaxRetries": 3,
+        "RetryBaseDelay": 1.0,
+        "RetryMaxDelay": 30.0,
+        "RetryBudget": 0.2,
+        "CircuitThreshold": 5,
+        "CircuitRecovery": 30.0,
+        # Cache HTTP e streaming
+        "HTTPCache": "off",
+        "HTTPCacheSize": 200,
+        "StreamItems": False,
+        "StreamMaxKB": 512,
+        # Modo rápido (cartões das páginas de pesquisa)
+        "CardSelector": "article[data-id]",
+        "CardPriceSelector": "h3",
+        "CardFuelSelector": 'dd[data-parameter="fuel_type"]',
+        "CardYearSelector": 'dd[data-parameter="first_registration_year"]',
+        "CardMileageSelector": 'dd[data-parameter="mileage"]',
+        "CardPowerSelector": 'dd[data-parameter="engine_power"]',
+        "CardRequiredFields": "brand,price,fuel,year,mileage,power",
+        # Pipeline da recolha
+        "Lookahead": 2,
+        "ParseWorkers": 2,
+        "ParseProcesses": False,
+        "WriteWorkers": 1,
+        "QueueSize": 100,
+        # Escrita em diferido do CSV (DataExporter)
+        "ExportBatchSize": 100,
+        "ExportFlushInterval": 2.0,
+        "ExportFsync": "batch",
+        "ExportParquet": False,
+        "ExportSQLite": False,
+        "ExportHistory": False,
+        "ExportCompression": "off",
+    }
+
+    # Opções de texto que podem ficar vazias (vazio desativa a funcionalidade).
+    OPTIONAL = ("StructuredDataSelector",)
+
+    # Valores possíveis das opções de texto com uma lista fixa de escolhas.
+    CHOICES = {
+        "HTTPCache": ("revalidate", "cache-first", "off"),
+        "ExportFsync": ("batch", "close", "off"),
+        "ExportCompression": ("off", "gzip", "zstd"),
+    }
+
+    # Limites (inclusivos) das opções numéricas: (mínimo, máximo), None = sem limite.
+    # Ex.: QueueSize:0 criaria filas sem limite e ParseWorkers:0 bloquearia a recolha.
+    RANGES = {
+        "MaxConnections": (1, None),
+        "MaxKeepAliveConnections": (0, None),
+        "KeepAliveExpiry": (0.0, None),
+        "Timeout": (0.1, None),
+        "ConnectTimeout": (0.1, None),
+        "RateLimit": (0.0, None),
+        "RateBurst": (1, None),
+        "MinRate": (0.0, None),
+        "MaxRate": (0.0, None),
+        "RateIncrease": (0.0, None),
+        "RateDecrease": (0.0, 1.0),
+        "MaxRetries": (0, None),
+        "RetryBaseDelay": (0.0, None),
+        "RetryMaxDelay": (0.0, None),
+        "RetryBudget": (0.0, None),
+        "CircuitThreshold": (1, None),
+        "CircuitRecovery": (0.0, None),
+        "HTTPCacheSize": (0, None),
+        "StreamMaxKB": (0, None),
+        "Lookahead": (1, None),
+        "ParseWorkers": (1, None),
+        "WriteWorkers": (1, None),
+        "QueueSize": (1, None),
+        "ExportBatchSize": (1, None),
+        "ExportFlushInterval": (0.1, None),
+    }
+
+    TRUE_VALUES = ("1", "true", "sim", "yes")
+    FALSE_VALUES = ("0", "false", "não", "nao", "no")
+
+    def __init__(self, path=CONFIG_PATH):
+        self.path = path
+        self.values = dict(self.DEFAULTS)
+        self.raw = {}
+        self.mtime = None
+        self.version = 0
+        self.lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        """
+        Lê o arquivo de configuração. Se não existir, usa os valores padrão. A leitura
+        é feita com o lock, para não coincidir com a escrita de update().
+        """
+        with self.lock:
+            values = dict(self.DEFAULTS)
+            raw = {}
+            try:
+                mtime = os.stat(self.path).st_mtime
+                with open(self.path, "r", encoding="utf-8") as config_file:
+                    for line in config_file:
+                        if ":" not in line:
+                            continue
+                        key, value = line.split(":", 1)
+                        key, value = key.strip(), value.strip()
+                        raw[key] = value
+                        if key not in self.DEFAULTS:
+                            continue
+                        try:
+                            values[key] = self.parse_value(key, value)
+                        except ValueError as e:
+                            print(f"{e} Usando o valor padrão.")
+            except FileNotFoundError:
+                mtime = None
+                print(
+                    f"Arquivo de configuração não encontrado em {self.path}. Usando valores padrão."
+                )
+            self.values = values
+            self.raw = raw
+            self.mtime = mtime
+            self.version += 1
+
+    def parse_value(self, key, value):
+        """
+        Converte o texto de uma opção no tipo do seu valor padrão.
+        Lança ValueError se o valor for inválido.
+        """
+        default = self.DEFAULTS[key]
+        try:
+            if isinstance(default, bool):
+                lowered = value.lower()
+                if lowered not in self.TRUE_VALUES + self.FALSE_VALUES:
+                    raise ValueError
+                return lowered in self.TRUE_VALUES
+            if isinstance(default, (int, float)):
+                number = type(default)(value)
+        except ValueError:
+            raise ValueError(f"Valor inválido para {key} em config.txt: {value}.")
+        if isinstance(default, (int, float)):
+            return self.check_range(key, number, value)
+        if not value and key not in self.OPTIONAL:
+            raise ValueError(f"Valor vazio para {key} em config.txt.")
+        if key in self.CHOICES and value not in self.CHOICES[key]:
+            raise ValueError(
+                f"Valor inválido para {key} em config.txt: {value} "
+                f"(valores possíveis: {', '.join(self.CHOICES[key])})."
+            )
+        return value
+
+    def check_range(self, key, number, value):
+        """
+        Devolve o número se estiver dentro dos limites da opção (ver RANGES).
+        Lança ValueError se estiver fora deles.
+        """
+        low, high = self.RANGES.get(key, (None, None))
+        if low is not None and number < low:
+            limit = f"mínimo {low}"
+        elif high is not None and number > high:
+            limit = f"máximo {high}"
+        else:
+            return number
+        raise ValueError(f"Valor inválido para {key} em config.txt: {value} ({limit}).")
+
+    def check_reload(self):
+        """
+        Volta a ler o arquivo se foi alterado desde a última leitura.
+        Devolve True se a configuração foi recarregada.
+        """
+        with self.lock:
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except FileNotFoundError:
+                return False
+            if mtime == self.mtime:
+                return False
+            self.load()
+            return True
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def as_strings(self):
+        """
+        Devolve todas as opções como texto, tal como estão (ou estariam) no arquivo.
+        """
+        with self.lock:
+            strings = {key: self.format_value(value) for key, value in self.values.items()}
+            strings.update(self.raw)
+        return strings
+
+    def format_value(self, value):
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        return str(value)
+
+    def update(self, changes):
+        """
+        Valida e guarda as opções alteradas (texto, ex.: vindas da interface gráfica),
+        mantendo as restantes linhas do arquivo. Lança ValueError se algum valor for
+        inválido, sem alterar nada. O arquivo é escrito num temporário que depois o
+        substitui, para que nunca seja lido a meio da escrita.
+        """
+        parsed = {
+            key: self.parse_value(key, value.strip())
+            for key, value in changes.items()
+            if key in self.DEFAULTS
+        }
+        with self.lock:
+            raw = dict(self.raw)
+            raw.update({key: value.strip() for key, value in changes.items()})
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as config_file:
+                for key, value in raw.items():
+                    config_file.write(f"{key}:{value}\n")
+            os.replace(temp_path, self.path)
+            self.raw = raw
+            self.values = {**self.values, **parsed}
+            self.mtime = os.stat(self.path).st_mtime
+            self.version += 1
+
+
+_shared_configs = {}
+_shared_lock = threading.Lock()
+
+
+def get_config(path=CONFIG_PATH):
+    """
+    Devolve a configuração partilhada do arquivo `path`, lendo-o na primeira chamada.
+    """
+    with _shared_lock:
+        config = _shared_configs.get(path)
+        if config is None:
+            config = _shared_configs[path] = Config(path)
+        return config
@@ -1,20 +1,71 @@
 # scraping/data_exporter.py
 
+import atexit
 import csv
 import json
 import os
+import threading
 from pathlib import Path
 from .car import Car
+from .compression import (
+    check_compression,
+    dataset_path,
+    dataset_variants,
+    open_append,
+    open_text,
+)
+from .config import get_config
+from .listing_index import ListingIndex, listing_id
+from .sinks import SINK_TYPES, ndjson_line
 
 
 class DataExporter:
     """
-    Classe responsável por exportar dados de automóveis para arquivos CSV e JSON.
-    Esta classe fornece funcionalidades para guardar dados de automóveis em formatos
-    de arquivo convenientes para análise e armazenamento de dados.
+    Classe responsável por exportar dados de automóveis para vários destinos (sinks,
+    ver scraping/sinks.py): o CSV, o NDJSON e, se ativos no config.txt, a base SQLite,
+    o dataset Parquet e o histórico de preços.
+
+    Os automóveis são escritos em diferido (write-behind): append guarda-os numa fila
+    em memória e uma thread de escrita dedicada entrega cada lote a todos os destinos,
+    a cada ExportBatchSize automóveis ou ExportFlushInterval segundos. A escrita é
+    feita fora do lock da fila, por isso um destino lento não atrasa a recolha. A
+    opção ExportFsync define a durabilidade dos arquivos: "batch" faz fsync a cada
+    escrita, "close" só ao fechar e "off" deixa-a ao sistema operativo. Depois de
+    cada escrita, as funções em `flush_observers` recebem os automóveis escritos.
+    close() (chamado também à saída do programa) escreve os pendentes e fecha os
+    destinos.
+
+    Cada escrita acrescenta as mesmas linhas ao `cars.ndjson` (um objeto JSON por
+    linha, com os valores já tipados), que acompanha o CSV sem nunca ser reescrito:
+    o tempo de exportação depende só das linhas novas e não do tamanho do arquivo.
+    Para o ler por partes, ver analysis.ndjson_reader.
+
+    Com ExportParquet ativo (requer o pyarrow), cada escrita é também um row group
+    do dataset Parquet em `cars_parquet`, particionado pela data da recolha, que a
+    análise pode ler por colunas e datas (analysis.parquet_reader).
+
+    Com ExportSQLite ativo, cada escrita é também gravada numa transação na base
+    `cars.sqlite` (CarStore, uma linha por URL), que a análise pode consultar com
+    filtros em SQL (analysis.sqlite_reader).
+
+    Com ExportHistory ativo, todas as linhas de cada escrita, incluindo os anúncios
+    já guardados (ignorados no CSV), passam pelo histórico `cars_history.sqlite`
+    (PriceHistory), que regista só os valores que mudaram desde a recolha anterior,
+    como o preço.
+
+    Com ExportCompression "gzip" ou "zstd" (requer o zstandard), o CSV e o NDJSON
+    são guardados comprimidos (`cars.csv.gz`, `cars.ndjson.gz`, ...): cada escrita é
+    acrescentada como um frame comprimido completo (ver compression.FrameWriter) e
+    todas as leituras os descomprimem de seguida. Ao mudar a compressão, o CSV e o
+    NDJSON existentes são convertidos para a nova (ver migrate) e os originais, que
+    deixariam de ser atualizados, são removidos.
+
+    Os duplicados são eliminados à entrada: um índice dos anúncios já no CSV
+    (ListingIndex, por ID do anúncio), construído ao abrir o exportador a partir da
+    coluna das URLs, faz com que um automóvel já guardado não seja escrito de novo.
     """
 
-    def __init__(self, filename="cars.csv"):
+    def __init__(self, filename="cars.csv", config=None):
         """
         Inicializa o DataExporter com o nome do arquivo CSV.
         """
@@ -25,9 +76,22 @@ class DataExporter:
         # Cria a pasta 'data_collected' se ela não existir
         os.makedirs(data_collected_dir, exist_ok=True)
 
+        # Compressão opcional do CSV e do NDJSON (extensão .gz ou .zst)
+        config = config or get_config()
+        self.compression = check_compression(config["ExportCompression"])
+
         # Define os caminhos para os arquivos CSV e JSON dentro da pasta 'data_collected'
-        self.csv_filename = data_collected_dir / filename
-        self.json_filename = self.csv_filename.with_suffix(".json")
+        base_filename = data_collected_dir / filename
+        self.csv_filename = Path(dataset_path(base_filename, self.compression))
+        self.json_filename = base_filename.with_suffix(".json")
+        self.ndjson_filename = Path(
+            dataset_path(base_filename.with_suffix(".ndjson"), self.compression)
+        )
+        self.sqlite_filename = base_filename.with_suffix(".sqlite")
+        self.history_filename = base_filename.with_name(
+            f"{base_filename.stem}_history.sqlite"
+        )
+        self.parquet_dirname = base_filename.with_name(f"{base_filename.stem}_parquet")
         self.fieldnames = [
             "brand",
             "price",
@@ -39,89 +103,333 @@ class DataExporter:
             "url",
         ]
 
-        # Verifica se o arquivo CSV já existe; se não, cria um novo.
-        if not self.csv_filename.exists():
+        # Escrita em diferido: buffer, arquivo aberto e thread de escrita
+        self.batch_size = max(1, config["ExportBatchSize"])
+        self.flush_interval = config["ExportFlushInterval"]
+        self.fsync_policy = config["ExportFsync"]
+        self.buffer = []
+        # Automóveis ignorados: já guardados (duplicados) e sem dados suficientes
+        self.skipped = []
+        self.rejected = []
+        # IDs dos anúncios na fila, que só passam ao índice depois de escritos no CSV
+        self.pending = ListingIndex()
+        self.flush_thread = None
+        self.flush_observers = []
+
+        # Lock da fila (append) e lock da escrita nos destinos (flush), separados para
+        # que uma escrita lenta nunca bloqueie quem acrescenta automóveis
+        self.lock = threading.RLock()
+        self.write_lock = threading.RLock()
+        self.flush_needed = threading.Condition(self.lock)
+
+        # Destinos da exportação (CSV, NDJSON e os ativos no config.txt)
+        self.sinks = [
+            sink
+            for sink in (sink_type.create(self, config) for sink_type in SINK_TYPES)
+            if sink is not None
+        ]
+
+        # Verifica se o arquivo CSV já existe; se não, converte o CSV com outra
+        # compressão (se existir) ou cria um novo.
+        if not self.migrate(base_filename, self.csv_filename):
             self.create_csv()
 
+        # O NDJSON acompanha o CSV; se ainda não existir, é criado a partir dele
+        if not self.migrate(base_filename.with_suffix(".ndjson"), self.ndjson_filename):
+            self.rebuild_ndjson()
+
+        # Índice dos anúncios já guardados, para eliminar duplicados à entrada
+        self.index = ListingIndex.from_csv(self.csv_filename)
+
+    def migrate(self, base_filename, filename):
+        """
+        Prepara `filename`, o arquivo com a compressão configurada. Se não existir mas
+        existir o mesmo arquivo com outra compressão (ex.: `cars.csv` depois de ativar
+        o gzip, ou `cars.csv.gz` depois de o desativar), copia-o para `filename` e
+        remove o original, que deixaria de ser atualizado.
+
+        Returns:
+            bool: False se `filename` não existe nem foi criado (arquivo novo).
+        """
+        if filename.exists():
+            return True
+        for variant in dataset_variants(base_filename):
+            if os.path.exists(variant):
+                print(f"A converter {variant} para {filename}.")
+                temp_filename = self.temp_filename(filename)
+                self.copy_text(variant, temp_filename)
+                os.replace(temp_filename, filename)
+                os.remove(variant)
+                return True
+        return False
+
     def create_csv(self):
         """ Cria um novo arquivo CSV com os cabeçalhos apropriados. """
-        with self.csv_filename.open("w", newline="") as f:
+        with open_append(self.csv_filename) as f:
             writer = csv.DictWriter(f, fieldnames=self.fieldnames)
             writer.writeheader()
 
-    def append_to_csv(self, data):
+    def temp_filename(self, filename):
         """
-        Adiciona dados ao arquivo CSV. Aceita tanto dicionários quanto objetos Car.
+        Devolve um arquivo temporário vazio na mesma pasta e com a mesma compressão
+        (extensão) de `filename`, removendo restos de uma execução interrompida.
+        """
+        temp_filename = filename.with_name(f"tmp_{filename.name}")
+        temp_filename.unlink(missing_ok=True)
+        return temp_filename
+
+    def copy_text(self, source, target, chunk_lines=10000):
+        """
+        Copia um arquivo de texto para outro (ex.: sem compressão para comprimido),
+        linha a linha, acrescentando um frame a cada `chunk_lines` linhas.
+        """
+        with open_text(source) as source_file, open_append(target) as target_file:
+            for number, line in enumerate(source_file, 1):
+                target_file.write(line)
+                if number % chunk_lines == 0:
+                    target_file.flush()
+
+    def append(self, data):
+        """
+        Acrescenta um automóvel à fila de exportação. Aceita tanto objetos Car quanto
+        dicionários (convertidos uma única vez com Car.from_dict). Os automóveis
+        ignorados (duplicados ou sem dados suficientes) também são entregues aos
+        `flush_observers` na escrita seguinte, e os duplicados aos destinos com
+        receives_skipped.
+
+        Só espera pelo lock da fila, nunca pela escrita nos destinos.
 
         Args:
-            data (dict or Car): Dados do automóvel para serem adicionados ao CSV.
+            data (Car or dict): Dados do automóvel a exportar.
+
+        Returns:
+            bool: False se o automóvel foi ignorado (duplicado ou sem dados suficientes).
         """
         if isinstance(data, dict):
-            self._append_dict_to_csv(data)
+            car = Car.from_dict(data)
         elif isinstance(data, Car):
-            self._append_car_to_csv(data)
+            car = data
         else:
             raise ValueError("Tipo de dados não suportado para exportação.")
+        with self.lock:
+            accepted = False
+            if not self.has_enough_data(car):
+                self.rejected.append(car)
+            elif car.url and (car.url in self.index or car.url in self.pending):
+                self.skipped.append(car)
+            else:
+                if car.url:
+                    self.pending.add(car.url)
+                self.buffer.append(car)
+                accepted = True
+            if self.flush_thread is None:
+                self.start_flush_thread()
+            if self.queued() >= self.batch_size:
+                self.flush_needed.notify()
+            return accepted
+
+    # Nome anterior, mantido por compatibilidade.
+    append_to_csv = append
 
-    def _append_dict_to_csv(self, car_data):
+    def queued(self):
+        """ Número de automóveis na fila, incluindo os ignorados. Deve ser chamado com o lock. """
+        return len(self.buffer) + len(self.skipped) + len(self.rejected)
+
+    def has_enough_data(self, car_data):
+        """
+        Indica se o automóvel (Car ou linha do CSV) tem pelo menos dois campos
+        preenchidos (ex.: não só a URL).
         """
-        Adiciona um dicionário de dados de um automóvel ao arquivo CSV.
+        if isinstance(car_data, Car):
+            car_data = car_data.as_dict()
+        filled = sum(
+            1 for value in car_data.values() if value is not None and str(value).strip()
+        )
+        return filled >= 2
 
-        Args:
-            car_data (dict): Dicionário que contem os dados do automóvel.
+    def add_sink(self, sink):
+        """ Acrescenta um destino (ver sinks.Sink) aos configurados. """
+        with self.write_lock:
+            self.sinks.append(sink)
+
+    def sink(self, name):
+        """ Devolve o destino ativo com esse nome, ou None. """
+        for sink in self.sinks:
+            if sink.name == name:
+                return sink
+        return None
+
+    def start_flush_thread(self):
         """
-        with self.csv_filename.open("a", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=self.fieldnames)
-            writer.writerow(car_data)
+        Inicia a thread de escrita em diferido. Deve ser chamado com o lock.
+        """
+        self.flush_thread = threading.Thread(
+            target=self.flush_loop, name="export-flush", daemon=True
+        )
+        self.flush_thread.start()
+        atexit.register(self.close)
 
-    def _append_car_to_csv(self, car):
+    def flush_loop(self):
         """
-        Adiciona dados de uma instância Car ao arquivo CSV.
+        Thread de escrita: escreve a fila quando atinge batch_size automóveis ou ao fim
+        de flush_interval segundos. Termina quando deixa de ser a thread do exportador
+        (close escreve o que ficar na fila). Um erro não termina a thread: depois de
+        uma escrita falhada, a seguinte só é tentada ao fim de flush_interval.
+        """
+        current = threading.current_thread()
+        failed = False
+        while True:
+            with self.lock:
+                self.flush_needed.wait_for(
+                    lambda: self.flush_thread is not current
+                    or (not failed and self.queued() >= self.batch_size),
+                    timeout=self.flush_interval,
+                )
+                if self.flush_thread is not current:
+                    return
+            try:
+                failed = not self.flush()
+            except Exception as e:
+                print(f"Erro na exportação: {e}")
+                failed = True
 
-        Args:
-            car (Car): Objeto Car que contem os dados do automóvel.
-        """
-        car_data = {
-            "brand": car.brand,
-            "price": car.price,
-            "fuel": car.fuel,
-            "month": car.month,
-            "year": car.year,
-            "mileage": car.mileage,
-            "power": car.power,
-            "url": car.url,
-        }
-        self._append_dict_to_csv(car_data)
+    def flush(self):
+        """
+        Retira os automóveis da fila e escreve-os em todos os destinos (os duplicados
+        só nos destinos com receives_skipped) e depois avisa os `flush_observers`, com
+        os escritos e os ignorados desde a última escrita.
+
+        A fila só fica bloqueada enquanto é esvaziada: a escrita nos destinos é feita
+        fora do lock, com o write_lock, que mantém a ordem dos lotes. Um erro num
+        destino que não seja `required` é mostrado e não impede os restantes. Um erro
+        num destino `required` (o CSV) devolve o lote ao início da fila, para a escrita
+        seguinte; os anúncios só entram no índice depois de escritos.
+
+        Returns:
+            bool: False se o lote voltou à fila por um erro num destino `required`.
+        """
+        with self.write_lock:
+            with self.lock:
+                if not self.queued():
+                    return True
+                rows, self.buffer = self.buffer, []
+                skipped, self.skipped = self.skipped, []
+                rejected, self.rejected = self.rejected, []
+            for sink in self.sinks:
+                cars = rows + skipped if sink.receives_skipped else rows
+                if not cars:
+                    continue
+                try:
+                    sink.write(cars)
+                except Exception as e:
+                    if not sink.required:
+                        print(f"Erro na exportação ({sink.name}): {e}")
+                        continue
+                    print(
+                        f"Erro na exportação ({sink.name}): {e}. "
+                        f"{len(rows)} automóveis voltam à fila."
+                    )
+                    with self.lock:
+                        self.buffer[:0] = rows
+                        self.skipped[:0] = skipped
+                        self.rejected[:0] = rejected
+                    return False
+            with self.lock:
+                for car in rows:
+                    if car.url:
+                        self.index.add(car.url)
+                        self.pending.discard(car.url)
+            for observer in self.flush_observers:
+                observer(rows + skipped + rejected)
+            return True
+
+    def close_file(self):
+        """
+        Escreve os automóveis pendentes e fecha todos os destinos. Se a escrita
+        falhar, os automóveis ficam na fila (um novo close volta a tentar).
+        """
+        with self.write_lock:
+            if not self.flush():
+                print(f"{len(self.buffer)} automóveis não foram exportados.")
+            for sink in self.sinks:
+                sink.close()
+
+    def close(self):
+        """
+        Escreve os automóveis pendentes, termina a thread de escrita e fecha os
+        destinos. Pode ser chamado várias vezes; um novo append volta a abri-los.
+        """
+        with self.lock:
+            thread = self.flush_thread
+            self.flush_thread = None
+            self.flush_needed.notify()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self.close_file()
+        if thread is not None:
+            atexit.unregister(self.close)
 
     def remove_duplicates(self):
         """
-        Remove linhas duplicadas e linhas com dados insuficientes do arquivo CSV.
-        """
-        unique_data = set()
-        rows = []
-        with self.csv_filename.open("r", newline="", encoding="utf-8") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                # Verifica se a linha contém dados suficientes
-                if sum(not cell.strip() for cell in row.values()) < len(row) - 1:
-                    tuple_row = tuple(row.items())
-                    # Adiciona a linha ao conjunto de dados únicos se ainda não estiver presente
-                    if tuple_row not in unique_data:
-                        unique_data.add(tuple_row)
-                        rows.append(row)
-
-        # Reescreve o arquivo CSV com as linhas únicas
-        with self.csv_filename.open("w", newline="", encoding="utf-8") as file:
-            writer = csv.DictWriter(file, fieldnames=self.fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
+        Compacta o arquivo CSV, removendo anúncios repetidos (pela URL, mantendo a
+        primeira linha) e linhas com dados insuficientes. Como os duplicados já são
+        eliminados à entrada, só é necessário para arquivos criados por versões
+        anteriores ou editados à mão.
+        """
+        with self.write_lock, self.lock:
+            self.close_file()
+            self._remove_duplicates()
+
+    def _remove_duplicates(self):
+        """
+        Implementação de remove_duplicates; deve ser chamada com os locks. As linhas são
+        lidas e escritas uma a uma num arquivo temporário, que substitui o CSV no fim.
+        """
+        seen = set()
+        temp_filename = self.temp_filename(self.csv_filename)
+        with open_text(self.csv_filename) as file:
+            with open_append(temp_filename) as temp_file:
+                reader = csv.DictReader(file)
+                writer = csv.DictWriter(temp_file, fieldnames=self.fieldnames)
+                writer.writeheader()
+                for number, row in enumerate(reader, 1):
+                    if number % 10000 == 0:
+                        temp_file.flush()
+                    if not self.has_enough_data(row):
+                        continue
+                    url = row.get("url")
+                    key = listing_id(url) if url else tuple(row.items())
+                    if key not in seen:
+                        seen.add(key)
+                        writer.writerow(row)
+        os.replace(temp_filename, self.csv_filename)
+        # Atualiza o índice no próprio objeto, que pode estar partilhado (ScraperController)
+        self.index.ids = {key for key in seen if isinstance(key, str)}
+        self.rebuild_ndjson()
+
+    def rebuild_ndjson(self):
+        """
+        Volta a criar o NDJSON a partir do CSV, linha a linha (ex.: para um CSV de uma
+        versão anterior ou depois de remove_duplicates). Deve ser chamado sem arquivos
+        abertos.
+        """
+        temp_filename = self.temp_filename(self.ndjson_filename)
+        with open_text(self.csv_filename) as csv_file:
+            with open_append(temp_filename) as ndjson_file:
+                for number, row in enumerate(csv.DictReader(csv_file), 1):
+                    ndjson_file.write(ndjson_line(Car.from_dict(row)))
+                    if number % 10000 == 0:
+                        ndjson_file.flush()
+        os.replace(temp_filename, self.ndjson_filename)
 
     def convert_csv_to_json(self):
         """
-        Converte os dados do arquivo CSV num arquivo JSON.
-        Útil para aplicações que requerem manipulação de dados em formato JSON.
+        Converte os dados do arquivo CSV num único arquivo JSON (lista de objetos).
+        Lê e reescreve todo o arquivo, por isso já não é feito em cada recolha: use-o
+        só quando precisar de um JSON completo; o `cars.ndjson` está sempre atualizado.
         """
-        with self.csv_filename.open("r", encoding="utf-8") as csv_file:
+        self.flush()
+        with open_text(self.csv_filename) as csv_file:
             reader = csv.DictReader(csv_file)
             data = list(reader)
 
@@ -1,9 +1,14 @@
 # scraping/data_parser.py
 
-import os
+import json
 import re
 from urllib.parse import urljoin
 
+from selectolax.parser import HTMLParser
+
+from .car import Car
+from .config import get_config
+
 
 class DataParser:
     """
@@ -11,43 +16,51 @@ class DataParser:
     tais como os detalhes do automóvel a partir de páginas de busca e páginas individuais de itens.
     """
 
-    def __init__(self):
-        # Constrói o caminho absoluto para o arquivo de configuração.
-        config_path = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)), "config", "config.txt"
-        )
-        self.load_selectors(config_path)
+    # Seletores lidos da configuração: chave do config.txt -> atributo. Os do modo
+    # rápido (Card*) são relativos a cada cartão dos resultados de pesquisa.
+    SELECTORS = {
+        "CarsSelector": "cars_selector",
+        "OthersSelector": "others_selector",
+        "BrandSelector": "brand_selector",
+        "PriceSelector": "price_selector",
+        "StructuredDataSelector": "structured_data_selector",
+        "CardSelector": "card_selector",
+        "CardPriceSelector": "card_price_selector",
+        "CardFuelSelector": "card_fuel_selector",
+        "CardYearSelector": "card_year_selector",
+        "CardMileageSelector": "card_mileage_selector",
+        "CardPowerSelector": "card_power_selector",
+    }
+
+    # Dados estruturados (JSON-LD, schema.org) das páginas dos automóveis.
+    STRUCTURED_DATA_TYPES = ("Car", "Vehicle", "Product")
+    MONTHS = (
+        "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+        "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro",
+    )
+    KW_TO_CV = 1.35962
+
+    # Campos extraídos da página de um automóvel.
+    ITEM_FIELDS = ("brand", "price", "fuel", "month", "year", "mileage", "power")
+
+    def __init__(self, config=None):
+        self.load_selectors(config or get_config())
 
-    def load_selectors(self, config_path):
+    def load_selectors(self, config):
         """
-        Carrega os seletores CSS a partir de um arquivo de configuração.
-        Se o arquivo não for encontrado, usa os seletores padrão.
+        Carrega os seletores CSS e os campos obrigatórios do modo rápido da
+        configuração partilhada. Também é chamado quando o config.txt é recarregado.
         """
-        try:
-            with open(config_path, "r") as config_file:
-                for line in config_file:
-                    if line.startswith("CarsSelector:"):
-                        self.cars_selector = line.split(":", 1)[1].strip()
-                    elif line.startswith("OthersSelector:"):
-                        self.others_selector = line.split(":", 1)[1].strip()
-                    elif line.startswith("BrandSelector:"):
-                        self.brand_selector = line.split(":", 1)[1].strip()
-                    elif line.startswith("PriceSelector:"):
-                        self.price_selector = line.split(":", 1)[1].strip()
-        except FileNotFoundError:
-            print(
-                f"Arquivo de configuração não encontrado em {config_path}. Usando seletores padrão."
-            )
-            self.set_default_selectors()
+        for key, attribute in self.SELECTORS.items():
+            setattr(self, attribute, config[key])
+        # Campos que um cartão tem de ter para dispensar a página do automóvel.
+        self.card_required_fields = self.parse_field_list(config["CardRequiredFields"])
 
-    def set_default_selectors(self):
+    def parse_field_list(self, fields_str):
         """
-        Define os seletores padrão para o caso do arquivo de configuração não ser encontrado.
+        Converte uma lista de campos separados por vírgulas num tuplo.
         """
-        self.cars_selector = "h1.e1oqyyyi9.ooa-1ed90th.er34gjf0"
-        self.others_selector = "p.ezl3qpx3.ooa-1i4y99d.er34gjf0"
-        self.brand_selector = "h3.offer-title.big-text.ezl3qpx2.ooa-ebtemw.er34gjf0"
-        self.price_selector = "h3.offer-price__number.eqdspoq4.ooa-o7wv9s.er34gjf0"
+        return tuple(field.strip() for field in fields_str.split(",") if field.strip())
 
     def parse_search_page(self, html):
         """
@@ -59,9 +72,64 @@ class DataParser:
                 "https://www.standvirtual.com", car.css_first("a").attributes["href"]
             )
 
+    def parse_search_cards(self, html):
+        """
+        Analisa a página de busca e devolve, de cada cartão de resultado, um Car com a
+        URL e os detalhes que o cartão mostra (marca, preço, combustível, ano,
+        quilometragem e potência). Os campos que o cartão não tem ficam a None. Se os
+        seletores dos cartões não encontrarem nada, devolve apenas as URLs.
+        """
+        cards = html.css(self.card_selector)
+        if not cards:
+            for url in self.parse_search_page(html):
+                yield Car(url=url)
+            return
+
+        for card in cards:
+            title = card.css_first(self.cars_selector)
+            link = title.css_first("a") if title else None
+            if link is None or "href" not in link.attributes:
+                continue
+            mileage = self.extract_text(card, self.card_mileage_selector)
+            power = self.extract_text(card, self.card_power_selector)
+            yield Car.from_dict({
+                "brand": title.text().strip() or None,
+                "price": self.parse_price(
+                    self.extract_text(card, self.card_price_selector)
+                ),
+                "fuel": self.extract_text(card, self.card_fuel_selector),
+                "month": None,
+                "year": self.extract_text(card, self.card_year_selector),
+                "mileage": self.clean_mileage(mileage) if mileage else None,
+                "power": self.clean_power(power) if power else None,
+                "url": urljoin("https://www.standvirtual.com", link.attributes["href"]),
+            })
+
+    def card_is_complete(self, card):
+        """
+        Indica se um cartão tem todos os campos obrigatórios do modo rápido.
+        """
+        return not card.missing_fields(self.card_required_fields)
+
     def parse_item_page(self, html):
         """
         Analisa a página de um item específico (automóvel) e extrai detalhes como marca, preço, etc.
+        Usa primeiro os dados estruturados da página; os seletores CSS só são usados se
+        não existirem ou para os campos que lhes faltem. Devolve um Car (sem URL).
+        """
+        car_data = self.parse_structured_data(html)
+        if car_data is None:
+            car_data = self.parse_item_css(html)
+        elif None in car_data.values():
+            fallback = self.parse_item_css(html)
+            for field, value in car_data.items():
+                if value is None:
+                    car_data[field] = fallback[field]
+        return Car.from_dict(car_data)
+
+    def parse_item_css(self, html):
+        """
+        Extrai os detalhes do automóvel com os seletores CSS.
         """
         brand = self.extract_text(html, self.brand_selector)
         price = self.parse_price(self.extract_text(html, self.price_selector))
@@ -79,6 +147,145 @@ class DataParser:
             "power": power,
         }
 
+    def item_text_complete(self, text):
+        """
+        Indica se o início de uma página de automóvel já tem todos os detalhes (ver
+        ItemStreamCheck).
+        """
+        check = self.item_stream_check()
+        return check.feed(text) and check.complete()
+
+    def item_stream_check(self):
+        """
+        Cria a verificação de uma página de automóvel recebida em streaming, com os
+        seletores atuais (ver ItemStreamCheck).
+        """
+        return ItemStreamCheck(self)
+
+    def selector_marker(self, selector):
+        """
+        Devolve um texto que tem de existir no HTML para o seletor encontrar o seu
+        elemento: o valor do último atributo, a classe mais longa ou a etiqueta.
+        """
+        last = selector.split()[-1] if selector.split() else selector
+        attribute = re.search(r'=\s*["\']?([^"\'\]]+)', last)
+        if attribute:
+            return attribute.group(1)
+        classes = last.split(".")[1:]
+        if classes:
+            return max(classes, key=len)
+        return "<" + last.split("#")[0].split("[")[0]
+
+    def parse_structured_data(self, html):
+        """
+        Procura nos blocos JSON-LD da página o objeto schema.org do automóvel (Car,
+        Vehicle ou Product) e devolve os seus detalhes, ou None se não existir.
+        """
+        if not self.structured_data_selector:
+            return None
+        for script in html.css(self.structured_data_selector):
+            try:
+                data = json.loads(script.text())
+            except ValueError:
+                continue
+            vehicle = self.find_vehicle(data)
+            if vehicle is not None:
+                return self.parse_vehicle(vehicle)
+        return None
+
+    def find_vehicle(self, data):
+        """
+        Percorre o JSON (listas e "@graph") até encontrar o objeto do automóvel.
+        """
+        if isinstance(data, list):
+            for entry in data:
+                vehicle = self.find_vehicle(entry)
+                if vehicle is not None:
+                    return vehicle
+            return None
+        if not isinstance(data, dict):
+            return None
+        types = data.get("@type")
+        if isinstance(types, str):
+            types = [types]
+        if any(t in self.STRUCTURED_DATA_TYPES for t in types or ()):
+            return data
+        return self.find_vehicle(data.get("@graph"))
+
+    def parse_vehicle(self, vehicle):
+        """
+        Converte o objeto schema.org do automóvel no dicionário de detalhes.
+        """
+        offers = self.first(vehicle.get("offers")) or {}
+        month, year = self.parse_registration_date(
+            vehicle.get("dateVehicleFirstRegistered")
+            or vehicle.get("productionDate")
+            or vehicle.get("vehicleModelDate")
+        )
+        engine = self.first(vehicle.get("vehicleEngine")) or {}
+        power = self.first(engine.get("enginePower")) if isinstance(engine, dict) else None
+        brand = vehicle.get("name")
+        fuel = vehicle.get("fuelType")
+        return {
+            "brand": brand.strip() if isinstance(brand, str) and brand.strip() else None,
+            "price": self.to_number(offers.get("price")) if isinstance(offers, dict) else None,
+            "fuel": fuel if isinstance(fuel, str) and fuel else None,
+            "month": month,
+            "year": year,
+            "mileage": self.quantity(vehicle.get("mileageFromOdometer")),
+            "power": self.engine_power(power),
+        }
+
+    def first(self, value):
+        """ Devolve o primeiro elemento de uma lista, ou o próprio valor. """
+        if isinstance(value, list):
+            return value[0] if value else None
+        return value
+
+    def to_number(self, value):
+        """ Converte um valor numérico do JSON (número ou texto) em float, ou None. """
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def quantity(self, value):
+        """
+        Lê um QuantitativeValue do schema.org ({"value": ...}) ou um número e devolve
+        um inteiro, ou None.
+        """
+        if isinstance(value, dict):
+            value = value.get("value")
+        number = self.to_number(value)
+        return round(number) if number is not None else None
+
+    def engine_power(self, power):
+        """
+        Devolve a potência em cv; valores em kW (unitCode "KWT") são convertidos.
+        """
+        value = self.quantity(power)
+        if value is not None and isinstance(power, dict) and power.get("unitCode") == "KWT":
+            value = round(value * self.KW_TO_CV)
+        return value
+
+    def parse_registration_date(self, date_str):
+        """
+        Separa uma data ISO ("2019-03-01", "2019-03" ou "2019") no mês (por extenso,
+        como nos anúncios) e no ano.
+        """
+        parts = str(date_str).split("-") if date_str else []
+        year = int(parts[0]) if parts and parts[0].isdigit() else None
+        month = None
+        if len(parts) >= 2 and parts[1].isdigit() and 1 <= int(parts[1]) <= 12:
+            month = self.MONTHS[int(parts[1]) - 1]
+        return month, year
+
+    def parse_item_text(self, text):
+        """
+        Constrói a árvore HTML a partir do texto da página e extrai os detalhes do automóvel (Car).
+        """
+        return self.parse_item_page(HTMLParser(text))
+
     def extract_text(self, html, selector):
         """
         Extrai o texto de um elemento HTML usando um seletor CSS.
@@ -134,3 +341,133 @@ class DataParser:
             except ValueError:
                 return None
         return None
+
+
+class ItemStreamCheck:
+    """
+    Acompanha a página de um automóvel recebida em streaming, para a transferência
+    poder terminar assim que todos os detalhes chegaram.
+
+    Os marcadores dos seletores (ver DataParser.selector_marker) são procurados só no
+    texto novo de cada bloco (feed). O HTML é analisado (complete) nas etapas, dados
+    estruturados ou seletores CSS, cujos marcadores já apareceram seguidos de uma
+    etiqueta de fecho, se algum deles fechou depois da última análise da etapa. Um
+    marcador pode aparecer antes do elemento (ex.: no <style> da página), mas um
+    resultado negativo só é revisto quando chega outra ocorrência; se faltar um
+    detalhe, a página é lida até ao fim (ou até StreamMaxKB) sem voltar a ser
+    analisada a cada bloco.
+    """
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.parts = []
+        self.size = 0
+        self.tail = ""
+        # Etapas: (verificação, marcadores que têm de ter chegado)
+        stages = []
+        if parser.structured_data_selector:
+            stages.append((self.structured_complete, [parser.structured_data_selector]))
+        stages.append(
+            (
+                self.css_complete,
+                [parser.brand_selector, parser.price_selector, parser.others_selector],
+            )
+        )
+        self.stages = [
+            (check, [parser.selector_marker(selector) for selector in selectors])
+            for check, selectors in stages
+        ]
+        markers = {marker for _, stage_markers in self.stages for marker in stage_markers}
+        # Posição (no texto todo) a partir da qual procurar cada marcador e fim da
+        # ocorrência que ainda espera pela etiqueta de fecho
+        self.search_from = dict.fromkeys(markers, 0)
+        self.awaiting = dict.fromkeys(markers)
+        self.closed = set()
+        # Marcadores fechados desde a última análise
+        self.fresh = set()
+        self.overlap = max(len(marker) for marker in markers) + 1
+
+    def feed(self, chunk):
+        """
+        Junta um bloco recebido e indica se o texto deve ser analisado (ver complete).
+        """
+        # O fim do texto anterior entra na procura, para os marcadores entre blocos
+        window = self.tail + chunk
+        start = self.size - len(self.tail)
+        self.parts.append(chunk)
+        self.size += len(chunk)
+        self.tail = window[-self.overlap:]
+        for marker in self.search_from:
+            while True:
+                end = self.awaiting[marker]
+                if end is None:
+                    position = window.find(
+                        marker, max(0, self.search_from[marker] - start)
+                    )
+                    if position == -1:
+                        break
+                    end = self.awaiting[marker] = start + position + len(marker)
+                    self.search_from[marker] = end
+                if window.find("</", max(0, end - start)) == -1:
+                    break
+                self.awaiting[marker] = None
+                self.closed.add(marker)
+                self.fresh.add(marker)
+        return self.ready()
+
+    def ready(self):
+        """
+        Indica se alguma etapa tem todos os marcadores fechados e algum deles fechou
+        depois da última análise da etapa.
+        """
+        return any(self.stage_ready(markers) for _, markers in self.stages)
+
+    def stage_ready(self, markers):
+        return all(marker in self.closed for marker in markers) and any(
+            marker in self.fresh for marker in markers
+        )
+
+    def complete(self):
+        """
+        Analisa o texto recebido nas etapas prontas e indica se já tem todos os
+        detalhes. Pode ser chamado fora do ciclo de eventos.
+        """
+        stages = [stage for stage in self.stages if self.stage_ready(stage[1])]
+        for _, markers in stages:
+            self.fresh.difference_update(markers)
+        html = HTMLParser("".join(self.parts))
+        return any(check(html) for check, _ in stages)
+
+    def structured_complete(self, html):
+        """ Indica se os dados estruturados da página têm todos os detalhes. """
+        car_data = self.parser.parse_structured_data(html)
+        return car_data is not None and None not in car_data.values()
+
+    def css_complete(self, html):
+        """ Indica se a página (dados estruturados e seletores CSS) tem todos os detalhes. """
+        car = self.parser.parse_item_page(html)
+        return not car.missing_fields(self.parser.ITEM_FIELDS)
+
+
+# Funções para a análise num pool de processos (ver ScraperController.create_parse_executor).
+# Cada processo guarda o seu DataParser numa variável global, criada uma vez no arranque.
+_worker_parser = None
+
+
+def init_parse_worker(parser):
+    """
+    Inicializa um processo de análise com o DataParser recebido.
+    """
+    global _worker_parser
+    _worker_parser = parser
+
+
+def parse_item_text_worker(text, parser=None):
+    """
+    Analisa o texto da página de um automóvel no processo atual e devolve um Car.
+    Um `parser` recebido (seletores recarregados do config.txt) substitui o do processo.
+    """
+    global _worker_parser
+    if parser is not None:
+        _worker_parser = parser
+    return _worker_parser.parse_item_text(text)
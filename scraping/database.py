@@ -0,0 +1,35 @@
+# scraping/database.py
+
+import sqlite3
+import threading
+
+
+class SQLiteDatabase:
+    """
+    Base das classes guardadas numa base de dados SQLite (CarStore, PriceHistory e
+    HTTPCache): uma única ligação partilhada entre threads, protegida por `lock`.
+
+    A ligação está em modo autocommit (cada transação é aberta com BEGIN) e a base
+    usa o modo WAL, para que as leituras (ex.: a análise) não esperem pelas escritas
+    da recolha. Com readonly=True, a base é aberta só para leitura e não é criada.
+    """
+
+    def __init__(self, path, readonly=False):
+        self.path = path
+        self.lock = threading.Lock()
+        if readonly:
+            self.conn = sqlite3.connect(
+                f"file:{path}?mode=ro", uri=True, check_same_thread=False
+            )
+            return
+        self.conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+
+    def close(self):
+        """
+        Fecha a base de dados. Chamadas posteriores não fazem nada.
+        """
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
@@ -1,54 +1,375 @@
 # scraping/html_fetcher.py
 
+import asyncio
 import os
+import threading
+import time
+from pathlib import Path
 import httpx
 from selectolax.parser import HTMLParser
 
+from .config import get_config
+from .http_cache import HTTPCache
+from .rate_limiter import RateLimiter
+from .retry import CircuitBreaker, RetryableError, RetryPolicy
+
 
 class HTMLFetcher:
     """
     Classe responsável por obter o HTML de páginas web.
+
+    Mantém um cliente HTTP de longa duração (com pool de ligações keep-alive e,
+    opcionalmente, HTTP/2), para não repetir a ligação, o handshake TLS e a
+    resolução DNS em cada pedido. Todos os pedidos passam pelo RateLimiter e o
+    resultado de cada pedido (código HTTP e latência) é comunicado às funções
+    registadas em `response_observers`. Erros transitórios são repetidos segundo a
+    RetryPolicy e o CircuitBreaker pausa os pedidos enquanto o host estiver em baixo.
+
+    As respostas podem ser guardadas numa HTTPCache em data_collected/ (opção HTTPCache):
+    "revalidate" faz pedidos condicionais e reutiliza o corpo guardado em 304;
+    "cache-first" usa o corpo guardado sem ir à rede (útil para voltar a analisar
+    páginas depois de mudar os seletores); "off" desativa a cache.
+
+    Com StreamItems ativo, as páginas pedidas com `until` são lidas em streaming e,
+    em HTTP/2, a transferência termina assim que o conteúdo necessário chegou (ou ao
+    fim de StreamMaxKB), poupando o rodapé, os scripts e as recomendações da página.
     """
 
-    def __init__(self):
-        # Define o caminho para o arquivo de configuração
-        config_path = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)), "config", "config.txt"
+    # Exceções de rede que justificam repetir o pedido.
+    RETRYABLE_ERRORS = (
+        httpx.TimeoutException,
+        httpx.NetworkError,
+        httpx.RemoteProtocolError,
+    )
+
+    def __init__(self, config=None):
+        # Configuração partilhada (config/config.txt)
+        self.settings = config or get_config()
+        self.user_agent = self.settings["User-Agent"]
+        self.rate_limiter = RateLimiter(
+            self.settings["RateLimit"], self.settings["RateBurst"]
         )
-        self.user_agent = self.load_user_agent(config_path)
+        self.configured_rate = (self.settings["RateLimit"], self.settings["RateBurst"])
+        self.retry_policy = RetryPolicy(
+            max_retries=self.settings["MaxRetries"],
+            base_delay=self.settings["RetryBaseDelay"],
+            max_delay=self.settings["RetryMaxDelay"],
+            budget_ratio=self.settings["RetryBudget"],
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=self.settings["CircuitThreshold"],
+            recovery_time=self.settings["CircuitRecovery"],
+        )
+        self.cache = self.open_cache()
+        self.client = httpx.Client(**self.client_options())
+        self.async_client = None
+        self.response_observers = []
+        self.stopped = threading.Event()
+
+    def apply_config(self):
+        """
+        Aplica as opções do config.txt depois de recarregado: User-Agent, limite de
+        pedidos (se mudou), repetições e disjuntor. As opções de streaming e o modo da
+        cache são lidos a cada pedido; o pool de ligações, os timeouts e o HTTP/2 só
+        mudam num novo HTMLFetcher.
+        """
+        settings = self.settings
+        self.user_agent = settings["User-Agent"]
+        for client in (self.client, self.async_client):
+            if client is not None and not client.is_closed:
+                client.headers["User-Agent"] = self.user_agent
+        rate = (settings["RateLimit"], settings["RateBurst"])
+        if rate != self.configured_rate:
+            self.configured_rate = rate
+            self.rate_limiter.configure(*rate)
+        self.retry_policy.max_retries = settings["MaxRetries"]
+        self.retry_policy.base_delay = settings["RetryBaseDelay"]
+        self.retry_policy.max_delay = settings["RetryMaxDelay"]
+        self.retry_policy.budget_ratio = settings["RetryBudget"]
+        self.circuit_breaker.failure_threshold = settings["CircuitThreshold"]
+        self.circuit_breaker.recovery_time = settings["CircuitRecovery"]
+
+    def client_options(self):
+        """
+        Devolve os argumentos comuns aos clientes httpx síncrono e assíncrono.
+        """
+        settings = self.settings
+        http2 = settings["HTTP2"]
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("Pacote 'h2' não instalado. A usar HTTP/1.1.")
+                http2 = False
+
+        return {
+            "headers": {"User-Agent": self.user_agent},
+            "limits": httpx.Limits(
+                max_connections=settings["MaxConnections"],
+                max_keepalive_connections=settings["MaxKeepAliveConnections"],
+                keepalive_expiry=settings["KeepAliveExpiry"],
+            ),
+            "timeout": httpx.Timeout(
+                settings["Timeout"], connect=settings["ConnectTimeout"]
+            ),
+            "http2": http2,
+        }
+
+    def open_cache(self):
+        """
+        Abre a cache de respostas em data_collected/http_cache.sqlite, se ativa.
+        """
+        if self.settings["HTTPCache"] not in ("revalidate", "cache-first"):
+            return None
+        cache_dir = Path(__file__).parent.parent / "data_collected"
+        os.makedirs(cache_dir, exist_ok=True)
+        return HTTPCache(
+            cache_dir / "http_cache.sqlite",
+            max_size=self.settings["HTTPCacheSize"] * 1024 * 1024,
+        )
+
+    def open_async_client(self):
+        """
+        Cria o cliente assíncrono. Deve ser chamado dentro do ciclo de eventos que o vai usar.
+        """
+        if self.async_client is None:
+            self.async_client = httpx.AsyncClient(**self.client_options())
+        return self.async_client
+
+    async def close_async_client(self):
+        """
+        Fecha o cliente assíncrono, se estiver aberto.
+        """
+        if self.async_client is not None:
+            await self.async_client.aclose()
+            self.async_client = None
+
+    def close(self):
+        """
+        Fecha o cliente HTTP síncrono e liberta as ligações do pool. As esperas em
+        curso (repetições, disjuntor) são interrompidas.
+        """
+        self.stopped.set()
+        if not self.client.is_closed:
+            self.client.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def notify_response(self, url, status_code, elapsed):
+        """
+        Comunica o resultado de um pedido aos observadores registados.
+        `status_code` é None quando o pedido falhou sem resposta (timeout, ligação).
+        """
+        for observer in self.response_observers:
+            observer(url, status_code, elapsed)
+
+    def cached_response(self, url):
+        """
+        Devolve a resposta guardada na cache para a URL, ou None.
+        """
+        return self.cache.get(url) if self.cache is not None else None
 
-    def load_user_agent(self, config_path):
+    def check_response(self, url, response, elapsed, cached=None, text=None, partial=False):
         """
-        Carrega o User-Agent do arquivo de configuração.
+        Trata a resposta de um pedido: informa os observadores e o disjuntor e devolve
+        o texto da página (None em 404 ou outros erros 4xx). Respostas 5xx e 429
+        lançam RetryableError para serem repetidas. Uma resposta 304 devolve o corpo
+        guardado em `cached`; uma resposta 200 é guardada na cache, exceto se o corpo
+        lido em streaming tiver sido truncado (`partial`).
         """
-        default_user_agent = "Mozilla/5.0"
+        status_code = response.status_code
+        self.notify_response(url, status_code, elapsed)
+        if status_code >= 500:
+            self.circuit_breaker.record_failure(url)
+            raise RetryableError(f"Erro HTTP {status_code}")
+        self.circuit_breaker.record_success(url)
+        if status_code == 429:
+            retry_after = response.headers.get("Retry-After", "")
+            raise RetryableError(
+                "Erro HTTP 429", float(retry_after) if retry_after.isdigit() else None
+            )
+        if status_code == 404:
+            print(f"Página não encontrada (404): {url}")
+            return None
+        if status_code >= 400:
+            print(f"Erro HTTP ao aceder {url}: {status_code}")
+            return None
+        if status_code == 304 and cached is not None:
+            return cached.text
+        if text is None:
+            text = response.text
+        if self.cache is not None and not partial:
+            self.cache.store(
+                url,
+                text,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            )
+        return text
+
+    def check_error(self, url, error, elapsed):
+        """
+        Trata uma exceção de um pedido. Timeouts e erros de ligação são convertidos em
+        RetryableError; os restantes erros terminam o pedido.
+        """
+        if isinstance(error, self.RETRYABLE_ERRORS):
+            self.notify_response(url, None, elapsed)
+            self.circuit_breaker.record_failure(url)
+            return RetryableError(f"{type(error).__name__}: {error}")
+        print(f"Erro ao aceder {url}: {error}")
+        return None
+
+    def retry_delay(self, url, attempt, error):
+        """
+        Devolve o atraso antes de repetir o pedido, ou None se não houver nova tentativa.
+        """
+        if self.stopped.is_set() or not self.retry_policy.allow_retry(attempt):
+            print(f"Erro ao aceder {url}: {error} (sem mais tentativas)")
+            return None
+        delay = self.retry_policy.backoff(attempt, error.retry_after)
+        print(f"Erro ao aceder {url}: {error}. Nova tentativa em {delay:.1f}s.")
+        return delay
+
+    def fetch_text(self, url):
+        """
+        Obtém o conteúdo de uma URL (ou da cache), repetindo o pedido em erros
+        transitórios e aguardando enquanto o disjuntor do host estiver aberto.
+        """
+        cached = self.cached_response(url)
+        if cached is not None and self.settings["HTTPCache"] == "cache-first":
+            return cached.text
+        headers = cached.conditional_headers() if cached is not None else None
+
+        self.retry_policy.record_request()
+        # Identifica este pedido, se for ele a testar o circuito do host
+        probe = object()
         try:
-            with open(config_path, "r") as config_file:
-                for line in config_file:
-                    if line.startswith("User-Agent:"):
-                        return line.split(":", 1)[1].strip()
-        except FileNotFoundError:
-            print(
-                f"Arquivo config.txt não encontrado em {config_path}. Usando User-Agent padrão."
+            attempt = 0
+            while True:
+                attempt += 1
+                wait = self.circuit_breaker.wait_time(url, probe)
+                while wait > 0:
+                    if self.stopped.wait(wait):
+                        return None
+                    wait = self.circuit_breaker.wait_time(url, probe)
+
+                self.rate_limiter.acquire(url)
+                started = time.monotonic()
+                try:
+                    response = self.client.get(url, headers=headers)
+                    return self.check_response(
+                        url, response, time.monotonic() - started, cached
+                    )
+                except RetryableError as e:
+                    error = e
+                except Exception as e:
+                    error = self.check_error(url, e, time.monotonic() - started)
+                    if error is None:
+                        return None
+
+                delay = self.retry_delay(url, attempt, error)
+                if delay is None or self.stopped.wait(delay):
+                    return None
+        finally:
+            self.circuit_breaker.release_probe(url, probe)
+
+    async def fetch_text_async(self, url, until=None):
+        """
+        Versão assíncrona de fetch_text, usando o cliente assíncrono partilhado.
+        Com `until` e StreamItems ativo, o corpo é lido em streaming (ver stream_text_async).
+        """
+        cached = self.cached_response(url)
+        if cached is not None and self.settings["HTTPCache"] == "cache-first":
+            return cached.text
+        headers = cached.conditional_headers() if cached is not None else None
+        stream = until is not None and self.settings["StreamItems"]
+
+        self.retry_policy.record_request()
+        # Identifica este pedido, se for ele a testar o circuito do host
+        probe = object()
+        try:
+            attempt = 0
+            while True:
+                attempt += 1
+                wait = self.circuit_breaker.wait_time(url, probe)
+                while wait > 0:
+                    await asyncio.sleep(wait)
+                    wait = self.circuit_breaker.wait_time(url, probe)
+
+                await self.rate_limiter.acquire_async(url)
+                started = time.monotonic()
+                try:
+                    if stream:
+                        return await self.stream_text_async(
+                            url, headers, cached, until, started
+                        )
+                    response = await self.open_async_client().get(url, headers=headers)
+                    return self.check_response(
+                        url, response, time.monotonic() - started, cached
+                    )
+                except RetryableError as e:
+                    error = e
+                except Exception as e:
+                    error = self.check_error(url, e, time.monotonic() - started)
+                    if error is None:
+                        return None
+
+                delay = self.retry_delay(url, attempt, error)
+                if delay is None:
+                    return None
+                await asyncio.sleep(delay)
+        finally:
+            self.circuit_breaker.release_probe(url, probe)
+
+    async def stream_text_async(self, url, headers, cached, until, started):
+        """
+        Faz o pedido em streaming e lê o corpo por blocos até a verificação criada por
+        until() (ex.: DataParser.item_stream_check) indicar que o conteúdo necessário
+        chegou, ou terem chegado StreamMaxKB (0 = sem limite). Cada bloco é passado a
+        feed() no ciclo de eventos; a análise do HTML (complete()) corre numa thread.
+        Só termina mais cedo em HTTP/2, em que é cancelado apenas o stream do pedido: em
+        HTTP/1.1 interromper a leitura fecharia a ligação do pool, pelo que o corpo é
+        lido por inteiro.
+        """
+        max_bytes = self.settings["StreamMaxKB"] * 1024
+        client = self.open_async_client()
+        loop = asyncio.get_running_loop()
+        async with client.stream("GET", url, headers=headers) as response:
+            if response.status_code != 200 or response.http_version != "HTTP/2":
+                await response.aread()
+                return self.check_response(
+                    url, response, time.monotonic() - started, cached
+                )
+            check = until()
+            parts = []
+            partial = False
+            async for chunk in response.aiter_text():
+                parts.append(chunk)
+                if (
+                    check.feed(chunk)
+                    and await loop.run_in_executor(None, check.complete)
+                ) or (max_bytes and response.num_bytes_downloaded >= max_bytes):
+                    partial = True
+                    break
+            return self.check_response(
+                url,
+                response,
+                time.monotonic() - started,
+                cached,
+                "".join(parts),
+                partial,
             )
-            return default_user_agent
 
     def get_html(self, url):
         """
         Obtém o HTML de uma URL.
         """
-        headers = {"User-Agent": self.user_agent}
-        try:
-            response = httpx.get(url, headers=headers)
-            if response.status_code == 404:
-                print(f"Página não encontrada (404): {url}")
-                return None
-            response.raise_for_status()
-            return HTMLParser(response.text)
-        except httpx.HTTPStatusError as e:
-            print(f"Erro HTTP ao aceder {url}: {e.response.status_code}")
-            return None
-        except Exception as e:
-            print(f"Erro ao aceder {url}: {e}")
-            return None
+        text = self.fetch_text(url)
+        return HTMLParser(text) if text is not None else None
 
+    async def get_html_async(self, url):
+        """
+        Obtém o HTML de uma URL de forma assíncrona, usando o cliente assíncrono partilhado.
+        """
+        text = await self.fetch_text_async(url)
+        return HTMLParser(text) if text is not None else None
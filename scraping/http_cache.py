@@ -0,0 +1,108 @@
+# scraping/http_cache.py
+
+import time
+import zlib
+
+from .database import SQLiteDatabase
+
+
+class CachedResponse:
+    """
+    Resposta guardada em cache: corpo da página e validadores HTTP (ETag/Last-Modified).
+    """
+
+    def __init__(self, text, etag=None, last_modified=None):
+        self.text = text
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def conditional_headers(self):
+        """
+        Cabeçalhos para um pedido condicional: o servidor responde 304 se não mudou.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HTTPCache(SQLiteDatabase):
+    """
+    Cache persistente de respostas HTTP, guardada numa base de dados SQLite.
+
+    Cada entrada é indexada pela URL e guarda o corpo comprimido com zlib, o ETag e o
+    Last-Modified. Quando o tamanho total dos corpos ultrapassa `max_size` bytes, as
+    entradas usadas há mais tempo são removidas (LRU).
+    """
+
+    def __init__(self, path, max_size=200 * 1024 * 1024):
+        super().__init__(path)
+        self.max_size = max_size
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+            "body BLOB, size INTEGER, accessed REAL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)"
+        )
+        self.total_size = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    def get(self, url):
+        """
+        Devolve a resposta guardada para a URL (CachedResponse) ou None.
+        """
+        with self.lock:
+            if self.conn is None:
+                return None
+            row = self.conn.execute(
+                "SELECT etag, last_modified, body FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE responses SET accessed = ? WHERE url = ?", (time.time(), url)
+            )
+        etag, last_modified, body = row
+        return CachedResponse(zlib.decompress(body).decode("utf-8"), etag, last_modified)
+
+    def store(self, url, text, etag=None, last_modified=None):
+        """
+        Guarda (ou substitui) a resposta de uma URL e aplica o limite de tamanho.
+        """
+        body = zlib.compress(text.encode("utf-8"))
+        with self.lock:
+            if self.conn is None:
+                return
+            old = self.conn.execute(
+                "SELECT size FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, etag, last_modified, body, size, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body, len(body), time.time()),
+            )
+            self.total_size += len(body) - (old[0] if old else 0)
+            if self.total_size > self.max_size:
+                self.evict()
+
+    def evict(self):
+        """
+        Remove as entradas menos usadas até o total ficar abaixo de 90% do limite.
+        Deve ser chamado com o lock.
+        """
+        target = self.max_size * 0.9
+        removed = []
+        for url, size in self.conn.execute(
+            "SELECT url, size FROM responses ORDER BY accessed"
+        ).fetchall():
+            if self.total_size <= target:
+                break
+            removed.append((url,))
+            self.total_size -= size
+        self.conn.executemany("DELETE FROM responses WHERE url = ?", removed)
@@ -0,0 +1,63 @@
+# scraping/listing_index.py
+
+import csv
+import re
+
+from .compression import open_text
+
+# Os anúncios do Stand Virtual terminam em "-ID<código>.html" (ex.: "...-ID8PyN1P.html").
+LISTING_ID_PATTERN = re.compile(r"-(ID[0-9A-Za-z]+)\.html")
+
+
+def listing_id(url):
+    """
+    Extrai o ID do anúncio (ex.: "ID8PyN1P") de uma URL.
+    Se a URL não tiver o formato esperado, devolve a própria URL.
+    """
+    match = LISTING_ID_PATTERN.search(url)
+    return match.group(1) if match else url
+
+
+class ListingIndex:
+    """
+    Índice compacto dos anúncios já recolhidos, guardado como um conjunto de IDs.
+    Permite saber, antes de qualquer pedido HTTP, se uma URL já está nos dados.
+    """
+
+    def __init__(self, ids=()):
+        self.ids = set(ids)
+
+    @classmethod
+    def from_csv(cls, csv_path, url_field="url"):
+        """
+        Constrói o índice a partir da coluna de URLs de um CSV (comprimido ou não).
+        Só a coluna das URLs é guardada; um arquivo inexistente produz um índice vazio.
+        """
+        index = cls()
+        try:
+            with open_text(csv_path) as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                if not header or url_field not in header:
+                    return index
+                column = header.index(url_field)
+                for row in reader:
+                    if len(row) > column and row[column]:
+                        index.add(row[column])
+        except FileNotFoundError:
+            pass
+        return index
+
+    def add(self, url):
+        """ Adiciona a URL (pelo seu ID) ao índice. """
+        self.ids.add(listing_id(url))
+
+    def discard(self, url):
+        """ Remove a URL (pelo seu ID) do índice, se lá estiver. """
+        self.ids.discard(listing_id(url))
+
+    def __contains__(self, url):
+        return listing_id(url) in self.ids
+
+    def __len__(self):
+        return len(self.ids)
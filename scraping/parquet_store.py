@@ -0,0 +1,106 @@
+# scraping/parquet_store.py
+
+import os
+from datetime import date, datetime
+from pathlib import Path
+
+from .car import Car
+
+# Tipos das colunas no Parquet; os inteiros aceitam valores em falta (null).
+COLUMN_TYPES = {
+    "brand": "string",
+    "price": "float64",
+    "fuel": "string",
+    "month": "string",
+    "year": "int64",
+    "mileage": "int64",
+    "power": "int64",
+    "url": "string",
+}
+
+# Nome da coluna de partição (diretórios "scrape_date=AAAA-MM-DD").
+PARTITION_FIELD = "scrape_date"
+
+
+def import_pyarrow():
+    """
+    Importa o pyarrow (dependência opcional). Devolve o módulo, ou None se não
+    estiver instalado.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return None
+    return pyarrow
+
+
+class ParquetDatasetWriter:
+    """
+    Escreve os automóveis exportados num dataset Parquet (por colunas), particionado
+    pela data da recolha: <pasta>/scrape_date=AAAA-MM-DD/part-<hora>.parquet.
+
+    Cada chamada a write (um lote do DataExporter) é escrita como um row group no
+    arquivo aberto da partição do dia; o arquivo só fica legível depois de close(),
+    que escreve o rodapé do Parquet. Até lá tem um nome começado por "." (ignorado
+    pelo pyarrow ao ler o dataset), que close() muda para o definitivo; um arquivo
+    deixado a meio por uma recolha interrompida nunca impede a leitura. Cada abertura
+    cria um arquivo novo, por isso os arquivos já fechados nunca são alterados.
+    """
+
+    def __init__(self, directory, pyarrow):
+        self.directory = Path(directory)
+        self.pa = pyarrow
+        self.schema = pyarrow.schema(
+            [(field, COLUMN_TYPES[field]) for field in Car.FIELDS]
+        )
+        self.writer = None
+        self.partition = None
+        self.path = None
+
+    def write(self, rows, scrape_date=None):
+        """
+        Escreve as linhas (Car ou dicionários) como um row group na partição de
+        `scrape_date` (por omissão, a data de hoje).
+        """
+        if not rows:
+            return
+        scrape_date = str(scrape_date or date.today())
+        if scrape_date != self.partition:
+            self.close()
+            self.open(scrape_date)
+        table = self.pa.Table.from_pylist(
+            [
+                (row if isinstance(row, Car) else Car.from_dict(row)).as_dict()
+                for row in rows
+            ],
+            schema=self.schema,
+        )
+        self.writer.write_table(table)
+
+    def open(self, scrape_date):
+        """
+        Abre um novo arquivo na partição de `scrape_date`, com o nome temporário
+        (ver close).
+        """
+        partition_dir = self.directory / f"{PARTITION_FIELD}={scrape_date}"
+        partition_dir.mkdir(parents=True, exist_ok=True)
+        filename = f"part-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}.parquet"
+        self.path = partition_dir / filename
+        self.writer = self.pa.parquet.ParquetWriter(
+            self.temp_path(self.path), self.schema
+        )
+        self.partition = scrape_date
+
+    def temp_path(self, path):
+        """ Nome do arquivo enquanto está aberto, ignorado na leitura do dataset. """
+        return path.with_name(f".{path.name}")
+
+    def close(self):
+        """ Fecha o arquivo aberto, se houver, e dá-lhe o nome definitivo. """
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.temp_path(self.path), self.path)
+            self.writer = None
+            self.partition = None
+            self.path = None
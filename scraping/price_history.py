@@ -0,0 +1,152 @@
+# scraping/price_history.py
+
+import json
+import time
+
+from .car import Car
+from .database import SQLiteDatabase
+from .listing_index import listing_id
+
+# Campos comparados entre recolhas (a URL identifica o anúncio pelo seu ID).
+TRACKED_FIELDS = tuple(field for field in Car.FIELDS if field != "url")
+
+
+class PriceHistory(SQLiteDatabase):
+    """
+    Histórico dos anúncios numa base de dados SQLite: uma linha atual por ID de
+    anúncio (tabela `listings`) e um registo de alterações (tabela `changes`) escrito
+    só quando algum valor muda entre recolhas.
+
+    Cada alteração guarda a data e apenas os campos alterados, em JSON, como
+    {"price": [antigo, novo]}. Um campo sem valor na nova recolha (ex.: o mês no
+    modo rápido) não conta como alteração.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS listings ("
+            "listing_id TEXT PRIMARY KEY, url TEXT, brand TEXT, price REAL, fuel TEXT, "
+            "month TEXT, year INTEGER, mileage INTEGER, power INTEGER, "
+            "first_seen REAL, last_seen REAL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS changes ("
+            "listing_id TEXT, seen REAL, fields TEXT)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS changes_listing ON changes(listing_id, seen)"
+        )
+
+    def record(self, rows, seen=None):
+        """
+        Regista uma recolha das linhas (dicionários ou Car) numa transação: anúncios
+        novos ficam com a sua linha atual; nos já conhecidos, os campos alterados
+        atualizam a linha atual e ficam num registo de alterações. As linhas sem URL
+        ou sem nenhum valor comparado (ex.: uma página que não foi lida) são
+        ignoradas. Devolve o número de anúncios alterados.
+        """
+        seen = seen or time.time()
+        cars = {}
+        for row in rows:
+            car = row if isinstance(row, Car) else Car.from_dict(row)
+            if car.url and any(getattr(car, field) is not None for field in TRACKED_FIELDS):
+                cars[listing_id(car.url)] = car
+        if not cars:
+            return 0
+
+        changed = 0
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                current = self.current_rows(list(cars))
+                for key, car in cars.items():
+                    previous = current.get(key)
+                    if previous is None:
+                        self.insert(key, car, seen)
+                        continue
+                    fields = {
+                        field: [previous[field], getattr(car, field)]
+                        for field in TRACKED_FIELDS
+                        if getattr(car, field) is not None
+                        and getattr(car, field) != previous[field]
+                    }
+                    self.update(key, car, fields, seen)
+                    changed += bool(fields)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+        return changed
+
+    def current_rows(self, keys, chunk_size=500):
+        """
+        Devolve {ID: {campo: valor}} das linhas atuais dos IDs pedidos. Deve ser
+        chamado com o lock.
+        """
+        rows = {}
+        columns = ", ".join(TRACKED_FIELDS)
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start : start + chunk_size]
+            placeholders = ", ".join("?" * len(chunk))
+            for key, *values in self.conn.execute(
+                f"SELECT listing_id, {columns} FROM listings "
+                f"WHERE listing_id IN ({placeholders})",
+                chunk,
+            ):
+                rows[key] = dict(zip(TRACKED_FIELDS, values))
+        return rows
+
+    def insert(self, key, car, seen):
+        """ Guarda um anúncio novo. Deve ser chamado com o lock. """
+        columns = ", ".join(("listing_id",) + Car.FIELDS + ("first_seen", "last_seen"))
+        placeholders = ", ".join("?" * (len(Car.FIELDS) + 3))
+        self.conn.execute(
+            f"INSERT INTO listings ({columns}) VALUES ({placeholders})",
+            (key, *(getattr(car, field) for field in Car.FIELDS), seen, seen),
+        )
+
+    def update(self, key, car, fields, seen):
+        """
+        Atualiza a linha atual com os campos alterados e regista a alteração. Deve ser
+        chamado com o lock.
+        """
+        assignments = "".join(f"{field} = ?, " for field in fields)
+        self.conn.execute(
+            f"UPDATE listings SET {assignments}url = ?, last_seen = ? "
+            "WHERE listing_id = ?",
+            (*(new for _, new in fields.values()), car.url, seen, key),
+        )
+        if fields:
+            self.conn.execute(
+                "INSERT INTO changes (listing_id, seen, fields) VALUES (?, ?, ?)",
+                (key, seen, json.dumps(fields, ensure_ascii=False)),
+            )
+
+    def history(self, url):
+        """
+        Devolve as alterações de um anúncio (URL ou ID), da mais antiga para a mais
+        recente, como uma lista de (data, {campo: [antigo, novo]}).
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT seen, fields FROM changes WHERE listing_id = ? ORDER BY seen",
+                (listing_id(url),),
+            ).fetchall()
+        return [(seen, json.loads(fields)) for seen, fields in rows]
+
+    def price_drops(self, since=None):
+        """
+        Devolve as descidas de preço (desde a data `since`, em segundos desde a época)
+        como uma lista de (ID, data, preço antigo, preço novo), da mais recente para
+        a mais antiga.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT listing_id, seen, json_extract(fields, '$.price[0]'), "
+                "json_extract(fields, '$.price[1]') FROM changes "
+                "WHERE json_extract(fields, '$.price[1]') < "
+                "json_extract(fields, '$.price[0]') AND seen >= ? ORDER BY seen DESC",
+                (since or 0,),
+            ).fetchall()
+        return rows
@@ -0,0 +1,118 @@
+# scraping/rate_controller.py
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class HostState:
+    """
+    Estado do controlo adaptativo de um host: ritmo atual e latências observadas.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.latency = None  # média móvel exponencial do tempo de resposta
+        self.baseline = None  # latência de referência (servidor sem carga)
+        self.last_decrease = 0.0
+
+
+class AdaptiveRateController:
+    """
+    Ajusta o ritmo de pedidos de cada host segundo a regra AIMD (aumento aditivo,
+    redução multiplicativa), a partir das respostas vistas pelo HTMLFetcher.
+
+    Enquanto as respostas são saudáveis, o ritmo sobe `increase` pedidos/s por cada
+    segundo de tráfego. Uma resposta 429/503, um erro de rede ou uma latência média
+    acima de `latency_factor` vezes a latência de referência multiplica o ritmo por
+    `decrease`. Depois de uma redução, as seguintes são ignoradas durante `cooldown`
+    segundos, para que uma única rajada de erros conte como um só evento.
+    """
+
+    THROTTLE_STATUS_CODES = (429, 503)
+
+    def __init__(
+        self,
+        rate_limiter,
+        min_rate=0.1,
+        max_rate=4.0,
+        increase=0.05,
+        decrease=0.5,
+        latency_factor=2.0,
+        cooldown=5.0,
+        smoothing=0.2,
+    ):
+        self.rate_limiter = rate_limiter
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+        self.states = {}
+        self.lock = threading.Lock()
+
+    def record(self, url, status_code, elapsed):
+        """
+        Regista o resultado de um pedido. `status_code` é None em erros de rede.
+        """
+        host = urlsplit(url).netloc
+        with self.lock:
+            state = self.states.get(host)
+            if state is None:
+                state = HostState(self.rate_limiter.host_rate(host))
+                self.states[host] = state
+
+            if status_code is None or status_code in self.THROTTLE_STATUS_CODES:
+                self.reduce(host, state, f"resposta {status_code or 'sem resposta'}")
+                return
+
+            self.update_latency(state, elapsed)
+            if state.latency > state.baseline * self.latency_factor:
+                self.reduce(host, state, f"latência {state.latency:.2f}s")
+            elif status_code < 400:
+                # Aumento aditivo: +increase pedidos/s por cada segundo de tráfego,
+                # repartido pelas `rate` respostas recebidas nesse segundo.
+                state.rate = min(
+                    self.max_rate, state.rate + self.increase / max(state.rate, 1e-6)
+                )
+                self.rate_limiter.set_host_rate(host, state.rate)
+
+    def reset_rates(self, rate):
+        """
+        Repõe o ritmo de todos os hosts em `rate` (ex.: RateLimit alterado no
+        config.txt), mantendo as latências observadas. Sem isto, a resposta seguinte
+        voltaria a aplicar ao RateLimiter o ritmo adaptado antes da alteração.
+        """
+        with self.lock:
+            for host, state in self.states.items():
+                state.rate = rate
+                self.rate_limiter.set_host_rate(host, rate)
+
+    def update_latency(self, state, elapsed):
+        """
+        Atualiza a média móvel da latência e a latência de referência do host.
+        A referência acompanha a menor média vista, mas sobe lentamente para se
+        adaptar a mudanças permanentes no servidor.
+        """
+        if state.latency is None:
+            state.latency = state.baseline = elapsed
+            return
+        state.latency += self.smoothing * (elapsed - state.latency)
+        if state.latency < state.baseline:
+            state.baseline = state.latency
+        else:
+            state.baseline += 0.01 * (state.latency - state.baseline)
+
+    def reduce(self, host, state, reason):
+        """
+        Redução multiplicativa do ritmo, no máximo uma vez por período de cooldown.
+        """
+        now = time.monotonic()
+        if now - state.last_decrease < self.cooldown or state.rate <= self.min_rate:
+            return
+        state.last_decrease = now
+        state.rate = max(self.min_rate, state.rate * self.decrease)
+        self.rate_limiter.set_host_rate(host, state.rate)
+        print(f"Ritmo reduzido para {state.rate:.2f} pedidos/s em {host} ({reason}).")
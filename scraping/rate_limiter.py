@@ -0,0 +1,122 @@
+# scraping/rate_limiter.py
+
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Balde de tokens: permite em média `rate` pedidos por segundo, com rajadas
+    de até `burst` pedidos seguidos quando o balde está cheio.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        """
+        Acumula os tokens ganhos desde a última atualização, até ao limite da rajada.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def set_rate(self, rate):
+        """
+        Altera o ritmo, contabilizando primeiro os tokens ganhos com o ritmo anterior.
+        """
+        self.refill(time.monotonic())
+        self.rate = rate
+
+    def reserve(self):
+        """
+        Reserva um token e devolve o número de segundos a esperar até poder usá-lo.
+        O saldo pode ficar negativo: cada pedido em espera fica com a sua vez marcada.
+        """
+        self.refill(time.monotonic())
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class RateLimiter:
+    """
+    Limitador de pedidos por host (ex.: "2 pedidos/s para www.standvirtual.com").
+
+    Cada host tem o seu próprio TokenBucket. A reserva é protegida por um lock, pelo
+    que o mesmo limitador pode ser partilhado entre threads e o ciclo de eventos.
+    Um ritmo <= 0 desativa o limite.
+    """
+
+    def __init__(self, rate=1.0, burst=1):
+        self.rate = rate
+        self.burst = max(1, int(burst))
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def configure(self, rate, burst=None):
+        """
+        Altera o ritmo (e opcionalmente a rajada) de todos os hosts.
+        """
+        with self.lock:
+            self.rate = rate
+            if burst is not None:
+                self.burst = max(1, int(burst))
+            for bucket in self.buckets.values():
+                bucket.set_rate(self.rate)
+                bucket.burst = self.burst
+
+    def bucket(self, host):
+        """
+        Devolve o balde do host, criando-o se necessário. Deve ser chamado com o lock.
+        """
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = self.buckets[host] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def host_rate(self, host):
+        """
+        Devolve o ritmo atual (pedidos por segundo) de um host.
+        """
+        with self.lock:
+            bucket = self.buckets.get(host)
+            return bucket.rate if bucket else self.rate
+
+    def set_host_rate(self, host, rate):
+        """
+        Altera o ritmo de um único host (usado pelo AdaptiveRateController).
+        """
+        with self.lock:
+            self.bucket(host).set_rate(rate)
+
+    def reserve(self, url):
+        """
+        Reserva um pedido para o host da URL e devolve o tempo de espera em segundos.
+        """
+        if self.rate <= 0:
+            return 0.0
+        host = urlsplit(url).netloc
+        with self.lock:
+            return self.bucket(host).reserve()
+
+    def acquire(self, url):
+        """
+        Bloqueia a thread atual até o pedido para a URL ser permitido.
+        """
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, url):
+        """
+        Versão assíncrona de acquire: espera sem bloquear o ciclo de eventos.
+        """
+        delay = self.reserve(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
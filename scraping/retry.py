@@ -0,0 +1,167 @@
+# scraping/retry.py
+
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class RetryableError(Exception):
+    """
+    Erro transitório de um pedido (timeout, ligação, 5xx, 429) que pode ser repetido.
+    """
+
+    def __init__(self, reason, retry_after=None):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class RetryPolicy:
+    """
+    Política de repetição de pedidos com backoff exponencial e jitter.
+
+    O atraso antes da tentativa n é aleatório entre 0 e min(max_delay, base_delay * 2^(n-1))
+    ("full jitter"), para que vários pedidos falhados não voltem todos ao mesmo tempo.
+    O orçamento limita as repetições a `budget_ratio` dos pedidos feitos (mais uma
+    reserva inicial de `min_retries`), evitando multiplicar a carga num servidor em baixo.
+    """
+
+    def __init__(
+        self, max_retries=3, base_delay=1.0, max_delay=30.0, budget_ratio=0.2, min_retries=10
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+        self.lock = threading.Lock()
+
+    def record_request(self):
+        """ Regista um novo pedido (não conta as repetições). """
+        with self.lock:
+            self.requests += 1
+
+    def allow_retry(self, attempt):
+        """
+        Indica se a tentativa `attempt` (1 = primeira) pode ser repetida, consumindo
+        uma unidade do orçamento de repetições.
+        """
+        if attempt > self.max_retries:
+            return False
+        with self.lock:
+            if self.retries >= self.min_retries + self.budget_ratio * self.requests:
+                return False
+            self.retries += 1
+            return True
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        Devolve o atraso em segundos antes de repetir a tentativa `attempt`.
+        Um cabeçalho Retry-After do servidor é respeitado como valor mínimo.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+class CircuitState:
+    """
+    Estado do circuito de um host.
+    """
+
+    def __init__(self):
+        self.failures = 0
+        self.open_until = 0.0
+        self.recovery_time = None
+        self.probing = False
+
+
+class CircuitBreaker:
+    """
+    Disjuntor por host. Depois de `failure_threshold` falhas seguidas o circuito abre e
+    os pedidos para esse host esperam `recovery_time` segundos, pausando a recolha em vez
+    de gastar páginas que iriam falhar. Findo o tempo, um único pedido de teste decide:
+    se tiver sucesso o circuito fecha; se falhar volta a abrir, com o dobro do tempo
+    (até `max_recovery_time`).
+    """
+
+    PROBE_INTERVAL = 1.0
+
+    def __init__(self, failure_threshold=5, recovery_time=30.0, max_recovery_time=600.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.max_recovery_time = max_recovery_time
+        self.states = {}
+        self.lock = threading.Lock()
+
+    def state(self, url):
+        """ Devolve o estado do host da URL. Deve ser chamado com o lock. """
+        host = urlsplit(url).netloc
+        state = self.states.get(host)
+        if state is None:
+            state = self.states[host] = CircuitState()
+        return state
+
+    def wait_time(self, url, owner=None):
+        """
+        Devolve quantos segundos esperar antes de pedir a URL (0 se pode avançar).
+        Com o circuito aberto e o tempo esgotado, o primeiro a chamar faz o pedido de teste,
+        identificado por `owner` (ver release_probe).
+        """
+        with self.lock:
+            state = self.state(url)
+            if state.failures < self.failure_threshold:
+                return 0.0
+            remaining = state.open_until - time.monotonic()
+            if remaining > 0:
+                return remaining
+            if state.probing:
+                return self.PROBE_INTERVAL
+            state.probing = owner if owner is not None else True
+            return 0.0
+
+    def release_probe(self, url, owner):
+        """
+        Liberta o pedido de teste de `owner`, se ainda estiver em curso. Deve ser chamado
+        no fim de cada pedido: um teste que termine sem registar sucesso nem falha (erro
+        não transitório, cancelamento) deixa assim outro pedido fazer o teste, em vez de
+        bloquear o host.
+        """
+        with self.lock:
+            state = self.state(url)
+            if state.probing is owner:
+                state.probing = False
+
+    def record_success(self, url):
+        """ Regista um pedido bem-sucedido e fecha o circuito. """
+        with self.lock:
+            state = self.state(url)
+            if state.failures >= self.failure_threshold:
+                print(f"Servidor {urlsplit(url).netloc} disponível. A retomar a recolha.")
+            state.failures = 0
+            state.recovery_time = None
+            state.probing = False
+
+    def record_failure(self, url):
+        """ Regista uma falha; abre (ou reabre) o circuito quando atinge o limite. """
+        with self.lock:
+            state = self.state(url)
+            state.failures += 1
+            if state.failures < self.failure_threshold:
+                return
+            if state.probing or state.recovery_time is None:
+                if state.recovery_time is None:
+                    state.recovery_time = self.recovery_time
+                else:
+                    state.recovery_time = min(
+                        self.max_recovery_time, state.recovery_time * 2
+                    )
+                state.open_until = time.monotonic() + state.recovery_time
+                state.probing = False
+                print(
+                    f"Servidor {urlsplit(url).netloc} indisponível. "
+                    f"A pausar a recolha durante {state.recovery_time:.0f}s."
+                )
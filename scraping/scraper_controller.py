@@ -1,12 +1,18 @@
 # scraping/scraper_controller.py
 
+from .car import Car
+from .config import get_config
 from .html_fetcher import HTMLFetcher
-from .data_parser import DataParser
+from .data_parser import DataParser, init_parse_worker, parse_item_text_worker
 from .data_exporter import DataExporter
+from .rate_controller import AdaptiveRateController
+from .checkpoint import CrawlCheckpoint
 
-import os
-import time
-import random
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 
 
 class ScraperController:
@@ -17,67 +23,127 @@ class ScraperController:
     analisar e exportar dados de automóveis de uma página web.
     """
 
-    def __init__(self):
-        self.html_fetcher = HTMLFetcher()
-        self.data_parser = DataParser()
-        self.data_exporter = DataExporter()
+    def __init__(self, config=None, data_exporter=None):
+        """
+        Inicializa o controlador com a configuração partilhada (ou `config`, um Config)
+        e um DataExporter para data_collected/cars.csv (ou `data_exporter`).
+        """
+        self.config = config or get_config()
+        self.config_version = self.config.version
+        self.html_fetcher = HTMLFetcher(self.config)
+        self.data_parser = DataParser(self.config)
+        self.data_exporter = data_exporter or DataExporter(config=self.config)
         self.interrupted = False
-        self.baseurl = self.load_base_url()
-
-    def load_base_url(self):
-        """ Carrega a URL base do arquivo de configuração. """
-        default_url = "https://www.standvirtual.com/carros?page="
-        config_path = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)), "config", "config.txt"
-        )
-        try:
-            with open(config_path, "r") as config_file:
-                for line in config_file:
-                    if line.startswith("BaseURL:"):
-                        return line.split(":", 1)[1].strip()
-        except FileNotFoundError:
-            print(
-                f"Arquivo config.txt não encontrado em {config_path}. Usando URL base padrão."
-            )
-        return default_url
+        self._loop = None
+        self._crawl_task = None
+        self.rate_controller = None
+        self.known_listings = None
+        self.checkpoint = None
+        self.pending_items = {}
+        self.item_pages = {}
+        # Protege pending_items e item_pages, alterados no ciclo de eventos e na
+        # thread de escrita do DataExporter (items_flushed)
+        self.pages_lock = threading.Lock()
+        # Versão da configuração copiada para o pool de processos da análise
+        self.parse_pool_version = None
+        self.data_exporter.flush_observers.append(self.items_flushed)
+        self.fast_mode = False
+        self.baseurl = self.config["BaseURL"]
 
-    def random_sleep(self, min_duration, max_duration):
+    def refresh_config(self):
         """
-        Pausa a execução por um período aleatório entre min_duration e max_duration.
-        Ajuda a evitar bloqueios ao fazer muitas requisições rápidas a um site.
+        Volta a ler o config.txt se foi alterado (ou guardado pela interface gráfica)
+        e aplica os novos valores à recolha em curso: seletores, URL base, User-Agent,
+        limite de pedidos, ritmo adaptativo, repetições e disjuntor.
         """
-        time.sleep(random.uniform(min_duration, max_duration))
+        self.config.check_reload()
+        if self.config.version == self.config_version:
+            return
+        self.config_version = self.config.version
+        self.baseurl = self.config["BaseURL"]
+        self.data_parser.load_selectors(self.config)
+        configured_rate = self.html_fetcher.configured_rate
+        self.html_fetcher.apply_config()
+        if self.rate_controller is not None:
+            rate = self.html_fetcher.rate_limiter.rate
+            self.rate_controller.min_rate = min(self.config["MinRate"], rate)
+            self.rate_controller.max_rate = max(self.config["MaxRate"], rate)
+            self.rate_controller.increase = self.config["RateIncrease"]
+            self.rate_controller.decrease = self.config["RateDecrease"]
+            if self.html_fetcher.configured_rate != configured_rate:
+                self.rate_controller.reset_rates(rate)
+        print("Configuração recarregada.")
 
-    def run(self, start_page=1, end_page=1, min_sleep=3, max_sleep=6):
+    def run(
+        self,
+        start_page=1,
+        end_page=1,
+        rate=None,
+        burst=None,
+        concurrency=1,
+        lookahead=None,
+        incremental=False,
+        resume=False,
+        parse_workers=None,
+        write_workers=None,
+        queue_size=None,
+        parse_processes=None,
+        fast_mode=False,
+    ):
         """
         Executa o processo de scraping, recolhendo dados de automóveis de várias páginas.
-        """
-        try:
-            for n in range(start_page, end_page + 1):
-                if self.interrupted:
-                    break
-                print(f"Recolhendo página nº: {n}")
 
-                page_url = self.baseurl + str(n)
-                html = self.html_fetcher.get_html(page_url)
-                if not html:
-                    print(f"Não foi possível obter o HTML para a página: {page_url}")
-                    continue
+        O ritmo de pedidos é controlado pelo RateLimiter do HTMLFetcher: `rate` pedidos
+        por segundo por host, com rajadas até `burst`. Sem valores, usa os do config.txt.
+        A recolha corre em pipeline (ver crawl_async): `concurrency` pedidos de páginas
+        de automóveis em simultâneo, `parse_workers` threads de análise e `write_workers`
+        threads de escrita, com filas de `queue_size` itens entre etapas. Até `lookahead`
+        páginas de pesquisa são obtidas antecipadamente, em paralelo com os automóveis.
+        Com parse_processes=True, a análise usa `parse_workers` processos em vez de
+        threads, para aproveitar vários núcleos em recolhas com muitos pedidos.
+        Com fast_mode=True, os dados são lidos dos cartões das páginas de pesquisa e a
+        página do automóvel só é pedida quando o cartão não tem todos os campos.
+        Com incremental=True, os anúncios que já estão no CSV não são pedidos.
+        O progresso fica registado num diário (data_collected/checkpoint.log); com
+        resume=True, as páginas e automóveis já concluídos nesse diário são saltados.
+        Os parâmetros do pipeline sem valor usam os do config.txt (Lookahead,
+        ParseWorkers, WriteWorkers, QueueSize e ParseProcesses).
+        """
+        config = self.config
+        lookahead = config["Lookahead"] if lookahead is None else lookahead
+        parse_workers = config["ParseWorkers"] if parse_workers is None else parse_workers
+        write_workers = config["WriteWorkers"] if write_workers is None else write_workers
+        queue_size = config["QueueSize"] if queue_size is None else queue_size
+        if parse_processes is None:
+            parse_processes = config["ParseProcesses"]
+        if rate is not None:
+            self.html_fetcher.rate_limiter.configure(rate, burst)
+        self.enable_adaptive_rate()
+        self.fast_mode = fast_mode
+        if incremental:
+            self.load_known_listings()
+        self.checkpoint = CrawlCheckpoint(
+            self.data_exporter.csv_filename.parent / "checkpoint.log", resume=resume
+        )
+        if resume:
+            print(
+                f"A retomar: {len(self.checkpoint.pages)} páginas e "
+                f"{len(self.checkpoint.items)} automóveis já concluídos."
+            )
 
-                cars_urls = self.data_parser.parse_search_page(html)
-                for url in cars_urls:
-                    if self.interrupted:
-                        break
-                    print(url)
-                    html = self.html_fetcher.get_html(url)
-                    if not html:
-                        continue
-
-                    car_data = self.data_parser.parse_item_page(html)
-                    if car_data:
-                        car_data["url"] = url
-                        self.data_exporter.append_to_csv(car_data)
-                        self.random_sleep(min_sleep, max_sleep)
+        try:
+            asyncio.run(
+                self.crawl_async(
+                    start_page,
+                    end_page,
+                    concurrency,
+                    lookahead,
+                    parse_workers,
+                    write_workers,
+                    queue_size,
+                    parse_processes,
+                )
+            )
 
             if self.interrupted:
                 self.status_message = (
@@ -85,23 +151,321 @@ class ScraperController:
                 )
             else:
                 self.status_message = "Recolha concluída com sucesso."
+        except asyncio.CancelledError:
+            self.status_message = (
+                "Recolha cancelada pelo utilizador & dados guardados com sucesso."
+            )
         except Exception as e:
             self.status_message = f"Erro na recolha: {e}"
 
         finally:
-            self.data_exporter.remove_duplicates()
-            self.data_exporter.convert_csv_to_json()
+            self.html_fetcher.close()
+            self.data_exporter.close()
+            self.checkpoint.close()
             if self.interrupted:
                 print("Recolha cancelada, dados guardados.")
             else:
                 print("Recolha concluída, dados guardados.")
             return self.status_message
 
+    def enable_adaptive_rate(self):
+        """
+        Liga o AdaptiveRateController ao HTMLFetcher, se ativo no config.txt. O ritmo
+        inicial é o do RateLimiter e nunca desce abaixo de MinRate nem sobe acima de
+        MaxRate (ou do ritmo inicial, se for maior).
+        """
+        settings = self.config
+        rate_limiter = self.html_fetcher.rate_limiter
+        if not settings["AdaptiveRate"] or rate_limiter.rate <= 0:
+            return
+        self.rate_controller = AdaptiveRateController(
+            rate_limiter,
+            min_rate=min(settings["MinRate"], rate_limiter.rate),
+            max_rate=max(settings["MaxRate"], rate_limiter.rate),
+            increase=settings["RateIncrease"],
+            decrease=settings["RateDecrease"],
+        )
+        self.html_fetcher.response_observers.append(self.rate_controller.record)
+
+    def load_known_listings(self):
+        """
+        Usa o índice dos anúncios já recolhidos do DataExporter (IDs das URLs do CSV),
+        que também recebe os novos anúncios à medida que são exportados.
+        """
+        self.known_listings = self.data_exporter.index
+        print(f"Recolha incremental: {len(self.known_listings)} anúncios já recolhidos.")
+
+    def filter_known(self, cards):
+        """
+        Remove da lista os anúncios já recolhidos: os do CSV (em modo incremental) e
+        os já registados no diário da recolha (ao retomar).
+        """
+        new_cards = [
+            card
+            for card in cards
+            if not self.checkpoint.item_done(card.url)
+            and (self.known_listings is None or card.url not in self.known_listings)
+        ]
+        skipped = len(cards) - len(new_cards)
+        if skipped:
+            print(f"{skipped} anúncios já recolhidos ignorados.")
+        return new_cards
+
+    async def discover_page_async(self, n):
+        """
+        Obtém a página de pesquisa nº n e devolve a lista dos automóveis por recolher,
+        ou None se a página não puder ser obtida. Cada automóvel é um Car com a URL e,
+        em modo rápido, os restantes campos lidos do cartão de pesquisa.
+        """
+        print(f"Recolhendo página nº: {n}")
+        self.refresh_config()
+        page_url = self.baseurl + str(n)
+        html = await self.html_fetcher.get_html_async(page_url)
+        if not html:
+            print(f"Não foi possível obter o HTML para a página: {page_url}")
+            return None
+        if self.fast_mode:
+            cards = list(self.data_parser.parse_search_cards(html))
+        else:
+            cards = [Car(url=url) for url in self.data_parser.parse_search_page(html)]
+        return self.filter_known(cards)
+
+    def begin_page(self, n, cards):
+        """
+        Começa a contagem dos automóveis pendentes da página n. Uma página sem
+        automóveis por recolher fica de imediato concluída no diário.
+        """
+        if cards:
+            with self.pages_lock:
+                self.pending_items[n] = len(cards)
+        else:
+            self.checkpoint.mark_page(n)
+
+    def finish_item(self, n):
+        """
+        Conta um automóvel escrito no CSV da página n e, quando todos os automóveis da
+        página foram escritos, regista a página no diário. Deve ser chamado com o
+        pages_lock.
+        """
+        self.pending_items[n] -= 1
+        if self.pending_items[n] == 0:
+            del self.pending_items[n]
+            self.checkpoint.mark_page(n)
+
+    async def prefetch_pages_async(self, start_page, end_page, pages):
+        """
+        Etapa de pré-carregamento: obtém as páginas de pesquisa seguintes enquanto os
+        automóveis das anteriores são processados. A fila limitada `pages` define
+        quantas páginas podem ser lidas antecipadamente; None marca o fim.
+        """
+        try:
+            for n in range(start_page, end_page + 1):
+                if self.interrupted:
+                    break
+                if self.checkpoint.page_done(n):
+                    print(f"Página nº {n} já recolhida.")
+                    continue
+                cards = await self.discover_page_async(n)
+                if cards is not None:
+                    await pages.put((n, cards))
+        except Exception as e:
+            print(f"Erro ao obter páginas de pesquisa: {e}")
+        await pages.put(None)
+
+    async def dispatch_pages(self, pages, fetch_queue, write_queue):
+        """
+        Etapa de distribuição: retira as páginas de pesquisa pré-carregadas e coloca
+        cada automóvel na fila de obtenção. Em modo rápido, os cartões completos vão
+        diretamente para a fila de escrita, sem pedir a página do automóvel.
+        """
+        while (page := await pages.get()) is not None:
+            n, cards = page
+            self.begin_page(n, cards)
+            for card in cards:
+                if self.interrupted:
+                    break
+                if self.fast_mode and self.data_parser.card_is_complete(card):
+                    await write_queue.put((n, card.url, card))
+                else:
+                    await fetch_queue.put((n, card.url))
+        await fetch_queue.put(None)
+
+    async def run_stage(self, workers, inbox, outbox, handler):
+        """
+        Executa uma etapa do pipeline com `workers` tarefas. Cada tarefa retira itens de
+        `inbox`, aplica `handler` e coloca o resultado (se não for None) em `outbox`.
+        O fim da entrada é sinalizado com None, que é reposto para as restantes tarefas
+        e passado a `outbox` quando todas terminam.
+        """
+
+        async def worker():
+            while (item := await inbox.get()) is not None:
+                try:
+                    result = await handler(item)
+                except Exception as e:
+                    print(f"Erro ao processar {item[1]}: {e}")
+                    continue
+                if result is not None and outbox is not None:
+                    await outbox.put(result)
+            await inbox.put(None)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        if outbox is not None:
+            await outbox.put(None)
+
+    async def fetch_item(self, item):
+        """
+        Etapa de obtenção: descarrega a página de um automóvel, terminando a
+        transferência logo que os detalhes necessários tenham chegado.
+        """
+        n, url = item
+        if self.interrupted:
+            return None
+        print(url)
+        text = await self.html_fetcher.fetch_text_async(
+            url, until=self.data_parser.item_stream_check
+        )
+        return None if text is None else (n, url, text)
+
+    def create_parse_executor(self, workers, processes):
+        """
+        Cria o executor da etapa de análise: um pool de threads ou, com processes=True,
+        um pool de processos. Cada processo recebe uma cópia do DataParser uma única vez
+        e devolve registos Car compactos, pelo que só o texto da página e o resultado
+        atravessam a fronteira entre processos (ver parse_item depois de recarregar o
+        config.txt).
+        """
+        if not processes:
+            return ThreadPoolExecutor(workers, thread_name_prefix="parse")
+        self.parse_pool_version = self.config_version
+        # "spawn" evita herdar as threads e ligações abertas do processo principal.
+        return ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_parse_worker,
+            initargs=(self.data_parser,),
+        )
+
+    async def parse_item(self, executor, item):
+        """
+        Etapa de análise: extrai os dados do automóvel no `executor` (threads ou
+        processos), fora do ciclo de eventos. Depois de o config.txt ser recarregado,
+        cada pedido ao pool de processos leva o DataParser com os novos seletores.
+        """
+        n, url, text = item
+        if isinstance(executor, ProcessPoolExecutor):
+            parse = parse_item_text_worker
+            if self.config_version != self.parse_pool_version:
+                parse = partial(parse_item_text_worker, parser=self.data_parser)
+        else:
+            parse = self.data_parser.parse_item_text
+        car = await self._loop.run_in_executor(executor, parse, text)
+        return (n, url, car) if car else None
+
+    async def write_item(self, executor, item):
+        """
+        Etapa de escrita: entrega o automóvel ao DataExporter numa thread do
+        `executor`. O DataExporter escreve-o em diferido em todos os destinos (ver
+        items_flushed) e ignora os anúncios que já estão no CSV.
+        """
+        n, url, car = item
+        car.url = url
+        with self.pages_lock:
+            self.item_pages.setdefault(url, []).append(n)
+        await self._loop.run_in_executor(executor, self.data_exporter.append, car)
+
+    async def crawl_async(
+        self,
+        start_page,
+        end_page,
+        fetch_workers,
+        lookahead,
+        parse_workers,
+        write_workers,
+        queue_size,
+        parse_processes=False,
+    ):
+        """
+        Recolha em pipeline, com etapas independentes ligadas por filas limitadas:
+
+            páginas de pesquisa -> obtenção -> análise -> escrita
+                      |                                   ^
+                      +---------- (modo rápido) ----------+
+
+        As páginas de pesquisa são pré-carregadas (até `lookahead`), a obtenção usa
+        `fetch_workers` pedidos em simultâneo, a análise `parse_workers` threads (ou
+        processos, com parse_processes=True) e a escrita `write_workers` threads. Cada
+        fila guarda no máximo `queue_size` itens: se uma etapa se atrasa, as anteriores
+        esperam, e a memória fica limitada.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._crawl_task = asyncio.current_task()
+        pages = asyncio.Queue(maxsize=lookahead)
+        fetch_queue = asyncio.Queue(maxsize=queue_size)
+        parse_queue = asyncio.Queue(maxsize=queue_size)
+        write_queue = asyncio.Queue(maxsize=queue_size)
+        parse_executor = self.create_parse_executor(parse_workers, parse_processes)
+        write_executor = ThreadPoolExecutor(write_workers, thread_name_prefix="write")
+        self.html_fetcher.open_async_client()
+        try:
+            await asyncio.gather(
+                self.prefetch_pages_async(start_page, end_page, pages),
+                self.dispatch_pages(pages, fetch_queue, write_queue),
+                self.run_stage(fetch_workers, fetch_queue, parse_queue, self.fetch_item),
+                self.run_stage(
+                    parse_workers,
+                    parse_queue,
+                    write_queue,
+                    partial(self.parse_item, parse_executor),
+                ),
+                self.run_stage(
+                    write_workers, write_queue, None, partial(self.write_item, write_executor)
+                ),
+            )
+        finally:
+            parse_executor.shutdown(wait=True, cancel_futures=True)
+            write_executor.shutdown(wait=True, cancel_futures=True)
+            await self.html_fetcher.close_async_client()
+            self._loop = None
+            self._crawl_task = None
+
+    def items_flushed(self, cars):
+        """
+        Chamado pelo DataExporter depois de escrever automóveis nos destinos (ou de os
+        ignorar por já lá estarem): só então os automóveis (e as páginas concluídas)
+        são registados no diário da recolha, para que um automóvel ainda na fila de
+        exportação nunca conste como recolhido.
+        """
+        with self.pages_lock:
+            for car in cars:
+                url = car.url
+                self.checkpoint.mark_item(url)
+                pages = self.item_pages.get(url)
+                if pages:
+                    self.finish_item(pages.pop(0))
+                    if not pages:
+                        del self.item_pages[url]
+
     def stop(self):
         """
-        Interrompe o processo de scraping de forma segura.
+        Interrompe o processo de scraping de forma segura. Os automóveis pendentes são
+        escritos pelo `finally` de run(), quando a recolha termina.
         """
         self.interrupted = True
-        self.data_exporter.remove_duplicates()
-        self.data_exporter.convert_csv_to_json()
-        print("Scraping interrompido - dados guardados.")
+        self.cancel_async_crawl()
+        self.html_fetcher.close()
+        print("Scraping interrompido - a guardar os dados.")
+
+    def cancel_async_crawl(self):
+        """
+        Cancela a recolha assíncrona em curso, se existir. Pode ser chamado a partir de
+        outra thread (por exemplo, a da interface gráfica).
+        """
+        loop, task = self._loop, self._crawl_task
+        if loop is None or task is None:
+            return
+        try:
+            loop.call_soon_threadsafe(task.cancel)
+        except RuntimeError:
+            # O ciclo de eventos já terminou entretanto.
+            pass
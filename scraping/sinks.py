@@ -0,0 +1,290 @@
+# scraping/sinks.py
+
+import csv
+import io
+import json
+import os
+from abc import ABC
+
+from .car_store import CarStore
+from .compression import open_append, open_text
+from .parquet_store import ParquetDatasetWriter, import_pyarrow
+from .price_history import PriceHistory
+
+
+def ndjson_line(car):
+    """ Converte um Car numa linha NDJSON, com os valores tipados. """
+    return json.dumps(car.as_dict(), ensure_ascii=False) + "\n"
+
+
+class Sink(ABC):
+    """
+    Classe base dos destinos da exportação (sinks). O DataExporter entrega a cada
+    destino, a partir da sua thread de escrita, os lotes de automóveis (Car) que saem
+    da fila de exportação.
+
+    Atributos de classe:
+        name (str): Nome do destino (ver DataExporter.sink).
+        option (str): Opção booleana do config.txt que o ativa (None: sempre ativo).
+        required (bool): Um erro ao escrever interrompe a escrita do lote, que volta à
+            fila do exportador (True), ou só é mostrado, continuando com os outros
+            destinos (False).
+        receives_skipped (bool): Recebe também os automóveis ignorados por já estarem
+            guardados (duplicados), mas não os sem dados suficientes.
+
+    Para acrescentar um formato basta criar uma subclasse e juntá-la a SINK_TYPES (ou
+    passá-la a DataExporter.add_sink).
+    """
+
+    name = None
+    option = None
+    required = False
+    receives_skipped = False
+
+    @classmethod
+    def create(cls, exporter, config):
+        """
+        Cria o destino para o `exporter`, se a sua opção estiver ativa. Devolve None
+        se estiver desativado.
+        """
+        if cls.option and not config[cls.option]:
+            return None
+        return cls.from_exporter(exporter)
+
+    @classmethod
+    def from_exporter(cls, exporter):
+        # Método abstrato: cria o destino com os caminhos e opções do exportador
+        raise NotImplementedError(
+            "Método abstrato deve ser implementado nas subclasses."
+        )
+
+    def write(self, cars):
+        # Método abstrato: escreve um lote de automóveis
+        raise NotImplementedError(
+            "Método abstrato deve ser implementado nas subclasses."
+        )
+
+    def close(self):
+        """ Fecha o destino; uma escrita seguinte volta a abri-lo. """
+
+
+class TextSink(Sink):
+    """
+    Base dos destinos em arquivo de texto só de acréscimo (comprimido ou não), mantido
+    aberto entre escritas. ExportFsync define a durabilidade: "batch" faz fsync a cada
+    lote, "close" só ao fechar e "off" deixa-a ao sistema operativo.
+    """
+
+    def __init__(self, path, fsync_policy="batch"):
+        self.path = path
+        self.fsync_policy = fsync_policy
+        self.file = None
+
+    def open(self):
+        self.file = open_append(self.path)
+
+    def write(self, cars):
+        if self.file is None:
+            self.open()
+        self.write_cars(cars)
+        self.file.flush()
+        if self.fsync_policy == "batch":
+            os.fsync(self.file.fileno())
+
+    def write_cars(self, cars):
+        # Método abstrato: escreve os automóveis no arquivo aberto
+        raise NotImplementedError(
+            "Método abstrato deve ser implementado nas subclasses."
+        )
+
+    def close(self):
+        if self.file is not None:
+            if self.fsync_policy != "off":
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            self.file.close()
+            self.file = None
+
+
+class CSVSink(TextSink):
+    """ O CSV principal (`cars.csv`), cujas linhas definem o que foi recolhido. """
+
+    name = "csv"
+    required = True
+
+    @classmethod
+    def from_exporter(cls, exporter):
+        return cls(exporter.csv_filename, exporter.fieldnames, exporter.fsync_policy)
+
+    def __init__(self, path, fieldnames, fsync_policy="batch"):
+        super().__init__(path, fsync_policy)
+        self.fieldnames = fieldnames
+        self.writer = None
+
+    def open(self):
+        super().open()
+        self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames)
+
+    def write_cars(self, cars):
+        self.writer.writerows(car.as_dict() for car in cars)
+
+
+class NDJSONSink(TextSink):
+    """
+    O `cars.ndjson` (um objeto JSON por linha), acrescentado em cada lote e nunca
+    reescrito. Depois de uma escrita falhada (ex.: disco cheio), o arquivo deixa de
+    acompanhar o CSV: os lotes seguintes não são escritos e close() volta a criá-lo
+    a partir do CSV (`rebuild`, ver DataExporter.rebuild_ndjson).
+    """
+
+    name = "ndjson"
+
+    @classmethod
+    def from_exporter(cls, exporter):
+        return cls(exporter.ndjson_filename, exporter.fsync_policy, exporter.rebuild_ndjson)
+
+    def __init__(self, path, fsync_policy="batch", rebuild=None):
+        super().__init__(path, fsync_policy)
+        self.rebuild = rebuild
+        self.stale = False
+
+    def write(self, cars):
+        if self.stale:
+            return
+        try:
+            super().write(cars)
+        except Exception:
+            self.stale = self.rebuild is not None
+            raise
+
+    def close(self):
+        if not self.stale:
+            super().close()
+            return
+        if self.file is not None:
+            try:
+                self.file.close()
+            except OSError:
+                pass
+            self.file = None
+        print(f"A reconstruir {self.path} a partir do CSV.")
+        try:
+            self.rebuild()
+        except Exception as e:
+            print(f"Erro ao reconstruir {self.path}: {e}")
+            return
+        self.stale = False
+
+    def open(self):
+        """
+        Se a última linha de um NDJSON sem compressão ficou incompleta (ex.: o programa
+        terminou a meio de uma escrita), começa numa linha nova para não a juntar à
+        seguinte.
+        """
+        if str(self.path).endswith(".ndjson"):
+            raw = open(self.path, "a+b")
+            if raw.tell() > 0:
+                raw.seek(-1, os.SEEK_END)
+                if raw.read(1) != b"\n":
+                    raw.write(b"\n")
+            self.file = io.TextIOWrapper(raw, encoding="utf-8")
+        else:
+            super().open()
+
+    def write_cars(self, cars):
+        self.file.writelines(ndjson_line(car) for car in cars)
+
+
+class SQLiteSink(Sink):
+    """
+    A base SQLite `cars.sqlite` (CarStore), uma transação por lote. Recebe também os
+    anúncios já guardados, para atualizar a sua linha (ex.: um novo preço). Uma base
+    vazia (ex.: a opção acabou de ser ativada) é primeiro preenchida com o CSV.
+    """
+
+    name = "sqlite"
+    option = "ExportSQLite"
+    receives_skipped = True
+
+    @classmethod
+    def from_exporter(cls, exporter):
+        return cls(exporter.sqlite_filename, exporter.csv_filename)
+
+    def __init__(self, path, csv_path=None):
+        self.path = path
+        self.csv_path = csv_path
+        self.store = None
+
+    def write(self, cars):
+        if self.store is None:
+            self.store = CarStore(self.path)
+            if not len(self.store) and self.csv_path is not None:
+                self.fill_from_csv()
+        self.store.upsert(cars)
+
+    def fill_from_csv(self):
+        """ Grava as linhas do CSV numa só transação, lidas uma a uma. """
+        with open_text(self.csv_path) as csv_file:
+            self.store.upsert(csv.DictReader(csv_file))
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+
+class ParquetSink(Sink):
+    """ O dataset Parquet `cars_parquet`, um row group por lote (requer o pyarrow). """
+
+    name = "parquet"
+    option = "ExportParquet"
+
+    @classmethod
+    def from_exporter(cls, exporter):
+        pyarrow = import_pyarrow()
+        if pyarrow is None:
+            print("Pacote 'pyarrow' não instalado. A exportação Parquet fica desativada.")
+            return None
+        return cls(ParquetDatasetWriter(exporter.parquet_dirname, pyarrow))
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+
+    def write(self, cars):
+        self.dataset.write(cars)
+
+    def close(self):
+        self.dataset.close()
+
+
+class HistorySink(Sink):
+    """
+    O histórico `cars_history.sqlite` (PriceHistory). Recebe também os anúncios já
+    guardados, para registar as alterações de preço entre recolhas.
+    """
+
+    name = "history"
+    option = "ExportHistory"
+    receives_skipped = True
+
+    @classmethod
+    def from_exporter(cls, exporter):
+        return cls(exporter.history_filename)
+
+    def __init__(self, path):
+        self.path = path
+        self.history = None
+
+    def write(self, cars):
+        if self.history is None:
+            self.history = PriceHistory(self.path)
+        self.history.record(cars)
+
+    def close(self):
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+
+
+# Destinos criados pelo DataExporter, pela ordem de escrita.
+SINK_TYPES = [CSVSink, NDJSONSink, SQLiteSink, ParquetSink, HistorySink]
@@ -0,0 +1,70 @@
+# tests/__init__.py
+
+import importlib.util
+import tempfile
+import unittest
+from pathlib import Path
+
+from scraping.car import Car
+from scraping.config import Config
+from scraping.data_exporter import DataExporter
+
+# O pacote analysis importa o pandas, o matplotlib e o seaborn
+ANALYSIS_AVAILABLE = all(
+    importlib.util.find_spec(name) for name in ("pandas", "matplotlib", "seaborn")
+)
+
+
+def make_car(i, **fields):
+    """ Automóvel de teste nº i, com a URL "u<i>"; `fields` substitui outros valores. """
+    values = {
+        "brand": "Audi",
+        "price": 1000.0 + i,
+        "fuel": "Diesel",
+        "month": "Maio",
+        "year": 2010,
+        "mileage": 1000 * i,
+        "power": 100,
+        "url": f"u{i}",
+    }
+    values.update(fields)
+    return Car(**values)
+
+
+class TempDirTestCase(unittest.TestCase):
+    """ Base dos testes que usam uma pasta temporária (self.dir), removida no fim. """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+
+
+class ExporterTestCase(TempDirTestCase):
+    """
+    Base dos testes que usam um DataExporter na pasta temporária, com uma
+    configuração que só escreve a cada `batch_size` automóveis ou ao fechar, sem fsync.
+    """
+
+    batch_size = 100
+
+    def exporter_config(self, **options):
+        """ Configuração padrão dos testes, com as opções indicadas. """
+        return dict(
+            Config.DEFAULTS,
+            ExportBatchSize=self.batch_size,
+            ExportFlushInterval=60.0,
+            ExportFsync="off",
+            **options,
+        )
+
+    def make_exporter(self, filename="cars.csv", **options):
+        """ Cria um DataExporter na pasta temporária, fechado no fim do teste. """
+        exporter = DataExporter(
+            str(self.dir / filename), config=self.exporter_config(**options)
+        )
+        self.addCleanup(exporter.close)
+        return exporter
+
+    def car(self, i, **fields):
+        return make_car(i, **fields)
@@ -0,0 +1,67 @@
+# tests/test_car.py
+
+import math
+import pickle
+import unittest
+
+from scraping.car import Car, CarBatch
+
+
+class TestCar(unittest.TestCase):
+    def test_from_dict_converts_types(self):
+        car = Car.from_dict(
+            {
+                "brand": "Audi S3",
+                "price": "17500.0",
+                "fuel": "Gasolina",
+                "month": "Novembro",
+                "year": "2006",
+                "mileage": "279 981 km",
+                "power": "265",
+                "url": "https://www.standvirtual.com/carros/anuncio/audi-s3-ID8PyN1P.html",
+            }
+        )
+        self.assertEqual(car.price, 17500.0)
+        self.assertEqual((car.year, car.mileage, car.power), (2006, 279981, 265))
+
+    def test_from_dict_missing_values(self):
+        car = Car.from_dict({"price": "", "year": None, "fuel": ""})
+        self.assertEqual(car.missing_fields(), list(Car.FIELDS))
+
+    def test_slots(self):
+        car = Car(brand="Audi")
+        self.assertFalse(hasattr(car, "__dict__"))
+        with self.assertRaises(AttributeError):
+            car.colour = "red"
+
+    def test_pickle(self):
+        car = Car("Audi", 17500.0, "Gasolina", "Novembro", 2006, 279981, 265, "u")
+        self.assertEqual(pickle.loads(pickle.dumps(car)), car)
+
+
+class TestCarBatch(unittest.TestCase):
+    def setUp(self):
+        self.cars = [
+            Car("Audi", 17500.0, "Gasolina", "Novembro", 2006, 279981, 265, "a"),
+            Car("Nissan Leaf", 16900.0, "Eléctrico", None, 2018, None, 150, "b"),
+        ]
+        self.batch = CarBatch(self.cars)
+
+    def test_round_trip(self):
+        self.assertEqual(len(self.batch), 2)
+        self.assertEqual(list(self.batch), self.cars)
+
+    def test_columns(self):
+        self.assertEqual(list(self.batch.column("url")), ["a", "b"])
+        mileage = self.batch.column("mileage")
+        self.assertEqual(mileage[0], 279981)
+        self.assertTrue(math.isnan(mileage[1]))
+
+    def test_append_dict(self):
+        self.batch.append({"brand": "VW", "year": "2011", "url": "c"})
+        self.assertEqual(self.batch[2].year, 2011)
+        self.assertIsNone(self.batch[2].price)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+# tests/test_car_store.py
+
+import unittest
+
+from scraping.car import Car
+from scraping.car_store import CarStore
+from tests import ANALYSIS_AVAILABLE, ExporterTestCase, TempDirTestCase
+
+CARS = [
+    Car("Audi A4 2.0 TDI", 15000.0, "Diesel", "Maio", 2015, 120000, 150, "u1"),
+    Car("BMW 320d", 22000.0, "Diesel", "Junho", 2018, 80000, 190, "u2"),
+    Car("Audi A3 Sportback", 9000.0, "Gasolina", "Março", 2010, 200000, 105, "u3"),
+    Car("Renault Zoe", 12000.0, "Eléctrico", None, 2019, 30000, 92, "u4"),
+]
+
+
+class CarStoreTestCase(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.dir / "cars.sqlite"
+        self.store = CarStore(self.path)
+        self.addCleanup(self.store.close)
+        self.store.upsert(CARS)
+
+
+class TestCarStore(CarStoreTestCase):
+    def test_upsert_updates_by_url(self):
+        changed = Car("Audi A4 2.0 TDI", 14000.0, "Diesel", "Maio", 2015, 125000, 150, "u1")
+        self.store.upsert([changed.as_dict(), {"brand": "Sem URL", "price": "1"}])
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(self.store.filter()[0], changed)
+
+    def test_filters(self):
+        def urls(**filters):
+            return [car.url for car in self.store.filter(**filters)]
+
+        self.assertEqual(urls(), ["u1", "u2", "u3", "u4"])
+        self.assertEqual(urls(brand="audi"), ["u1", "u3"])
+        self.assertEqual(urls(min_price=10000, max_year=2018), ["u1", "u2"])
+        self.assertEqual(urls(fuel="Diesel", max_mileage=100000), ["u2"])
+        self.assertEqual(urls(brand="", min_power=None), ["u1", "u2", "u3", "u4"])
+        self.assertEqual(urls(brand="100%"), [])
+
+    def test_range_filters_use_indexes(self):
+        for key, field in (("min_price", "price"), ("max_year", "year"), ("fuel", "fuel")):
+            sql, params = self.store.filter_query(**{key: 1})
+            plan = self.store.conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+            self.assertIn(f"INDEX cars_{field}", " ".join(row[-1] for row in plan))
+
+
+class TestSQLiteExport(ExporterTestCase):
+    def test_exporter_writes_to_store(self):
+        exporter = self.make_exporter("export.csv", ExportSQLite=True)
+        exporter.append_to_csv(CARS[0])
+        exporter.append_to_csv(CARS[1])
+        exporter.close()
+        store = CarStore(exporter.sqlite_filename, readonly=True)
+        try:
+            self.assertEqual(store.filter(), CARS[:2])
+        finally:
+            store.close()
+
+    def test_exporter_fills_and_updates_store(self):
+        # Linha exportada antes de ativar o ExportSQLite
+        exporter = self.make_exporter("export.csv")
+        exporter.append_to_csv(CARS[0])
+        exporter.close()
+        exporter = self.make_exporter("export.csv", ExportSQLite=True)
+        exporter.append_to_csv(CARS[1])
+        exporter.flush()
+        cheaper = Car("BMW 320d", 21000.0, "Diesel", "Junho", 2018, 81000, 190, "u2")
+        self.assertFalse(exporter.append_to_csv(cheaper))
+        # Sem dados suficientes: não chega à base
+        self.assertFalse(exporter.append_to_csv(Car(url="u9")))
+        exporter.close()
+        store = CarStore(exporter.sqlite_filename, readonly=True)
+        try:
+            self.assertEqual(store.filter(), [CARS[0], cheaper])
+        finally:
+            store.close()
+
+
+@unittest.skipUnless(ANALYSIS_AVAILABLE, "pandas/matplotlib/seaborn não instalados")
+class TestSqliteAnalysis(CarStoreTestCase):
+    def test_filter_data_matches_pandas(self):
+        from analysis.data_analysis import DataAnalysisBase
+        from scraping.car import CarBatch
+
+        from_sqlite = DataAnalysisBase(str(self.path))
+        in_memory = DataAnalysisBase(CarBatch(CARS))
+        for filters in (
+            {},
+            {"brand": "audi"},
+            {"min_price": 10000, "max_year": 2018},
+            {"fuel": "Diesel", "min_mileage": 90000},
+        ):
+            with self.subTest(filters=filters):
+                expected = in_memory.filter_data(**filters)
+                actual = from_sqlite.filter_data(**filters)
+                self.assertEqual(list(actual["url"]), list(expected["url"]))
+                self.assertEqual(list(actual["year"]), list(expected["year"]))
+
+    def test_get_data_loads_store(self):
+        from analysis.data_analysis import DataAnalysisBase
+
+        analysis = DataAnalysisBase(str(self.path))
+        self.assertEqual(list(analysis.get_data()["url"]), ["u1", "u2", "u3", "u4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+# tests/test_checkpoint.py
+
+import unittest
+
+from scraping.checkpoint import CrawlCheckpoint
+from tests import TempDirTestCase
+
+
+class TestCrawlCheckpoint(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.dir / "checkpoint.log"
+
+    def open(self, resume):
+        checkpoint = CrawlCheckpoint(self.path, resume=resume)
+        self.addCleanup(checkpoint.close)
+        return checkpoint
+
+    def test_resume_loads_pages_and_items(self):
+        checkpoint = self.open(resume=False)
+        checkpoint.mark_item("u1")
+        checkpoint.mark_page(1)
+        checkpoint.close()
+        checkpoint = self.open(resume=True)
+        self.assertTrue(checkpoint.page_done(1))
+        self.assertTrue(checkpoint.item_done("u1"))
+        self.assertFalse(checkpoint.item_done("u2"))
+
+    def test_truncated_last_line_is_ignored(self):
+        # Paragem abrupta a meio da escrita da última linha
+        self.path.write_text("item\tu1\npage\t1\nitem\tu2", encoding="utf-8")
+        checkpoint = self.open(resume=True)
+        self.assertEqual((checkpoint.pages, checkpoint.items), ({1}, {"u1"}))
+        # A linha incompleta é cortada: a seguinte não fica colada a ela
+        checkpoint.mark_item("u3")
+        checkpoint.close()
+        self.assertEqual(
+            self.path.read_text(encoding="utf-8"), "item\tu1\npage\t1\nitem\tu3\n"
+        )
+
+    def test_invalid_lines_are_ignored(self):
+        self.path.write_text("page\tum\nitem\t\noutro\tx\npage\t2\n", encoding="utf-8")
+        checkpoint = self.open(resume=True)
+        self.assertEqual((checkpoint.pages, checkpoint.items), ({2}, set()))
+
+    def test_resume_appends_and_new_crawl_truncates(self):
+        self.path.write_text("item\tu1\n", encoding="utf-8")
+        checkpoint = self.open(resume=True)
+        checkpoint.mark_item("u2")
+        checkpoint.close()
+        self.assertEqual(
+            self.path.read_text(encoding="utf-8"), "item\tu1\nitem\tu2\n"
+        )
+        checkpoint = self.open(resume=False)
+        self.assertFalse(checkpoint.item_done("u1"))
+        checkpoint.mark_page(3)
+        checkpoint.close()
+        self.assertEqual(self.path.read_text(encoding="utf-8"), "page\t3\n")
+
+    def test_missing_journal_and_writes_after_close(self):
+        checkpoint = self.open(resume=True)
+        self.assertEqual((checkpoint.pages, checkpoint.items), (set(), set()))
+        checkpoint.close()
+        checkpoint.mark_item("u1")
+        self.assertEqual(self.path.read_text(encoding="utf-8"), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+# tests/test_compression.py
+
+import csv
+import gzip
+import importlib.util
+import io
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from scraping.compression import FrameWriter, find_dataset, open_text, strip_suffix
+from tests import ANALYSIS_AVAILABLE, ExporterTestCase
+
+ZSTD_AVAILABLE = importlib.util.find_spec("zstandard") is not None
+
+
+class CompressionTestCase(ExporterTestCase):
+    def exporter(self, compression="gzip"):
+        return self.make_exporter(ExportCompression=compression)
+
+    def read_urls(self, path):
+        with open_text(path) as f:
+            return [row["url"] for row in csv.DictReader(f)]
+
+
+class TestFrameWriter(CompressionTestCase):
+    def check_frames(self, name):
+        path = self.dir / name
+        for text in ("a,b\r\n", "1,2\r\n", "3,4\r\n"):
+            with FrameWriter(path, "gzip" if name.endswith(".gz") else "zstd") as f:
+                f.write(text)
+        with open_text(path) as f:
+            self.assertEqual(f.read(), "a,b\r\n1,2\r\n3,4\r\n")
+
+    def test_gzip_frames(self):
+        self.check_frames("data.csv.gz")
+        with gzip.open(self.dir / "data.csv.gz", "rt", newline="") as f:
+            self.assertEqual(f.read(), "a,b\r\n1,2\r\n3,4\r\n")
+
+    @unittest.skipUnless(ZSTD_AVAILABLE, "zstandard não instalado")
+    def test_zstd_frames(self):
+        self.check_frames("data.csv.zst")
+
+    def test_paths(self):
+        self.assertEqual(strip_suffix("cars.ndjson.gz"), "cars.ndjson")
+        self.assertEqual(strip_suffix("cars.csv"), "cars.csv")
+        path = str(self.dir / "cars.csv")
+        (self.dir / "cars.csv.gz").touch()
+        self.assertEqual(find_dataset(path, None), f"{path}.gz")
+        # Com os dois arquivos, vale o da compressão configurada, e não o que existe
+        (self.dir / "cars.csv").touch()
+        self.assertEqual(find_dataset(path, None), path)
+        self.assertEqual(find_dataset(path, "gzip"), f"{path}.gz")
+
+
+class TestCompressedExport(CompressionTestCase):
+    def test_appends_are_new_frames(self):
+        exporter = self.exporter()
+        exporter.append_to_csv(self.car(1))
+        exporter.close()
+        exporter = self.exporter()
+        self.assertIn("u1", exporter.index)
+        self.assertFalse(exporter.append_to_csv(self.car(1)))
+        exporter.append_to_csv(self.car(2))
+        exporter.close()
+        self.assertEqual(exporter.csv_filename.name, "cars.csv.gz")
+        self.assertEqual(self.read_urls(exporter.csv_filename), ["u1", "u2"])
+        with open_text(exporter.ndjson_filename) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_remove_duplicates(self):
+        exporter = self.exporter()
+        exporter.append_to_csv(self.car(1))
+        exporter.close()
+        with FrameWriter(exporter.csv_filename, "gzip") as f:
+            f.write("Audi,2.0,,,,,,u1\r\n")
+        exporter.remove_duplicates()
+        self.assertEqual(self.read_urls(exporter.csv_filename), ["u1"])
+        self.assertEqual(list(self.dir.glob("tmp_*")), [])
+
+    def test_existing_csv_is_compressed(self):
+        exporter = self.exporter("off")
+        exporter.append_to_csv(self.car(1))
+        exporter.close()
+        with redirect_stdout(io.StringIO()):
+            exporter = self.exporter()
+        self.assertEqual(self.read_urls(exporter.csv_filename), ["u1"])
+        self.assertIn("u1", exporter.index)
+        # Os arquivos sem compressão deixariam de ser atualizados: são removidos
+        self.assertFalse((self.dir / "cars.csv").exists())
+        self.assertFalse((self.dir / "cars.ndjson").exists())
+        exporter.append_to_csv(self.car(2))
+        exporter.close()
+        self.assertEqual(
+            find_dataset(str(self.dir / "cars.csv"), "gzip"), str(exporter.csv_filename)
+        )
+
+    def test_compression_turned_off(self):
+        exporter = self.exporter()
+        exporter.append_to_csv(self.car(1))
+        exporter.close()
+        with redirect_stdout(io.StringIO()):
+            exporter = self.exporter("off")
+        self.assertFalse((self.dir / "cars.csv.gz").exists())
+        self.assertFalse(exporter.append_to_csv(self.car(1)))
+        exporter.append_to_csv(self.car(2))
+        exporter.close()
+        self.assertEqual(self.read_urls(self.dir / "cars.csv"), ["u1", "u2"])
+        with open_text(exporter.ndjson_filename) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_zstd_falls_back_to_gzip(self):
+        output = io.StringIO()
+        with mock.patch("scraping.compression.import_zstandard", return_value=None):
+            with redirect_stdout(output):
+                exporter = self.exporter("zstd")
+        self.assertEqual(exporter.compression, "gzip")
+        self.assertIn("zstandard", output.getvalue())
+
+    @unittest.skipUnless(ANALYSIS_AVAILABLE, "pandas/matplotlib/seaborn não instalados")
+    def test_analysis_reads_compressed_files(self):
+        from analysis.data_analysis import DataAnalysisBase
+
+        exporter = self.exporter()
+        exporter.append_to_csv(self.car(1))
+        exporter.close()
+        exporter.append_to_csv(self.car(2))
+        exporter.close()
+        for path in (exporter.csv_filename, exporter.ndjson_filename):
+            with self.subTest(path=path.name):
+                data = DataAnalysisBase(str(path)).get_data()
+                self.assertEqual(list(data["url"]), ["u1", "u2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# tests/test_config.py
+
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from scraping.config import Config
+from tests import TempDirTestCase
+
+
+class TestConfig(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.dir / "config.txt"
+        self.write(
+            "User-Agent:Test/1.0\n"
+            "RateLimit:2\n"
+            "HTTP2:true\n"
+            "MaxRetries:muitos\n"
+            "StructuredDataSelector:\n"
+            "Custom:valor\n"
+        )
+        with redirect_stdout(StringIO()):
+            self.config = Config(str(self.path))
+
+    def write(self, text, mtime=None):
+        self.path.write_text(text, encoding="utf-8")
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_typed_values_and_defaults(self):
+        self.assertEqual(self.config["User-Agent"], "Test/1.0")
+        self.assertEqual(self.config["RateLimit"], 2.0)
+        self.assertIs(self.config["HTTP2"], True)
+        self.assertEqual(self.config["MaxRetries"], Config.DEFAULTS["MaxRetries"])
+        self.assertEqual(self.config["StructuredDataSelector"], "")
+        self.assertEqual(self.config["CarsSelector"], Config.DEFAULTS["CarsSelector"])
+
+    def test_out_of_range_and_unknown_choices_use_defaults(self):
+        self.write("QueueSize:0\nParseWorkers:0\nExportFsync:bacth\nHTTPCache:of\n")
+        output = StringIO()
+        with redirect_stdout(output):
+            config = Config(str(self.path))
+        for key in ("QueueSize", "ParseWorkers", "ExportFsync", "HTTPCache"):
+            self.assertEqual(config[key], Config.DEFAULTS[key])
+            self.assertIn(f"Valor inválido para {key}", output.getvalue())
+
+    def test_check_reload_on_mtime_change(self):
+        version = self.config.version
+        self.assertFalse(self.config.check_reload())
+        self.write("RateLimit:3\n", mtime=self.config.mtime + 10)
+        self.assertTrue(self.config.check_reload())
+        self.assertEqual(self.config["RateLimit"], 3.0)
+        self.assertEqual(self.config.version, version + 1)
+
+    def test_update_preserves_other_lines(self):
+        self.config.update({"CarsSelector": "h1.novo", "RateBurst": "4"})
+        text = self.path.read_text(encoding="utf-8")
+        self.assertIn("Custom:valor\n", text)
+        self.assertIn("RateLimit:2\n", text)
+        self.assertIn("CarsSelector:h1.novo\n", text)
+        self.assertEqual(self.config["RateBurst"], 4)
+        self.assertFalse(self.config.check_reload())
+        self.assertEqual(os.listdir(self.dir), ["config.txt"])
+
+    def test_update_rejects_invalid_values(self):
+        with self.assertRaises(ValueError):
+            self.config.update({"CarsSelector": " ", "RateBurst": "4"})
+        with self.assertRaises(ValueError):
+            self.config.update({"WriteWorkers": "0"})
+        self.assertEqual(self.config["RateBurst"], Config.DEFAULTS["RateBurst"])
+        self.assertNotIn("RateBurst", self.path.read_text(encoding="utf-8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+# tests/test_data_exporter.py
+
+import csv
+import json
+import time
+import unittest
+
+from scraping.car import Car
+from scraping.data_exporter import DataExporter
+from tests import ExporterTestCase
+
+
+class TestBufferedExport(ExporterTestCase):
+    batch_size = 3
+
+    def setUp(self):
+        super().setUp()
+        self.path = self.dir / "cars.csv"
+        self.exporter = self.make_exporter()
+        self.flushed = []
+        self.exporter.flush_observers.append(self.flushed.extend)
+
+    def rows(self):
+        with self.path.open("r", newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+
+    def wait_for_rows(self, count, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while len(self.flushed) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_rows_are_buffered_until_batch_size(self):
+        self.exporter.append_to_csv(self.car(1))
+        self.exporter.append_to_csv(self.car(2))
+        self.assertEqual(self.rows(), [])
+        self.exporter.append_to_csv(self.car(3))
+        self.wait_for_rows(3)
+        self.assertEqual([row["url"] for row in self.rows()], ["u1", "u2", "u3"])
+        self.assertEqual([car.url for car in self.flushed], ["u1", "u2", "u3"])
+
+    def test_flush_interval(self):
+        self.exporter.flush_interval = 0.05
+        self.exporter.append_to_csv(self.car(1))
+        self.wait_for_rows(1)
+        self.assertEqual(len(self.rows()), 1)
+
+    def test_close_writes_pending_rows(self):
+        self.exporter.append_to_csv(self.car(1))
+        self.exporter.append_to_csv({"brand": "VW", "url": "u2"})
+        self.exporter.close()
+        self.assertEqual([row["url"] for row in self.rows()], ["u1", "u2"])
+        self.assertIsNone(self.exporter.flush_thread)
+
+    def test_duplicates_are_skipped_on_insert(self):
+        self.assertTrue(self.exporter.append_to_csv(self.car(1)))
+        self.assertFalse(self.exporter.append_to_csv(self.car(1)))
+        self.assertFalse(self.exporter.append_to_csv({"url": "u9"}))
+        self.exporter.close()
+        self.assertEqual([row["url"] for row in self.rows()], ["u1"])
+        self.assertEqual(len(self.flushed), 3)
+
+    def test_index_is_rebuilt_from_existing_file(self):
+        url = "https://www.standvirtual.com/carros/anuncio/audi-s3-ID8PyN1P.html"
+        self.exporter.append_to_csv(Car(brand="Audi", price=1.0, url=url))
+        self.exporter.close()
+        exporter = DataExporter(str(self.path), config=self.exporter_config())
+        self.assertIn(url, exporter.index)
+        self.assertFalse(exporter.append_to_csv(Car(brand="Audi", price=2.0, url=url)))
+        exporter.close()
+        self.assertEqual(len(self.rows()), 1)
+
+    def test_remove_duplicates_compacts_old_files(self):
+        with self.path.open("a", newline="", encoding="utf-8") as f:
+            f.write("Audi,1.0,,,,,,u1\nAudi,2.0,,,,,,u1\n,,,,,,,u2\nVW,3.0,,,,,,u3\n")
+        self.exporter.remove_duplicates()
+        self.assertEqual([row["price"] for row in self.rows()], ["1.0", "3.0"])
+        self.assertIn("u3", self.exporter.index)
+        self.assertEqual([row["price"] for row in self.ndjson_rows()], [1.0, 3.0])
+
+    def ndjson_rows(self):
+        with self.path.with_suffix(".ndjson").open("r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_ndjson_is_appended_with_csv(self):
+        self.exporter.append_to_csv(self.car(1))
+        self.exporter.append_to_csv({"brand": "VW", "price": "2500", "year": "2001", "url": "u2"})
+        self.exporter.close()
+        rows = self.ndjson_rows()
+        self.assertEqual(rows[0], self.car(1).as_dict())
+        self.assertEqual((rows[1]["price"], rows[1]["year"], rows[1]["fuel"]), (2500.0, 2001, None))
+        self.exporter.append_to_csv(self.car(3))
+        self.exporter.close()
+        self.assertEqual([row["url"] for row in self.ndjson_rows()], ["u1", "u2", "u3"])
+
+    def test_ndjson_is_created_from_existing_csv(self):
+        self.exporter.append_to_csv(self.car(1))
+        self.exporter.close()
+        self.path.with_suffix(".ndjson").unlink()
+        DataExporter(str(self.path), config=self.exporter_config()).close()
+        self.assertEqual(self.ndjson_rows(), [self.car(1).as_dict()])
+
+    def test_incomplete_ndjson_line_is_not_joined(self):
+        with self.path.with_suffix(".ndjson").open("a", encoding="utf-8") as f:
+            f.write('{"brand": "Au')
+        self.exporter.append_to_csv(self.car(1))
+        self.exporter.close()
+        with self.path.with_suffix(".ndjson").open("r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(json.loads(lines[1]), self.car(1).as_dict())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+# tests/test_data_parser.py
+
+import json
+import multiprocessing
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+from selectolax.parser import HTMLParser
+
+from scraping.car import Car
+from scraping.config import Config
+from scraping import data_parser
+from scraping.data_parser import DataParser
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load_fixture(name):
+    """ Lê uma página guardada em tests/fixtures. """
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+class FixtureTestCase(unittest.TestCase):
+    """
+    Base dos testes: um DataParser com os seletores do config.txt e os resultados
+    esperados de cada página (tests/fixtures/expected.json).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.parser = DataParser()
+        with open(FIXTURES / "expected.json", "r", encoding="utf-8") as f:
+            cls.expected = json.load(f)
+
+
+class TestSearchPage(FixtureTestCase):
+    def setUp(self):
+        self.html = HTMLParser(load_fixture("search_page.html"))
+        self.cards = self.expected["search_page.html"]["cards"]
+
+    def test_parse_search_page_urls(self):
+        urls = list(self.parser.parse_search_page(self.html))
+        self.assertEqual(urls, [card["url"] for card in self.cards])
+
+    def test_parse_search_cards(self):
+        cards = [card.as_dict() for card in self.parser.parse_search_cards(self.html)]
+        self.assertEqual(cards, self.cards)
+
+    def test_card_is_complete(self):
+        complete = [
+            self.parser.card_is_complete(Car.from_dict(card)) for card in self.cards
+        ]
+        self.assertEqual(complete, [card["power"] is not None for card in self.cards])
+
+    def test_parse_search_cards_without_cards_returns_urls(self):
+        self.parser.card_selector = "article.no-such-card"
+        try:
+            cards = list(self.parser.parse_search_cards(self.html))
+        finally:
+            self.parser.card_selector = Config.DEFAULTS["CardSelector"]
+        self.assertEqual(cards, [Car(url=card["url"]) for card in self.cards])
+
+
+class TestItemPage(FixtureTestCase):
+    ITEM_PAGES = ("item_page.html", "item_page_css.html", "item_page_partial.html")
+
+    def test_parse_item_text(self):
+        for name in self.ITEM_PAGES:
+            with self.subTest(page=name):
+                car = self.parser.parse_item_text(load_fixture(name))
+                self.assertEqual(car.as_dict(), self.expected[name]["item"])
+
+    def test_structured_data_is_typed(self):
+        html = HTMLParser(load_fixture("item_page.html"))
+        car_data = self.parser.parse_structured_data(html)
+        self.assertEqual(car_data["year"], 2006)
+        self.assertEqual(car_data["mileage"], 279981)
+        self.assertEqual(car_data["power"], 265)
+        self.assertEqual(car_data["month"], "Novembro")
+
+    def test_structured_data_missing(self):
+        html = HTMLParser(load_fixture("item_page_css.html"))
+        self.assertIsNone(self.parser.parse_structured_data(html))
+
+    def test_css_path_matches_structured_data(self):
+        html = HTMLParser(load_fixture("item_page.html"))
+        structured = self.parser.parse_structured_data(html)
+        css = self.parser.parse_item_css(html)
+        for field, value in structured.items():
+            self.assertEqual(str(css[field]), str(value), field)
+
+    def test_item_text_complete(self):
+        for name in self.ITEM_PAGES:
+            with self.subTest(page=name):
+                text = load_fixture(name)
+                self.assertTrue(self.parser.item_text_complete(text))
+                self.assertFalse(self.parser.item_text_complete(text[:2000]))
+
+    def test_item_text_complete_before_end_of_page(self):
+        text = load_fixture("item_page.html")
+        position = text.find("</h3>", text.find("offer-price__number")) + 5
+        self.assertTrue(self.parser.item_text_complete(text[:position]))
+
+    def stream(self, text, chunk_size=4096):
+        """
+        Passa o texto em blocos por uma ItemStreamCheck. Devolve o tamanho lido até a
+        verificação terminar (None se não terminou) e o número de análises do HTML.
+        """
+        check = self.parser.item_stream_check()
+        with mock.patch.object(
+            data_parser, "HTMLParser", wraps=data_parser.HTMLParser
+        ) as parser:
+            for start in range(0, len(text), chunk_size):
+                if check.feed(text[start : start + chunk_size]) and check.complete():
+                    return start + chunk_size, parser.call_count
+        return None, parser.call_count
+
+    def test_stream_check_stops_early(self):
+        for name in self.ITEM_PAGES:
+            with self.subTest(page=name):
+                text = load_fixture(name)
+                size, parses = self.stream(text)
+                self.assertLess(size, len(text))
+                self.assertLessEqual(parses, 2)
+
+    def test_stream_check_does_not_reparse_incomplete_page(self):
+        # Sem a potência, a página nunca fica completa: analisada uma vez, lida até ao fim
+        text = load_fixture("item_page_css.html").replace(" · 105 cv", "")
+        body_end = text.find("</body>")
+        text = text[:body_end] + "<p>Descrição</p>" * 20000 + text[body_end:]
+        size, parses = self.stream(text)
+        self.assertIsNone(size)
+        self.assertLessEqual(parses, 2)
+
+
+class TestParseWorker(FixtureTestCase):
+    def test_reloaded_parser_reaches_worker_processes(self):
+        text = load_fixture("item_page_css.html")
+        reloaded = DataParser(
+            dict(Config.DEFAULTS, BrandSelector="h1.outro", StructuredDataSelector="")
+        )
+        with ProcessPoolExecutor(
+            1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=data_parser.init_parse_worker,
+            initargs=(self.parser,),
+        ) as executor:
+            worker = data_parser.parse_item_text_worker
+            self.assertIsNotNone(executor.submit(worker, text).result().brand)
+            car = executor.submit(worker, text, parser=reloaded).result()
+            self.assertIsNone(car.brand)
+            # O processo fica com o DataParser recebido
+            self.assertIsNone(executor.submit(worker, text).result().brand)
+
+
+class TestFieldHelpers(FixtureTestCase):
+    def test_parse_others(self):
+        self.assertEqual(
+            self.parser.parse_others("Diesel · Outubro · 2011 · 168 772 km · 105 cv"),
+            ("Diesel", "Outubro", "2011", "168772", "105"),
+        )
+
+    def test_parse_others_partial(self):
+        self.assertEqual(
+            self.parser.parse_others("Eléctrico · Junho"),
+            ("Eléctrico", "Junho", None, None, None),
+        )
+        self.assertEqual(self.parser.parse_others(None), (None,) * 5)
+
+    def test_parse_price(self):
+        self.assertEqual(self.parser.parse_price("17 500 €"), 17500.0)
+        self.assertEqual(self.parser.parse_price("1.234,56 €"), 1234.56)
+        self.assertIsNone(self.parser.parse_price("Preço sob consulta"))
+        self.assertIsNone(self.parser.parse_price(None))
+
+    def test_clean_mileage_and_power(self):
+        self.assertEqual(self.parser.clean_mileage("279 981 km"), "279981")
+        self.assertEqual(self.parser.clean_power("265 cv"), "265")
+
+    def test_parse_registration_date(self):
+        self.assertEqual(self.parser.parse_registration_date("2019-03-01"), ("Março", 2019))
+        self.assertEqual(self.parser.parse_registration_date("2019"), (None, 2019))
+        self.assertEqual(self.parser.parse_registration_date(None), (None, None))
+
+    def test_selector_marker(self):
+        self.assertEqual(
+            self.parser.selector_marker("h3.offer-price__number.eqdspoq4.ooa-o7wv9s"),
+            "offer-price__number",
+        )
+        self.assertEqual(
+            self.parser.selector_marker('script[type="application/ld+json"]'),
+            "application/ld+json",
+        )
+        self.assertEqual(self.parser.selector_marker("article h3"), "<h3")
+
+
+if __name__ == "__main__":
+    unittest.main()
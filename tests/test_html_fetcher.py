@@ -0,0 +1,71 @@
+# tests/test_html_fetcher.py
+
+import asyncio
+import unittest
+from pathlib import Path
+
+import httpx
+
+from scraping.config import Config
+from scraping.data_parser import DataParser
+from scraping.html_fetcher import HTMLFetcher
+
+PAGE = (Path(__file__).parent / "fixtures" / "item_page.html").read_text(encoding="utf-8")
+
+
+class ChunkedBody(httpx.AsyncByteStream):
+    """ Corpo da resposta enviado em blocos de 4 KB. """
+
+    def __init__(self, data):
+        self.data = data
+
+    async def __aiter__(self):
+        for start in range(0, len(self.data), 4096):
+            yield self.data[start : start + 4096]
+
+
+class TestStreamedFetch(unittest.TestCase):
+    def setUp(self):
+        config = dict(
+            Config.DEFAULTS, HTTPCache="off", StreamItems=True, RateLimit=1000.0
+        )
+        self.fetcher = HTMLFetcher(config)
+        self.addCleanup(self.fetcher.close)
+        self.parser = DataParser(config)
+
+    def fetch(self, http_version):
+        def respond(request):
+            return httpx.Response(
+                200,
+                headers={"Content-Type": "text/html; charset=utf-8"},
+                stream=ChunkedBody(PAGE.encode("utf-8")),
+                extensions={"http_version": http_version},
+            )
+
+        async def fetch():
+            self.fetcher.async_client = httpx.AsyncClient(
+                transport=httpx.MockTransport(respond)
+            )
+            try:
+                return await self.fetcher.fetch_text_async(
+                    "https://www.standvirtual.com/carros/anuncio/a.html",
+                    until=self.parser.item_stream_check,
+                )
+            finally:
+                await self.fetcher.close_async_client()
+
+        return asyncio.run(fetch())
+
+    def test_http2_stops_once_details_arrived(self):
+        text = self.fetch(b"HTTP/2")
+        self.assertLess(len(text), len(PAGE))
+        car = self.parser.parse_item_text(text)
+        self.assertEqual(car.missing_fields(DataParser.ITEM_FIELDS), [])
+
+    def test_http11_reads_whole_page(self):
+        # Em HTTP/1.1 terminar mais cedo fecharia a ligação do pool
+        self.assertEqual(self.fetch(b"HTTP/1.1"), PAGE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+# tests/test_http_cache.py
+
+import itertools
+import os
+import unittest
+from unittest import mock
+
+import httpx
+
+from scraping.config import Config
+from scraping.html_fetcher import HTMLFetcher
+from scraping.http_cache import HTTPCache
+from tests import TempDirTestCase
+
+URL = "https://www.standvirtual.com/carros/anuncio/audi-s3-ID8PyN1P.html"
+
+
+def page(size=4096):
+    """ Página de teste: texto aleatório, com tamanhos comprimidos semelhantes. """
+    return os.urandom(size // 2).hex()
+
+
+class TestHTTPCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.dir / "http_cache.sqlite"
+        # Relógio que avança 1s em cada leitura, para ordenar os acessos
+        clock = mock.patch("scraping.http_cache.time")
+        clock.start().time.side_effect = itertools.count()
+        self.addCleanup(clock.stop)
+
+    def open(self, max_size):
+        cache = HTTPCache(self.path, max_size=max_size)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_store_and_get(self):
+        cache = self.open(1024 * 1024)
+        self.assertIsNone(cache.get(URL))
+        cache.store(URL, "<html>á</html>", etag='"v1"', last_modified="Mon, 01 Jan 2024")
+        cached = cache.get(URL)
+        self.assertEqual(cached.text, "<html>á</html>")
+        self.assertEqual(
+            cached.conditional_headers(),
+            {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024"},
+        )
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = self.open(1024 * 1024)
+        for name in ("a", "b", "c"):
+            cache.store(f"{URL}?{name}", page())
+        # Limite com lugar para três páginas; "a" passa a ser a usada mais recentemente
+        cache.max_size = cache.total_size
+        cache.get(f"{URL}?a")
+        cache.store(f"{URL}?d", page())
+        # Remove as menos usadas até ficar abaixo de 90% do limite
+        self.assertIsNone(cache.get(f"{URL}?b"))
+        self.assertIsNone(cache.get(f"{URL}?c"))
+        self.assertIsNotNone(cache.get(f"{URL}?a"))
+        self.assertIsNotNone(cache.get(f"{URL}?d"))
+        self.assertLessEqual(cache.total_size, cache.max_size * 0.9)
+
+    def test_total_size_survives_reopen(self):
+        cache = self.open(1024 * 1024)
+        cache.store(URL, page())
+        cache.store(URL, page())
+        total_size = cache.total_size
+        cache.close()
+        self.assertEqual(self.open(1024 * 1024).total_size, total_size)
+
+
+class TestCachedFetch(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.settings = dict(Config.DEFAULTS, RateLimit=1000.0)
+        self.fetcher = HTMLFetcher(self.settings)
+        self.addCleanup(self.fetcher.close)
+        # A cache fica na pasta temporária, e não em data_collected/
+        self.fetcher.cache = HTTPCache(self.dir / "http_cache.sqlite")
+        self.settings["HTTPCache"] = "revalidate"
+        self.requests = []
+        self.fetcher.client = httpx.Client(transport=httpx.MockTransport(self.respond))
+
+    def respond(self, request):
+        self.requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="<html>v1</html>", headers={"ETag": '"v1"'})
+
+    def test_not_modified_returns_cached_body(self):
+        self.assertEqual(self.fetcher.fetch_text(URL), "<html>v1</html>")
+        self.assertEqual(self.fetcher.fetch_text(URL), "<html>v1</html>")
+        self.assertNotIn("If-None-Match", self.requests[0].headers)
+        self.assertEqual(self.requests[1].headers["If-None-Match"], '"v1"')
+
+    def test_cache_first_skips_the_request(self):
+        self.fetcher.fetch_text(URL)
+        self.settings["HTTPCache"] = "cache-first"
+        self.assertEqual(self.fetcher.fetch_text(URL), "<html>v1</html>")
+        self.assertEqual(len(self.requests), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# tests/test_listing_index.py
+
+import unittest
+
+from scraping.compression import FrameWriter
+from scraping.listing_index import ListingIndex, listing_id
+from tests import TempDirTestCase
+
+URL = "https://www.standvirtual.com/carros/anuncio/audi-s3-2-0-tfsi-quattro-ID8PyN1P.html"
+CSV = (
+    "brand,price,fuel,month,year,mileage,power,url\r\n"
+    f"Audi,1,Diesel,Maio,2010,1000,100,{URL}\r\n"
+    "BMW,2,Diesel,Maio,2010,1000,100,\r\n"
+    "VW,3\r\n"
+    "Seat,4,Diesel,Maio,2010,1000,100,u4\r\n"
+)
+
+
+class TestListingId(unittest.TestCase):
+    def test_listing_id(self):
+        self.assertEqual(listing_id(URL), "ID8PyN1P")
+        self.assertEqual(listing_id(URL + "?page=2"), "ID8PyN1P")
+        self.assertEqual(listing_id("u4"), "u4")
+
+    def test_index_matches_by_id(self):
+        index = ListingIndex()
+        index.add(URL)
+        self.assertIn(URL.replace("audi-s3-2-0-tfsi-quattro", "audi-s3"), index)
+        self.assertNotIn(URL.replace("ID8PyN1P", "ID8PvApr"), index)
+        index.discard(URL.replace("audi-s3-2-0-tfsi-quattro", "audi-s3"))
+        self.assertNotIn(URL, index)
+        index.discard(URL)
+
+
+class TestFromCsv(TempDirTestCase):
+    def test_url_column(self):
+        path = self.dir / "cars.csv"
+        path.write_text(CSV, encoding="utf-8")
+        index = ListingIndex.from_csv(path)
+        # Linhas sem URL (vazia ou em falta) são ignoradas
+        self.assertEqual(index.ids, {"ID8PyN1P", "u4"})
+
+    def test_compressed_csv(self):
+        path = self.dir / "cars.csv.gz"
+        with FrameWriter(path, "gzip") as f:
+            f.write(CSV)
+        self.assertEqual(len(ListingIndex.from_csv(path)), 2)
+
+    def test_missing_file_or_column(self):
+        self.assertEqual(len(ListingIndex.from_csv(self.dir / "cars.csv")), 0)
+        path = self.dir / "other.csv"
+        path.write_text("brand,price\r\nAudi,1\r\n", encoding="utf-8")
+        self.assertEqual(len(ListingIndex.from_csv(path)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
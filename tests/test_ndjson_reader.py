@@ -0,0 +1,59 @@
+# tests/test_ndjson_reader.py
+
+import json
+import unittest
+
+from scraping.car import Car
+from tests import ANALYSIS_AVAILABLE, TempDirTestCase
+
+
+@unittest.skipUnless(ANALYSIS_AVAILABLE, "pandas/matplotlib/seaborn não instalados")
+class TestNdjsonReader(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.dir / "cars.ndjson"
+        self.cars = [
+            Car("Audi", 1000.0 + i, "Diesel", "Maio", 2010, 1000 * i, 100, f"u{i}")
+            for i in range(5)
+        ]
+        with self.path.open("w", encoding="utf-8") as f:
+            for car in self.cars:
+                f.write(json.dumps(car.as_dict()) + "\n")
+            f.write('\n{"brand": "Au')
+
+    def test_iter_cars_skips_incomplete_lines(self):
+        from analysis.ndjson_reader import iter_cars
+
+        self.assertEqual(list(iter_cars(self.path)), self.cars)
+
+    def test_iter_batches(self):
+        from analysis.ndjson_reader import iter_batches
+
+        batches = list(iter_batches(self.path, batch_size=2))
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual([car for batch in batches for car in batch], self.cars)
+
+    def test_read_ndjson_to_dataframe(self):
+        from analysis.ndjson_reader import read_ndjson
+
+        data = read_ndjson(self.path).to_dataframe()
+        self.assertEqual(list(data["url"]), [car.url for car in self.cars])
+        self.assertEqual(str(data["year"].dtype), "Int64")
+
+    def test_analysis_keeps_rows_without_month(self):
+        from analysis.data_analysis import DataAnalysisBase
+
+        # Sem mês (modo rápido) a linha fica; sem preço é descartada
+        extra = [
+            Car("Seat", 900.0, "Diesel", None, 2011, 5, 90, "f"),
+            Car("Seat", None, "Diesel", "Maio", 2011, 5, 90, "g"),
+        ]
+        with self.path.open("a", encoding="utf-8") as f:
+            for car in extra:
+                f.write("\n" + json.dumps(car.as_dict()))
+        data = DataAnalysisBase(self.path).get_data()
+        self.assertEqual(list(data["url"]), [car.url for car in self.cars] + ["f"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# tests/test_parquet_store.py
+
+import importlib.util
+import io
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from tests import ANALYSIS_AVAILABLE, ExporterTestCase, make_car
+
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+
+class ParquetTestCase(ExporterTestCase):
+    def exporter(self):
+        return self.make_exporter(ExportParquet=True)
+
+    def car(self, i):
+        return make_car(i, mileage=None)
+
+
+class TestParquetExport(ParquetTestCase):
+    def test_disabled_without_pyarrow(self):
+        output = io.StringIO()
+        with mock.patch("scraping.sinks.import_pyarrow", return_value=None):
+            with redirect_stdout(output):
+                exporter = self.exporter()
+        self.assertIsNone(exporter.sink("parquet"))
+        self.assertIn("pyarrow", output.getvalue())
+        exporter.append_to_csv(self.car(1))
+        exporter.close()
+        self.assertFalse(exporter.parquet_dirname.exists())
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow não instalado")
+    def test_batches_are_row_groups_in_date_partition(self):
+        import pyarrow.parquet as pq
+
+        exporter = self.exporter()
+        exporter.append_to_csv(self.car(1))
+        exporter.append_to_csv(self.car(2))
+        exporter.flush()
+        exporter.append_to_csv(self.car(3))
+        exporter.close()
+        files = list(exporter.parquet_dirname.glob("scrape_date=*/*.parquet"))
+        self.assertEqual(len(files), 1)
+        parquet_file = pq.ParquetFile(files[0])
+        self.assertEqual(parquet_file.metadata.num_row_groups, 2)
+        rows = parquet_file.read().to_pylist()
+        self.assertEqual(rows, [self.car(i).as_dict() for i in (1, 2, 3)])
+
+
+# A leitura passa pelo pacote analysis
+@unittest.skipUnless(
+    PYARROW_AVAILABLE and ANALYSIS_AVAILABLE, "pyarrow/pandas/matplotlib não instalados"
+)
+class TestParquetReader(ParquetTestCase):
+    def test_read_selected_columns_and_dates(self):
+        from analysis.parquet_reader import read_parquet
+
+        exporter = self.exporter()
+        exporter.sink("parquet").dataset.write([self.car(1).as_dict()], scrape_date="2024-01-01")
+        exporter.sink("parquet").dataset.write([self.car(2).as_dict()], scrape_date="2024-01-02")
+        exporter.close()
+
+        data = read_parquet(exporter.parquet_dirname, columns=["url", "year"])
+        self.assertEqual(sorted(data["url"]), ["u1", "u2"])
+        self.assertEqual(list(data.columns), ["url", "year"])
+        self.assertEqual(str(data["year"].dtype), "Int64")
+
+        data = read_parquet(exporter.parquet_dirname, dates=["2024-01-02"])
+        self.assertEqual(list(data["url"]), ["u2"])
+        data = read_parquet(exporter.parquet_dirname, start="2024-01-01", end="2024-01-01")
+        self.assertEqual(list(data["url"]), ["u1"])
+
+    def test_read_while_file_is_open(self):
+        from analysis.parquet_reader import read_parquet
+
+        exporter = self.exporter()
+        exporter.sink("parquet").dataset.write([self.car(1)], scrape_date="2024-01-01")
+        exporter.close()
+        # Um arquivo ainda aberto (recolha em curso ou interrompida) é ignorado
+        exporter.sink("parquet").dataset.write([self.car(2)], scrape_date="2024-01-01")
+        try:
+            data = read_parquet(exporter.parquet_dirname)
+            self.assertEqual(list(data["url"]), ["u1"])
+        finally:
+            exporter.close()
+        self.assertEqual(sorted(read_parquet(exporter.parquet_dirname)["url"]), ["u1", "u2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
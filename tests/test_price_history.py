@@ -0,0 +1,87 @@
+# tests/test_price_history.py
+
+import unittest
+
+from scraping.car import Car
+from scraping.price_history import PriceHistory
+from tests import ExporterTestCase, TempDirTestCase
+
+URL = "https://www.standvirtual.com/carros/anuncio/audi-s3-ID8PyN1P.html"
+
+
+def car(price, month="Maio", url=URL):
+    return Car("Audi S3", price, "Gasolina", month, 2006, 279981, 265, url)
+
+
+class TestPriceHistory(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.history = PriceHistory(self.dir / "history.sqlite")
+        self.addCleanup(self.history.close)
+
+    def count(self, table):
+        return self.history.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_changes_are_recorded_only_when_values_differ(self):
+        self.assertEqual(self.history.record([car(17500.0)], seen=1.0), 0)
+        self.assertEqual(self.history.record([car(17500.0)], seen=2.0), 0)
+        self.assertEqual(self.history.record([car(16900.0).as_dict()], seen=3.0), 1)
+        self.assertEqual(self.count("listings"), 1)
+        self.assertEqual(self.history.history(URL), [(3.0, {"price": [17500.0, 16900.0]})])
+
+    def test_missing_values_are_not_changes(self):
+        self.history.record([car(17500.0)], seen=1.0)
+        self.history.record([car(17500.0, month=None)], seen=2.0)
+        self.assertEqual(self.count("changes"), 0)
+
+    def test_listing_is_matched_by_id(self):
+        self.history.record([car(17500.0)], seen=1.0)
+        other_url = URL.replace("audi-s3", "audi-s3-sportback")
+        self.history.record([car(17000.0, url=other_url)], seen=2.0)
+        self.assertEqual(self.count("listings"), 1)
+        self.assertEqual(len(self.history.history("ID8PyN1P")), 1)
+
+    def test_rows_without_values_are_ignored(self):
+        self.assertEqual(self.history.record([Car(url=URL)], seen=1.0), 0)
+        self.assertEqual(self.count("listings"), 0)
+        self.history.record([car(17500.0)], seen=2.0)
+        self.assertEqual(self.history.history(URL), [])
+
+    def test_price_drops(self):
+        self.history.record([car(17500.0)], seen=1.0)
+        self.history.record([car(18000.0)], seen=2.0)
+        self.history.record([car(16000.0)], seen=3.0)
+        self.assertEqual(self.history.price_drops(), [("ID8PyN1P", 3.0, 18000.0, 16000.0)])
+        self.assertEqual(self.history.price_drops(since=4.0), [])
+
+
+class TestHistoryExport(ExporterTestCase):
+    def test_exporter_records_skipped_duplicates(self):
+        exporter = self.make_exporter(ExportHistory=True)
+        self.assertTrue(exporter.append_to_csv(car(17500.0)))
+        exporter.flush()
+        self.assertFalse(exporter.append_to_csv(car(16900.0)))
+        exporter.close()
+        history = PriceHistory(exporter.history_filename)
+        try:
+            changes = history.history(URL)
+        finally:
+            history.close()
+        self.assertEqual([fields for _, fields in changes], [{"price": [17500.0, 16900.0]}])
+
+    def test_exporter_skips_rows_without_data(self):
+        exporter = self.make_exporter(ExportHistory=True)
+        # Página que não foi lida: só a URL, ignorada pelo exportador e pelo histórico
+        self.assertFalse(exporter.append_to_csv(Car(url=URL)))
+        exporter.flush()
+        self.assertTrue(exporter.append_to_csv(car(17500.0)))
+        exporter.close()
+        history = PriceHistory(exporter.history_filename)
+        try:
+            self.assertEqual(history.history(URL), [])
+        finally:
+            history.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
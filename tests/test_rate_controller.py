@@ -0,0 +1,33 @@
+# tests/test_rate_controller.py
+
+import unittest
+
+from scraping.rate_controller import AdaptiveRateController
+from scraping.rate_limiter import RateLimiter
+
+URL = "https://www.standvirtual.com/carros?page=1"
+HOST = "www.standvirtual.com"
+
+
+class TestAdaptiveRateController(unittest.TestCase):
+    def setUp(self):
+        self.limiter = RateLimiter(1.0, 1)
+        self.controller = AdaptiveRateController(self.limiter, min_rate=0.1, max_rate=4.0)
+
+    def test_healthy_responses_increase_rate(self):
+        for _ in range(5):
+            self.controller.record(URL, 200, 0.1)
+        self.assertGreater(self.limiter.host_rate(HOST), 1.0)
+
+    def test_reset_rates_after_reload(self):
+        self.controller.record(URL, 200, 0.1)
+        # RateLimit alterado no config.txt (ver ScraperController.refresh_config)
+        self.limiter.configure(0.2)
+        self.controller.min_rate = 0.1
+        self.controller.reset_rates(0.2)
+        self.controller.record(URL, 200, 0.1)
+        self.assertLess(self.limiter.host_rate(HOST), 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+# tests/test_rate_limiter.py
+
+import unittest
+from unittest import mock
+
+from scraping.rate_limiter import RateLimiter
+
+URL = "https://www.standvirtual.com/carros?page=1"
+OTHER_URL = "https://www.example.com/"
+HOST = "www.standvirtual.com"
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        # Relógio parado, avançado à mão com tick()
+        self.now = 100.0
+        clock = mock.patch("scraping.rate_limiter.time")
+        clock.start().monotonic.side_effect = lambda: self.now
+        self.addCleanup(clock.stop)
+        self.limiter = RateLimiter(2.0, 3)
+
+    def tick(self, seconds):
+        self.now += seconds
+
+    def test_burst_then_queued_turns(self):
+        self.assertEqual([self.limiter.reserve(URL) for _ in range(3)], [0.0] * 3)
+        # Saldo negativo: cada pedido seguinte fica meio segundo depois do anterior
+        self.assertEqual(self.limiter.reserve(URL), 0.5)
+        self.assertEqual(self.limiter.reserve(URL), 1.0)
+        self.tick(1.0)
+        self.assertEqual(self.limiter.reserve(URL), 0.5)
+
+    def test_refill_is_capped_at_burst(self):
+        for _ in range(3):
+            self.limiter.reserve(URL)
+        self.tick(60.0)
+        self.assertEqual([self.limiter.reserve(URL) for _ in range(3)], [0.0] * 3)
+        self.assertEqual(self.limiter.reserve(URL), 0.5)
+
+    def test_hosts_are_limited_separately(self):
+        for _ in range(4):
+            self.limiter.reserve(URL)
+        self.assertEqual(self.limiter.reserve(OTHER_URL), 0.0)
+
+    def test_configure_updates_existing_hosts(self):
+        self.limiter.reserve(URL)
+        self.limiter.configure(4.0, 1)
+        self.assertEqual(self.limiter.host_rate(HOST), 4.0)
+        # Rajada reduzida a 1: dos dois tokens que sobravam fica só um
+        self.assertEqual(self.limiter.reserve(URL), 0.0)
+        self.assertEqual(self.limiter.reserve(URL), 0.25)
+
+    def test_host_rate(self):
+        self.limiter.set_host_rate(HOST, 0.5)
+        self.assertEqual(self.limiter.host_rate(HOST), 0.5)
+        self.assertEqual(self.limiter.host_rate("www.example.com"), 2.0)
+
+    def test_zero_rate_disables_limit(self):
+        limiter = RateLimiter(0, 1)
+        self.assertEqual([limiter.reserve(URL) for _ in range(10)], [0.0] * 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+# tests/test_retry.py
+
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from scraping.config import Config
+from scraping.html_fetcher import HTMLFetcher
+from scraping.retry import CircuitBreaker
+
+URL = "https://www.standvirtual.com/carros/anuncio/audi-s3-ID8PyN1P.html"
+
+
+def open_circuit(breaker):
+    """ Abre o circuito do host de URL com o tempo de recuperação já esgotado. """
+    with redirect_stdout(StringIO()):
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure(URL)
+    breaker.state(URL).open_until = 0.0
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=2)
+        open_circuit(self.breaker)
+
+    def test_single_probe(self):
+        probe = object()
+        self.assertEqual(self.breaker.wait_time(URL, probe), 0.0)
+        self.assertEqual(self.breaker.wait_time(URL), CircuitBreaker.PROBE_INTERVAL)
+
+    def test_release_probe_only_by_owner(self):
+        probe = object()
+        self.breaker.wait_time(URL, probe)
+        self.breaker.release_probe(URL, object())
+        self.assertEqual(self.breaker.wait_time(URL), CircuitBreaker.PROBE_INTERVAL)
+        self.breaker.release_probe(URL, probe)
+        self.assertEqual(self.breaker.wait_time(URL), 0.0)
+
+    def test_fetch_error_releases_probe(self):
+        fetcher = HTMLFetcher(dict(Config.DEFAULTS, HTTPCache="off", RateLimit=1000.0))
+        self.addCleanup(fetcher.close)
+        fetcher.circuit_breaker = self.breaker
+        with mock.patch.object(fetcher.client, "get", side_effect=ValueError("falha")):
+            with redirect_stdout(StringIO()):
+                self.assertIsNone(fetcher.fetch_text(URL))
+        # O teste terminou sem sucesso nem falha registados: o próximo pedido testa
+        self.assertEqual(self.breaker.wait_time(URL), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+# tests/test_scraper_controller.py
+
+import asyncio
+import csv
+import io
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import httpx
+
+from scraping.config import Config
+from scraping.scraper_controller import ScraperController
+from tests import ExporterTestCase
+
+FIXTURES = Path(__file__).parent / "fixtures"
+SEARCH_PAGE = (FIXTURES / "search_page.html").read_text(encoding="utf-8")
+ITEM_PAGE = (FIXTURES / "item_page.html").read_text(encoding="utf-8")
+BASE_URL = Config.DEFAULTS["BaseURL"]
+# Anúncios da página de pesquisa guardada, dos quais um com o cartão incompleto
+LISTINGS = 10
+
+
+class ControllerTestCase(ExporterTestCase):
+    """
+    Recolhas completas com um transporte HTTP simulado: a página de pesquisa devolve
+    a de tests/fixtures e cada anúncio a mesma página de automóvel.
+    """
+
+    def setUp(self):
+        super().setUp()
+        config_path = self.dir / "config.txt"
+        config_path.write_text(
+            "HTTPCache:off\nAdaptiveRate:false\nRateLimit:1000\nRateBurst:100\n",
+            encoding="utf-8",
+        )
+        self.config = Config(str(config_path))
+        self.item_requests = []
+        # Chamado em cada pedido de um anúncio (ex.: para parar a recolha)
+        self.on_item = None
+
+    async def respond(self, request):
+        url = str(request.url)
+        if url.startswith(BASE_URL):
+            return httpx.Response(200, text=SEARCH_PAGE)
+        self.item_requests.append(url)
+        if self.on_item is not None:
+            self.on_item()
+        # Como na rede, a resposta demora: a análise e a escrita avançam entretanto
+        await asyncio.sleep(0.02)
+        return httpx.Response(200, text=ITEM_PAGE)
+
+    def controller(self):
+        controller = ScraperController(self.config, self.make_exporter())
+        fetcher = controller.html_fetcher
+        self.addCleanup(fetcher.close)
+        options = fetcher.client_options()
+        fetcher.client_options = lambda: dict(
+            options, transport=httpx.MockTransport(self.respond)
+        )
+        return controller
+
+    def crawl(self, controller=None, **options):
+        controller = controller or self.controller()
+        with redirect_stdout(io.StringIO()):
+            return controller.run(**options)
+
+    def stop_after(self, controller, items):
+        """ Para a recolha no pedido do anúncio nº `items`. """
+
+        def stop():
+            if len(self.item_requests) == items:
+                controller.stop()
+
+        self.on_item = stop
+
+    def exported_urls(self):
+        with (self.dir / "cars.csv").open("r", encoding="utf-8", newline="") as f:
+            return [row["url"] for row in csv.DictReader(f)]
+
+    def journal(self):
+        """ Devolve as páginas e os automóveis registados no diário da recolha. """
+        pages, items = set(), set()
+        with (self.dir / "checkpoint.log").open("r", encoding="utf-8") as f:
+            for line in f:
+                kind, _, value = line.rstrip("\n").partition("\t")
+                if kind == "page":
+                    pages.add(int(value))
+                else:
+                    items.add(value)
+        return pages, items
+
+
+class TestScraperController(ControllerTestCase):
+    def test_crawl_exports_every_listing(self):
+        status = self.crawl(concurrency=2)
+        self.assertEqual(status, "Recolha concluída com sucesso.")
+        urls = self.exported_urls()
+        self.assertEqual(len(urls), LISTINGS)
+        self.assertEqual(sorted(urls), sorted(self.item_requests))
+        self.assertEqual(self.journal(), ({1}, set(urls)))
+
+    def test_fast_mode_only_fetches_incomplete_cards(self):
+        self.crawl(fast_mode=True)
+        self.assertEqual(len(self.item_requests), 1)
+        self.assertEqual(len(self.exported_urls()), LISTINGS)
+        self.assertEqual(self.journal()[0], {1})
+
+    def test_stop_keeps_journal_in_step_with_csv(self):
+        controller = self.controller()
+        self.stop_after(controller, 5)
+        status = self.crawl(controller)
+        self.assertIn("cancelada", status)
+        urls = self.exported_urls()
+        self.assertTrue(0 < len(urls) < LISTINGS)
+        # Só os automóveis escritos no CSV constam do diário; a página fica por concluir
+        self.assertEqual(self.journal(), (set(), set(urls)))
+
+    def test_resume_skips_finished_listings(self):
+        controller = self.controller()
+        self.stop_after(controller, 5)
+        self.crawl(controller)
+        done = set(self.exported_urls())
+        self.assertTrue(done)
+        self.on_item = None
+        self.item_requests = []
+        self.crawl(resume=True)
+        self.assertEqual(len(self.item_requests), LISTINGS - len(done))
+        self.assertFalse(done & set(self.item_requests))
+        urls = self.exported_urls()
+        self.assertEqual(len(urls), LISTINGS)
+        self.assertEqual(len(set(urls)), LISTINGS)
+        self.assertEqual(self.journal(), ({1}, set(urls)))
+
+    def test_parse_processes(self):
+        status = self.crawl(parse_processes=True, parse_workers=1)
+        self.assertEqual(status, "Recolha concluída com sucesso.")
+        self.assertEqual(len(self.exported_urls()), LISTINGS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+# tests/test_sinks.py
+
+import io
+import json
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from scraping.sinks import Sink, SQLiteSink
+from tests import ExporterTestCase
+
+
+class ListSink(Sink):
+    """ Destino de teste: guarda os lotes recebidos numa lista. """
+
+    name = "list"
+
+    def __init__(self, receives_skipped=False):
+        self.batches = []
+        self.receives_skipped = receives_skipped
+
+    def write(self, cars):
+        self.batches.append(cars)
+
+
+class BlockingSink(ListSink):
+    """ Destino de teste que só termina a escrita quando `release` é ativado. """
+
+    name = "blocking"
+
+    def __init__(self):
+        super().__init__()
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, cars):
+        self.writing.set()
+        self.release.wait(5)
+        super().write(cars)
+
+
+class FailingSink(Sink):
+    name = "failing"
+
+    def write(self, cars):
+        raise OSError("disco cheio")
+
+
+class TestSinks(ExporterTestCase):
+    batch_size = 2
+
+    def setUp(self):
+        super().setUp()
+        self.config = self.exporter_config()
+        self.exporter = self.make_exporter()
+
+    def test_configured_sinks(self):
+        self.assertEqual([sink.name for sink in self.exporter.sinks], ["csv", "ndjson"])
+        self.assertIsNone(SQLiteSink.create(self.exporter, self.config))
+        config = dict(self.config, ExportSQLite=True)
+        self.assertIsInstance(SQLiteSink.create(self.exporter, config), SQLiteSink)
+        self.assertIsNone(self.exporter.sink("parquet"))
+
+    def test_custom_sink_receives_cars(self):
+        sink = ListSink()
+        history = ListSink(receives_skipped=True)
+        self.exporter.add_sink(sink)
+        self.exporter.add_sink(history)
+        self.exporter.append(self.car(1))
+        self.exporter.append({"brand": "VW", "price": "2500", "url": "u2"})
+        self.exporter.append(self.car(1))
+        self.exporter.close()
+        self.assertEqual([car.url for batch in sink.batches for car in batch], ["u1", "u2"])
+        self.assertEqual(sink.batches[0][1].price, 2500.0)
+        self.assertEqual(
+            [car.url for batch in history.batches for car in batch], ["u1", "u2", "u1"]
+        )
+
+    def test_slow_sink_does_not_block_append(self):
+        sink = BlockingSink()
+        self.exporter.add_sink(sink)
+        self.exporter.append(self.car(1))
+        self.exporter.append(self.car(2))
+        self.assertTrue(sink.writing.wait(2))
+        started = time.monotonic()
+        for i in range(3, 10):
+            self.exporter.append(self.car(i))
+        self.assertLess(time.monotonic() - started, 0.5)
+        sink.release.set()
+        self.exporter.close()
+        self.assertEqual(sum(len(batch) for batch in sink.batches), 9)
+
+    def test_failing_optional_sink_is_reported(self):
+        self.exporter.add_sink(FailingSink())
+        flushed = []
+        self.exporter.flush_observers.append(flushed.extend)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.exporter.append(self.car(1))
+            self.exporter.close()
+        self.assertIn("Erro na exportação (failing): disco cheio", output.getvalue())
+        self.assertEqual([car.url for car in flushed], ["u1"])
+        with self.exporter.csv_filename.open("r", encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_failed_csv_batch_returns_to_queue(self):
+        output = io.StringIO()
+        csv_sink = self.exporter.sink("csv")
+        with redirect_stdout(output):
+            with mock.patch.object(csv_sink, "write", side_effect=OSError("disco cheio")):
+                self.exporter.append(self.car(1))
+                self.assertFalse(self.exporter.flush())
+                # Ainda na fila: nem no índice, nem aceite de novo
+                self.assertNotIn("u1", self.exporter.index)
+                self.assertFalse(self.exporter.append(self.car(1)))
+            self.assertTrue(self.exporter.flush())
+        self.assertIn("1 automóveis voltam à fila", output.getvalue())
+        self.assertIn("u1", self.exporter.index)
+        with self.exporter.csv_filename.open("r", encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_failed_ndjson_batch_is_rebuilt_on_close(self):
+        ndjson_sink = self.exporter.sink("ndjson")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            with mock.patch.object(
+                ndjson_sink, "write_cars", side_effect=OSError("disco cheio")
+            ):
+                self.exporter.append(self.car(1))
+                self.assertTrue(self.exporter.flush())
+            self.exporter.append(self.car(2))
+            self.exporter.close()
+        self.assertIn("Erro na exportação (ndjson): disco cheio", output.getvalue())
+        self.assertFalse(ndjson_sink.stale)
+        with self.exporter.ndjson_filename.open("r", encoding="utf-8") as f:
+            self.assertEqual([json.loads(line)["url"] for line in f], ["u1", "u2"])
+
+    def test_flush_thread_survives_csv_error(self):
+        self.exporter.flush_interval = 0.05
+        flushed = []
+        self.exporter.flush_observers.append(flushed.extend)
+        csv_sink = self.exporter.sink("csv")
+        write = csv_sink.write
+        errors = [OSError("disco cheio")]
+
+        def flaky_write(cars):
+            if errors:
+                raise errors.pop()
+            write(cars)
+
+        with redirect_stdout(io.StringIO()):
+            with mock.patch.object(csv_sink, "write", side_effect=flaky_write):
+                self.exporter.append(self.car(1))
+                self.exporter.append(self.car(2))
+                deadline = time.monotonic() + 2
+                while len(flushed) < 2 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+        self.assertEqual([car.url for car in flushed], ["u1", "u2"])
+        self.assertTrue(self.exporter.flush_thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()